@@ -2,6 +2,7 @@ import json
 import boto3
 from botocore.config import Config
 import os
+import time
 from io import StringIO
 import pandas as pd
 
@@ -22,10 +23,18 @@ def get_parameter_value(parameter_name, decrypt=True):
     response = ssm_client.get_parameter(Name=parameter_name, WithDecryption=decrypt)
     return response["Parameter"]["Value"]
 
+# secrets are read once per SECRETS_CACHE_TTL_SECONDS and process
+secrets_cache_ttl = float(os.environ.get('SECRETS_CACHE_TTL_SECONDS', "3600"))
+secrets_cache = {}
+
 # get secret from secret manager
 def get_credentials(secret_id: str) -> str:
+    cached = secrets_cache.get(secret_id)
+    if cached is not None and time.monotonic() < cached[0]:
+        return cached[1]
     response = secmgr_client.get_secret_value(SecretId=secret_id)
     secrets_value = json.loads(response["SecretString"])
+    secrets_cache[secret_id] = (time.monotonic() + secrets_cache_ttl, secrets_value)
     return secrets_value
 
 # Loading the data from S3
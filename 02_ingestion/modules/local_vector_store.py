@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+HNSW_FILE = "hnsw.bin"
+VERSIONS_DIR = ".versions"
+LATEST_FILE = "LATEST"
+
+
+def _build_hnsw(path, vectors):
+    try:
+        import hnswlib
+    except ImportError:
+        print("hnswlib is not installed, the chatbot builds the HNSW graph on load if needed")
+        return
+    index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), ef_construction=200, M=16)
+    index.add_items(np.asarray(vectors), np.arange(len(vectors)))
+    index.save_index(os.path.join(path, HNSW_FILE))
+
+
+def _swap_in(path, version_path):
+    # a symlink is replaced atomically, so readers see either the old or the new version
+    link_path = f"{os.path.dirname(version_path)}.link"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(os.path.relpath(version_path, os.path.dirname(path)), link_path)
+    previous_path = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):
+        # stores written before versioning are directories that a symlink cannot replace
+        legacy_path = f"{version_path}-legacy"
+        os.rename(path, legacy_path)
+        previous_path = legacy_path
+    os.replace(link_path, path)
+    return previous_path
+
+
+def _remove_old_versions(path, keep):
+    # the previous version is kept for readers that resolved the link before the swap
+    versions_path = os.path.join(os.path.dirname(path), VERSIONS_DIR, os.path.basename(path))
+    keep = {os.path.realpath(version_path) for version_path in keep if version_path}
+    for version in os.listdir(versions_path):
+        version_path = os.path.join(versions_path, version)
+        if os.path.realpath(version_path) not in keep:
+            shutil.rmtree(version_path, ignore_errors=True)
+
+
+def _upload_to_s3(s3_uri, name, version, version_path):
+    import boto3
+
+    bucket, _, prefix = s3_uri.removeprefix("s3://").partition("/")
+    prefix = f"{prefix.strip('/')}/{name}".lstrip("/")
+    s3_client = boto3.client("s3")
+    for file_name in os.listdir(version_path):
+        s3_client.upload_file(
+            os.path.join(version_path, file_name), bucket, f"{prefix}/{version}/{file_name}"
+        )
+    # readers only download a version after the pointer to it was written
+    s3_client.put_object(Bucket=bucket, Key=f"{prefix}/{LATEST_FILE}", Body=version.encode("utf-8"))
+    print(f"local vector store {name} uploaded to s3://{bucket}/{prefix}/{version}")
+
+
+def write_local_vector_store(
+    path,
+    docs,
+    embeddings,
+    friendly_name,
+    embedding_endpoint_name,
+    region,
+    batch_size=32,
+    build_hnsw=True,
+    s3_uri=None,
+):
+    """Writes documents and their embeddings as a local vector store for the chatbot.
+
+    Every ingestion writes a new version of the store to the .versions directory next
+    to it. The path is a symlink to the current version that is replaced atomically,
+    so a running chatbot never reads a half-written or missing store.
+
+    Args:
+        path: Target directory of the store.
+        docs: LangChain documents to store.
+        embeddings: Object with an embed_documents method, e.g. CustomEmbeddings.
+        friendly_name: Name of the knowledge base shown in the chatbot.
+        embedding_endpoint_name: SageMaker endpoint that the chatbot uses to embed questions.
+        region: AWS region of the embedding endpoint.
+        batch_size: Number of documents embedded per request.
+        build_hnsw: Whether to prebuild the HNSW graph if hnswlib is installed.
+        s3_uri: Optional S3 location like s3://bucket/prefix that the store is also
+            uploaded to, for chatbots without access to the local disk, e.g. on Fargate.
+    """
+    path = path.rstrip("/")
+    name = os.path.basename(path)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    version_path = os.path.join(os.path.dirname(path), VERSIONS_DIR, name, version)
+    os.makedirs(version_path)
+
+    vectors = None
+    with open(os.path.join(version_path, DOCUMENTS_FILE), "w", encoding="utf-8") as documents_file:
+        for start in range(0, len(docs), batch_size):
+            batch = docs[start : start + batch_size]
+            batch_vectors = np.asarray(
+                embeddings.embed_documents([doc.page_content for doc in batch]),
+                dtype=np.float32,
+            )
+            norms = np.linalg.norm(batch_vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(version_path, VECTORS_FILE),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(len(docs), batch_vectors.shape[1]),
+                )
+            vectors[start : start + len(batch)] = batch_vectors / norms
+            for doc in batch:
+                documents_file.write(
+                    json.dumps({"text": doc.page_content, "metadata": doc.metadata}) + "\n"
+                )
+            print(f"embedded {start + len(batch)} of {len(docs)} documents")
+
+    if vectors is None:
+        raise ValueError("Cannot write an empty local vector store.")
+    vectors.flush()
+    if build_hnsw:
+        _build_hnsw(version_path, vectors)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "friendly_name": friendly_name,
+        "embedding_endpoint_name": embedding_endpoint_name,
+        "region": region,
+        "count": len(docs),
+        "dimensions": int(vectors.shape[1]),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    del vectors
+    with open(os.path.join(version_path, MANIFEST_FILE), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    previous_path = _swap_in(path, version_path)
+    _remove_old_versions(path, keep=[version_path, previous_path])
+    if s3_uri:
+        _upload_to_s3(s3_uri, name, version, version_path)
+    print(f"local vector store with {len(docs)} documents written to {path}")
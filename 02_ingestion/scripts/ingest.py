@@ -2,6 +2,7 @@
 import json
 import os
 import re
+import sys
 
 import awswrangler as wr
 import boto3
@@ -22,6 +23,10 @@ os_index_name = os.getenv("OPENSEARCH_INDEX_NAME")
 hf_predictor_endpoint_name = os.getenv('ENDPOINT_NAME')
 #TODO: find a better way to app app specific prefix
 app_prefix = os.getenv("APP_PREFIX")
+# optional directory to additionally write a local vector store for the chatbot
+local_vector_store_path = os.getenv("LOCAL_VECTOR_STORE_PATH")
+# optional S3 location like s3://bucket/prefix that the local vector store is uploaded to
+local_vector_store_s3_uri = os.getenv("LOCAL_VECTOR_STORE_S3_URI")
 
 def get_credentials(secret_id: str, region_name: str) -> str:
     client = boto3.client("secretsmanager", region_name=region_name)
@@ -131,3 +136,19 @@ print(len(docs))
 # adding document to open search index with progress bar
 for doc in docs:
     docsearch.add_documents(documents=[doc])
+
+if local_vector_store_path or local_vector_store_s3_uri:
+    import tempfile
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from modules.local_vector_store import write_local_vector_store
+
+    write_local_vector_store(
+        os.path.join(local_vector_store_path or tempfile.mkdtemp(), os_index_name),
+        docs,
+        custom_embeddings,
+        friendly_name=os.getenv("LOCAL_VECTOR_STORE_FRIENDLY_NAME", os_index_name),
+        embedding_endpoint_name=hf_predictor_endpoint_name,
+        region=region,
+        s3_uri=local_vector_store_s3_uri,
+    )
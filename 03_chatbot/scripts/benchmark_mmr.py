@@ -0,0 +1,43 @@
+""" Measures the latency of maximal marginal relevance over candidate pools of different sizes.
+
+Usage:
+    python scripts/benchmark_mmr.py --dimensions 1024 --k 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+from chatbot.retrieval.mmr import maximal_marginal_relevance  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[50, 100, 300, 500])
+    parser.add_argument("--repetitions", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for pool_size in args.pool_sizes:
+        query = rng.standard_normal(args.dimensions).astype(np.float32)
+        candidates = rng.standard_normal((pool_size, args.dimensions)).astype(np.float32)
+        latencies = []
+        for _ in range(args.repetitions):
+            start_time = time.perf_counter()
+            maximal_marginal_relevance(query, candidates, k=args.k)
+            latencies.append(time.perf_counter() - start_time)
+        print(
+            f"pool={pool_size:>4} k={args.k}: "
+            f"median={statistics.median(latencies) * 1000:.2f} ms "
+            f"max={max(latencies) * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+""" Compares latency of vector and hybrid search against an Amazon OpenSearch index.
+
+Usage:
+    python scripts/benchmark_open_search_hybrid.py \\
+        --endpoint https://<DOMAIN>.<REGION>.es.amazonaws.com \\
+        --index <INDEX> --secret-id <SECRET_ID> --embedding-endpoint <ENDPOINT> \\
+        --queries queries.txt
+
+The queries file contains one query per line.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import boto3  # noqa: E402
+from chatbot.open_search import (  # noqa: E402
+    OpenSearchIndexRetriever,
+    get_credentials,
+    get_open_search_client,
+)
+from sagemaker.huggingface.model import HuggingFacePredictor  # noqa: E402
+from sagemaker.session import Session  # noqa: E402
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run(retriever, queries, repetitions):
+    latencies = []
+    for _ in range(repetitions):
+        for query in queries:
+            start_time = time.perf_counter()
+            retriever.get_relevant_documents(query)
+            latencies.append(time.perf_counter() - start_time)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", required=True)
+    parser.add_argument("--index", required=True)
+    parser.add_argument("--secret-id", required=True)
+    parser.add_argument("--embedding-endpoint", required=True)
+    parser.add_argument("--queries", required=True)
+    parser.add_argument("--region", default=os.environ.get("AWS_DEFAULT_REGION"))
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.queries, encoding="utf-8") as queries_file:
+        queries = [line.strip() for line in queries_file if line.strip()]
+
+    credentials = get_credentials(args.secret_id, args.region)
+    http_auth = (credentials["user"] or "admin", credentials["password"])
+    predictor = HuggingFacePredictor(
+        endpoint_name=args.embedding_endpoint,
+        sagemaker_session=Session(boto3.Session(region_name=args.region)),
+    )
+    client = get_open_search_client(args.endpoint, http_auth)
+
+    for search_type, fusion in [("vector", "rrf"), ("hybrid", "rrf"), ("hybrid", "score")]:
+        retriever = OpenSearchIndexRetriever(
+            args.index,
+            args.endpoint,
+            http_auth=http_auth,
+            embeddings_predictor=predictor,
+            k=args.k,
+            client=client,
+            search_type=search_type,
+            fusion=fusion,
+        )
+        # warm up connection pool and embedding endpoint
+        retriever.get_relevant_documents(queries[0])
+        latencies = run(retriever, queries, args.repetitions)
+        print(
+            f"{search_type:>6} {fusion:>5}: "
+            f"p50={statistics.median(latencies) * 1000:.1f} ms "
+            f"p95={percentile(latencies, 0.95) * 1000:.1f} ms "
+            f"n={len(latencies)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+""" Counts the render calls and rendered chat messages per streamed response.
+
+Compares re-rendering the chat history for every token with rendering only the streamed
+message once per frame. Tokens arrive at a fixed rate, no Streamlit server is needed.
+
+Usage:
+    python scripts/benchmark_stream_rendering.py --tokens 400 --tokens-per-second 80
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from chatbot.ui.stream_handler import StreamHandler  # noqa: E402
+
+
+def stream(handler: StreamHandler, tokens: int, tokens_per_second: float) -> float:
+    start_time = time.perf_counter()
+    for _ in range(tokens):
+        handler.on_llm_new_token("token ")
+        time.sleep(1 / tokens_per_second)
+    handler.on_llm_end(None)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--history-messages", type=int, default=40)
+    parser.add_argument("--frame-interval-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    rendered_messages = {"history": 0, "placeholder": 0}
+
+    def render_history_and_message(text: str):
+        rendered_messages["history"] += args.history_messages + 1
+
+    def render_placeholder(text: str):
+        rendered_messages["placeholder"] += 1
+
+    runs = [
+        ("history per token", "history", StreamHandler(render_history_and_message, frame_interval=0)),
+        (
+            f"placeholder per {args.frame_interval_ms:g} ms",
+            "placeholder",
+            StreamHandler(render_placeholder, frame_interval=args.frame_interval_ms / 1000),
+        ),
+    ]
+    for label, key, handler in runs:
+        duration = stream(handler, args.tokens, args.tokens_per_second)
+        print(
+            f"{label:>24}: render calls={handler.render_count:>5} "
+            f"rendered messages={rendered_messages[key]:>6} "
+            f"stream duration={duration:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 import os
 
+from chatbot.catalog.flow_catalog_item_rag import get_configured_reranker
 from chatbot.helpers import ChatbotEnvironment
+from chatbot.llm_cache import configure_llm_cache
 from chatbot.ui import write_chatbot
 
 dirname = os.path.dirname(__file__)
 
 environment = ChatbotEnvironment()
+configure_llm_cache()
+# the reranker model loads in the background instead of on the first question
+get_configured_reranker()
 write_chatbot(dirname, environment)
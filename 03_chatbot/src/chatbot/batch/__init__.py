@@ -0,0 +1,9 @@
+""" This module contains a runner that answers files of questions outside the Streamlit UI."""
+from .batch_runner import (
+    BackendLimits,
+    BatchItem,
+    BatchResult,
+    BatchRunner,
+    load_answered_ids,
+    load_items,
+)
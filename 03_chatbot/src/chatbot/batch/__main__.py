@@ -0,0 +1,3 @@
+from .batch_runner import main
+
+main()
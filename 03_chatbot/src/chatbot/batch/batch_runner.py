@@ -0,0 +1,443 @@
+""" Module that contains a runner that answers a file of questions with a chatbot flow.
+
+Usage:
+    python -m chatbot.batch --input questions.jsonl --output answers.jsonl \\
+        --model "Anthropic Claude V2" --retriever "My OpenSearch index" \\
+        --concurrency 8 --limit bedrock=4 --limit opensearch=8
+
+The input contains one JSON object per line with a question and an optional ID:
+    {"id": "password-reset", "question": "How do I reset my password?"}
+
+Every answer is appended to the output as soon as it is generated:
+    {"id": "password-reset", "question": "...", "answer": "...", "sources": ["https://..."],
+     "latency_ms": 2350.1, "time_to_first_token_ms": 410.7, "retrieval_ms": 180.2, "error": null}
+
+Running the same command again skips the questions that already have an answer in the
+output and retries the ones that failed.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.llm_app import LLMApp
+from chatbot.retrieval.evaluation import percentile
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.memory import ChatMessageHistory
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+
+@dataclass
+class BatchItem:
+    """Question of a batch run."""
+
+    id: str
+    """ Identifies the question in the output, e.g. to resume a run. """
+    question: str
+
+
+@dataclass
+class BatchResult:
+    """Answer, sources and timings of one question."""
+
+    item: BatchItem
+    answer: Optional[str]
+    sources: List[str]
+    latency: float
+    """ Seconds from the start of the question to the full answer. """
+    time_to_first_token: Optional[float] = None
+    """ Seconds until the model streamed the first token, None if it did not stream. """
+    retrieval_latency: Optional[float] = None
+    """ Seconds the retriever took, None if the flow did not retrieve documents. """
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the result as JSON serializable dict."""
+
+        def to_ms(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else seconds * 1000
+
+        return {
+            "id": self.item.id,
+            "question": self.item.question,
+            "answer": self.answer,
+            "sources": self.sources,
+            "latency_ms": to_ms(self.latency),
+            "time_to_first_token_ms": to_ms(self.time_to_first_token),
+            "retrieval_ms": to_ms(self.retrieval_latency),
+            "error": self.error,
+        }
+
+
+def load_items(path: str) -> List[BatchItem]:
+    """Loads questions from a JSON lines file. Questions without ID get their line number."""
+    items = []
+    with open(path, encoding="utf-8") as input_file:
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            items.append(BatchItem(str(row.get("id", line_number)), row["question"]))
+    return items
+
+
+def load_answered_ids(path: str) -> Set[str]:
+    """Returns the IDs of the questions that were answered without error in an output file."""
+    if not os.path.exists(path):
+        return set()
+    answered_ids = set()
+    with open(path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # the last line is incomplete if a previous run was killed
+                continue
+            if row.get("error") is None:
+                answered_ids.add(str(row["id"]))
+    return answered_ids
+
+
+class TimingHandler(BaseCallbackHandler):
+    """Records when the first token arrived and how long the retriever took."""
+
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.time_to_first_token: Optional[float] = None
+        self.retrieval_latency: Optional[float] = None
+        self._retrieval_start: Optional[float] = None
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self.start_time
+
+    def on_retriever_start(self, serialized: Dict[str, Any], query: str, **kwargs: Any) -> None:
+        self._retrieval_start = time.perf_counter()
+
+    def on_retriever_end(self, documents: Any, **kwargs: Any) -> None:
+        if self._retrieval_start is not None:
+            self.retrieval_latency = (self.retrieval_latency or 0.0) + (
+                time.perf_counter() - self._retrieval_start
+            )
+
+
+class BackendLimits:
+    """Bounds the number of questions in flight per backend, e.g. "bedrock" or "opensearch".
+
+    Args:
+        limits: Maximum number of concurrent questions per backend name. Backends
+            without limit are only bounded by the concurrency of the run.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = dict(limits or {})
+        self._semaphores = {
+            backend: threading.BoundedSemaphore(limit) for backend, limit in self.limits.items()
+        }
+
+    @contextmanager
+    def acquire(self, backends: Iterable[str]) -> Iterator[None]:
+        """Waits until all backends have capacity and holds it until the block exits."""
+        # a fixed order prevents deadlocks between questions that use several backends
+        semaphores = [
+            self._semaphores[backend]
+            for backend in sorted(set(backends))
+            if backend in self._semaphores
+        ]
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                semaphore.acquire()
+                acquired.append(semaphore)
+            yield
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+
+def _get_answer_text(app: LLMApp, response: Any) -> str:
+    text = app.get_output(response)
+    if isinstance(text, dict):
+        # agents reply with a dictionary
+        text = text.get("output", text.get("answer"))
+    return str(text)
+
+
+def _get_sources(response: Any, source_key: str) -> List[str]:
+    if not isinstance(response, dict):
+        return []
+    sources = [
+        str(doc.metadata.get(source_key)) for doc in response.get("source_documents", [])
+    ]
+    return list(dict.fromkeys(sources))
+
+
+class BatchRunner:
+    """Answers questions concurrently with the LLM app of a flow.
+
+    A new app is created for every question, so questions do not share chat history.
+
+    Args:
+        app_factory: Creates the LLM app, e.g. with FlowCatalogItem.llm_app_factory.
+        backends: Names of the backends that every question uses, e.g. ["bedrock", "opensearch"].
+        concurrency: Number of questions answered at the same time. Default: 1
+        backend_limits: Limits for the number of questions in flight per backend.
+        source_key: Metadata key that identifies the source of a document. Default: "source"
+
+    Example:
+        ```python
+        runner = BatchRunner(
+            lambda: flow.llm_app_factory(model, retriever, None, prompt_catalog, None, model),
+            backends=["bedrock", "opensearch"],
+            concurrency=8,
+            backend_limits=BackendLimits({"bedrock": 4}),
+        )
+        summary = runner.run(load_items("questions.jsonl"), "answers.jsonl")
+        ```
+    """
+
+    def __init__(
+        self,
+        app_factory: Callable[[], Optional[LLMApp]],
+        backends: Iterable[str] = (),
+        concurrency: int = 1,
+        backend_limits: Optional[BackendLimits] = None,
+        source_key: str = "source",
+    ):
+        self.app_factory = app_factory
+        self.backends = [backend for backend in backends if backend]
+        self.concurrency = concurrency
+        self.backend_limits = backend_limits or BackendLimits()
+        self.source_key = source_key
+        self._output_lock = threading.Lock()
+
+    def _run_item(self, item: BatchItem) -> BatchResult:
+        with self.backend_limits.acquire(self.backends):
+            start_time = time.perf_counter()
+            timing = TimingHandler(start_time)
+            try:
+                app = self.app_factory()
+                if app is None:
+                    raise ValueError("The flow did not create an app, check the knowledge base.")
+                response = app.run_llm(item.question, ChatMessageHistory(), callbacks=[timing])
+                answer = _get_answer_text(app, response)
+            except Exception as error:  # the output records failed questions instead of aborting
+                logger.warning("Batch question %s failed: %s", item.id, error)
+                return BatchResult(
+                    item, None, [], time.perf_counter() - start_time, error=str(error)
+                )
+            latency = time.perf_counter() - start_time
+        return BatchResult(
+            item,
+            answer,
+            _get_sources(response, self.source_key),
+            latency,
+            time_to_first_token=timing.time_to_first_token,
+            retrieval_latency=timing.retrieval_latency,
+        )
+
+    def run(
+        self, items: List[BatchItem], output_path: str, resume: bool = True
+    ) -> Dict[str, Any]:
+        """Answers all questions and appends the results to a JSON lines file.
+
+        Args:
+            items: Questions to answer.
+            output_path: JSON lines file that receives one result per question.
+            resume: Skip questions that were answered without error in the output
+                file. If False, the output file is overwritten. Default: True
+
+        Returns:
+            JSON serializable summary with the number of errors, latency percentiles
+            and throughput of this run.
+        """
+        answered_ids = load_answered_ids(output_path) if resume else set()
+        pending = [item for item in items if item.id not in answered_ids]
+        logger.info(
+            "Answering %s questions, %s were answered before.",
+            len(pending),
+            len(items) - len(pending),
+        )
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output_file:
+
+            def run_and_write(item: BatchItem) -> BatchResult:
+                result = self._run_item(item)
+                with self._output_lock:
+                    output_file.write(json.dumps(result.to_dict(), default=str) + "\n")
+                    output_file.flush()
+                return result
+
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = list(executor.map(run_and_write, pending))
+            duration = time.perf_counter() - start_time
+
+        def milliseconds(values: List[Optional[float]]) -> Dict[str, float]:
+            values_ms = [value * 1000 for value in values if value is not None]
+            return {
+                "p50": percentile(values_ms, 0.50),
+                "p90": percentile(values_ms, 0.90),
+                "p99": percentile(values_ms, 0.99),
+                "max": max(values_ms, default=0.0),
+            }
+
+        succeeded = [result for result in results if result.error is None]
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "questions": len(results),
+            "skipped": len(items) - len(pending),
+            "errors": len(results) - len(succeeded),
+            "concurrency": self.concurrency,
+            "backend_limits": self.backend_limits.limits,
+            "latency_ms": milliseconds([result.latency for result in succeeded]),
+            "time_to_first_token_ms": milliseconds(
+                [result.time_to_first_token for result in succeeded]
+            ),
+            "retrieval_ms": milliseconds([result.retrieval_latency for result in succeeded]),
+            "throughput_qps": len(results) / duration if duration > 0 else 0.0,
+        }
+
+
+def _get_backend(item) -> Optional[str]:
+    """Returns the backend of a catalog item, e.g. "bedrock"."""
+    return item.backend if item is not None else None
+
+
+def _find(catalog, friendly_name: Optional[str], kind: str):
+    if friendly_name is None:
+        return None
+    for item in catalog:
+        if item.friendly_name == friendly_name:
+            return item
+    available = ", ".join(item.friendly_name for item in catalog)
+    raise ValueError(f"{kind} {friendly_name!r} not found. Available: {available}")
+
+
+def _parse_limits(limits: List[str]) -> Dict[str, int]:
+    parsed = {}
+    for limit in limits:
+        backend, _, value = limit.partition("=")
+        if not value:
+            raise ValueError(f"Backend limit {limit!r} is not of the form BACKEND=N")
+        parsed[backend] = int(value)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a JSON lines file of questions with a chatbot flow."
+    )
+    parser.add_argument("--input", required=True, help="JSON lines file with questions")
+    parser.add_argument("--output", required=True, help="JSON lines file for the answers")
+    parser.add_argument("--model", required=True, help="Friendly name of the language model")
+    parser.add_argument("--retriever", help="Friendly name of the knowledge base")
+    parser.add_argument("--filter", nargs="*", default=[], help="Indices or data sources to search")
+    parser.add_argument("--top-k", type=int, help="Number of documents to retrieve")
+    parser.add_argument("--flow", help="Friendly name of the flow, by default RAG with a knowledge base and chat without")
+    parser.add_argument("--agent-chain", help="Friendly name of the agent chain of the agents flow")
+    parser.add_argument("--sql-connection-uri", help="Database of the SQL agent chain")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--limit",
+        action="append",
+        default=[],
+        metavar="BACKEND=N",
+        help="Maximum number of questions in flight for a backend, e.g. bedrock=4",
+    )
+    parser.add_argument("--source-key", default="source")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming")
+    args = parser.parse_args()
+
+    import boto3
+    from chatbot.catalog import (
+        AgentChainCatalog,
+        FlowCatalog,
+        ModelCatalog,
+        PromptCatalog,
+        RetrieverCatalog,
+    )
+    from chatbot.catalog.flow_catalog_item_rag import RETRIEVAL_AUGMENTED_GENERATION
+    from chatbot.catalog.flow_catalog_item_simple_chat import SIMPLE_CHATBOT
+    from chatbot.config import AppConfigProvider
+    from chatbot.helpers import (
+        ChatbotEnvironment,
+        ChatbotEnvironmentVariables,
+        get_current_account_id,
+    )
+    from chatbot.llm_cache import configure_llm_cache
+
+    environment = ChatbotEnvironment()
+    configure_llm_cache()
+    app_config = AppConfigProvider(
+        environment.get_env_variable(ChatbotEnvironmentVariables.AWSAppConfigApplication),
+        environment.get_env_variable(ChatbotEnvironmentVariables.AWSAppConfigEnvironment),
+        environment.get_env_variable(ChatbotEnvironmentVariables.AWSAppConfigProfile),
+    ).config
+    region = boto3.Session().region_name or environment.get_env_variable(
+        ChatbotEnvironmentVariables.AWSRegion
+    )
+    account_id = get_current_account_id()
+
+    flow_catalog = FlowCatalog(account_id, [region], logger)
+    flow_catalog.bootstrap()
+    flow_name = args.flow or (RETRIEVAL_AUGMENTED_GENERATION if args.retriever else SIMPLE_CHATBOT)
+    flow = _find(flow_catalog, flow_name, "Flow")
+
+    model_catalog = ModelCatalog(
+        [region],
+        bedrock_config=app_config.amazon_bedrock or [],
+        logger=logger,
+        llm_config=app_config.llm_config.parameters,
+    )
+    model_catalog.bootstrap()
+    model = _find(model_catalog, args.model, "Model")
+
+    retriever = None
+    if args.retriever:
+        retriever_catalog = RetrieverCatalog(account_id, [region], app_config, logger)
+        retriever_catalog.bootstrap()
+        retriever = _find(retriever_catalog, args.retriever, "Retriever")
+        if args.filter:
+            retriever.current_filter = [
+                option
+                for option in retriever.available_filter_options or []
+                if option[0] in args.filter
+            ]
+        if args.top_k is not None:
+            retriever.top_k = args.top_k
+
+    agent_chain = None
+    if args.agent_chain:
+        agent_chain_catalog = AgentChainCatalog([region], logger)
+        agent_chain_catalog.bootstrap()
+        agent_chain = _find(agent_chain_catalog, args.agent_chain, "Agent chain")
+
+    prompt_catalog = PromptCatalog()
+    runner = BatchRunner(
+        lambda: flow.llm_app_factory(
+            model, retriever, agent_chain, prompt_catalog, args.sql_connection_uri, model
+        ),
+        backends=[_get_backend(model), _get_backend(retriever)],
+        concurrency=args.concurrency,
+        backend_limits=BackendLimits(_parse_limits(args.limit)),
+        source_key=args.source_key,
+    )
+    summary = runner.run(load_items(args.input), args.output, resume=not args.no_resume)
+    summary["flow"] = flow.friendly_name
+    summary["model"] = model.friendly_name
+    summary["retriever"] = args.retriever
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
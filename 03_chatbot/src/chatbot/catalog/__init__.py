@@ -38,10 +38,12 @@ from .agent_chain_catalog import (
 
 from .retriever_catalog_item_kendra import KendraRetrieverItem, RetrieverCatalogItem
 from .retriever_catalog_item_open_search import OpenSearchRetrieverItem, RetrieverCatalogItem
+from .retriever_catalog_item_local_vector_store import LocalVectorStoreRetrieverItem
 from .retriever_catalog import (
     Catalog,
     RetrieverCatalog,
     KendraRetrieverItem,
+    LocalVectorStoreRetrieverItem,
     OpenSearchRetrieverItem,
 )
 from .retriever_catalog_item import (
@@ -52,7 +54,16 @@ from .retriever_catalog_item import (
 from .model_catalog import BedrockModelItem, Catalog, ModelCatalog, SageMakerModelItem
 from .model_catalog_item import CatalogItem, ModelCatalogItem
 from .model_catalog_item_bedrock import BedrockModelItem, ModelCatalogItem
+from .model_catalog_item_bedrock_hedged import HedgedBedrockModelItem
 from .model_catalog_item_sagemaker import ModelCatalogItem, SageMakerModelItem
 
+from .bootstrap_executor import BootstrapExecutor
+from .catalog_snapshot import CatalogSnapshotStore
+from .catalog_registry import CatalogRegistry, copy_catalog, get_catalog_registry
+from .tagged_resource_discovery import (
+    TaggedResourceDiscovery,
+    get_tagged_resource_discovery,
+)
+
 from .prompt_catalog import CatalogById, PromptCatalog, PromptCatalogItem  # noqa
 from .prompt_catalog_item import CatalogItem, PromptCatalogItem
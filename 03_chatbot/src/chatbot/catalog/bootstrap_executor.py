@@ -0,0 +1,198 @@
+""" Module that contains an executor that runs independent catalog discovery calls concurrently.
+"""
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from logging import Logger
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+NESTED_TIMEOUT_SHARE = 0.8
+""" Share of the time left to the parent call after which nested calls are given up. """
+
+
+@dataclass
+class BootstrapCallTiming:
+    """Duration and outcome of one discovery call."""
+
+    name: str
+    duration: float
+    """ Seconds the call took, or waited for if it timed out. """
+    status: str
+    """ One of "ok", "error" or "timeout". """
+
+
+class BootstrapExecutor:
+    """Runs independent discovery calls of a catalog bootstrap on a bounded thread pool.
+
+    Calls that fail or exceed the timeout are logged and left out of the results, so
+    that one slow region or resource does not block or break the whole catalog. Calls
+    may run further calls through the same executor, each level gets its own pool.
+    Nested calls are given up after NESTED_TIMEOUT_SHARE of the time that is left to
+    their parent call, so that the parent still returns the results of the others
+    instead of timing out itself.
+
+    Args:
+        logger: Logger for failures and the timing breakdown.
+        max_workers: Maximum number of concurrent calls per level. Default: 8
+        timeout: Seconds after which a running call is given up. Default: 20
+
+    Example:
+        ```python
+        executor = BootstrapExecutor(logger)
+        domains_per_region = executor.map("opensearch:list_domains", list_domains, regions)
+        executor.log_timings()
+        ```
+    """
+
+    def __init__(self, logger: Logger, max_workers: int = 8, timeout: float = 20):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.timings: List[BootstrapCallTiming] = []
+        self._timings_lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_environment(cls, logger: Logger) -> "BootstrapExecutor":
+        """Creates an executor with the limits from the environment variables."""
+        env = ChatbotEnvironment()
+        return cls(
+            logger,
+            max_workers=int(
+                env.get_env_variable(ChatbotEnvironmentVariables.CatalogBootstrapMaxWorkers)
+            ),
+            timeout=float(
+                env.get_env_variable(
+                    ChatbotEnvironmentVariables.CatalogBootstrapTimeoutSeconds
+                )
+            ),
+        )
+
+    def run(self, calls: Dict[str, Callable[[], R]]) -> Dict[str, R]:
+        """Runs calls concurrently.
+
+        Args:
+            calls: Functions without arguments by name.
+
+        Returns:
+            Results by name of the calls that finished in time without error.
+        """
+        names = list(calls)
+        results = self._run_all(names, [calls[name] for name in names])
+        return {name: result for name, (ok, result) in zip(names, results) if ok}
+
+    def map(
+        self,
+        name: str,
+        function: Callable[[T], R],
+        items: Iterable[T],
+        label: Callable[[T], str] = str,
+    ) -> List[R]:
+        """Applies a function to all items concurrently.
+
+        Args:
+            name: Name of the call in logs.
+            function: Function to apply.
+            items: Arguments of the calls.
+            label: Describes an item in logs. Default: str
+
+        Returns:
+            Results in the order of the items, without calls that failed or timed out.
+        """
+        items = list(items)
+        results = self._run_all(
+            [f"{name}({label(item)})" for item in items],
+            [lambda item=item: function(item) for item in items],
+        )
+        return [result for ok, result in results if ok]
+
+    def log_timings(self) -> None:
+        """Logs the duration of all calls, slowest first."""
+        for timing in sorted(self.timings, key=lambda timing: -timing.duration):
+            self.logger.info(
+                "Catalog call %s: %s in %.3f seconds", timing.name, timing.status, timing.duration
+            )
+
+    def _record(self, name: str, duration: float, status: str) -> None:
+        with self._timings_lock:
+            self.timings.append(BootstrapCallTiming(name, duration, status))
+
+    def _run_all(self, names: List[str], functions: List[Callable[[], R]]) -> List[tuple]:
+        results: List[tuple] = [(False, None)] * len(functions)
+        if not functions:
+            return results
+
+        parent_deadline = getattr(self._local, "deadline", None)
+        level_deadline = (
+            math.inf
+            if parent_deadline is None
+            else time.perf_counter()
+            + max(0.0, parent_deadline - time.perf_counter()) * NESTED_TIMEOUT_SHARE
+        )
+        started_at: Dict[int, float] = {}
+        deadlines: Dict[int, float] = {}
+
+        def call(position: int):
+            started_at[position] = time.perf_counter()
+            deadlines[position] = min(started_at[position] + self.timeout, level_deadline)
+            # nested calls of this call run against its deadline
+            self._local.deadline = deadlines[position]
+            try:
+                return functions[position]()
+            finally:
+                self._local.deadline = None
+
+        pool = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(functions)),
+            thread_name_prefix="catalog-bootstrap",
+        )
+        futures: Dict[Future, int] = {
+            pool.submit(call, position): position for position in range(len(functions))
+        }
+        pending = set(futures)
+        while pending:
+            now = time.perf_counter()
+            timed_out = {
+                future
+                for future in pending
+                # calls that have not started by the deadline of the level cannot finish
+                if now >= level_deadline
+                or (futures[future] in deadlines and now >= deadlines[futures[future]])
+            }
+            for future in timed_out:
+                position = futures[future]
+                duration = now - started_at.get(position, now)
+                self.logger.warning(
+                    "Catalog call %s timed out after %.1f seconds", names[position], duration
+                )
+                self._record(names[position], duration, "timeout")
+            pending -= timed_out
+            if not pending:
+                break
+
+            next_deadline = min(
+                [deadlines[futures[f]] for f in pending if futures[f] in deadlines]
+                + [level_deadline]
+            )
+            wait_time = max(0.0, min(next_deadline - now, self.timeout))
+            done, pending = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = futures[future]
+                duration = time.perf_counter() - started_at.get(position, now)
+                error: Optional[BaseException] = future.exception()
+                if error is None:
+                    results[position] = (True, future.result())
+                    self._record(names[position], duration, "ok")
+                else:
+                    self.logger.warning("Catalog call %s failed: %s", names[position], error)
+                    self._record(names[position], duration, "error")
+        # calls that timed out keep running in the background, their results are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+        return results
@@ -1,7 +1,7 @@
 """ Module for catalogs that contain base items. """
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, List, TypeVar
+from typing import Any, ClassVar, Dict, List, TypeVar
 
 from .catalog_item import CatalogItem
 
@@ -17,6 +17,9 @@ class Catalog(ABC, List[T]):
     regions: List[str]
     """ List of regions where the catalog looks for resources. """
 
+    supports_snapshots: ClassVar[bool] = False
+    """ Whether the catalog can be persisted with to_snapshot and filled with restore. """
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -26,6 +29,19 @@ class Catalog(ABC, List[T]):
         Bootstraps the catalog.
         """
 
+    def to_snapshot(self) -> List[Dict[str, Any]]:
+        """Returns the items that can be restored from a snapshot as JSON serializable dicts."""
+        return [data for data in (item.to_dict() for item in self) if data is not None]
+
+    def restore(self, items: List[Dict[str, Any]]) -> None:
+        """Fills the catalog from a snapshot instead of bootstrapping it.
+
+        Catalogs that set supports_snapshots override this, the default does nothing.
+
+        Args:
+            items: Items as returned by to_snapshot.
+        """
+
     def get_friendly_names(self) -> List[str]:
         """A friendly name is a human readable name that can be used in to represent an item.
 
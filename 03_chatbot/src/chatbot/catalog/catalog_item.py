@@ -2,7 +2,7 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Generic, TypeVar
+from typing import Any, ClassVar, Dict, Generic, Optional, TypeVar
 
 T = TypeVar("T")
 
@@ -13,9 +13,20 @@ class CatalogItem(ABC, Generic[T]):
 
     friendly_name: str
 
+    backend: ClassVar[Optional[str]] = None
+    """ AWS service that the item calls, e.g. "bedrock", None if it calls none. """
+
     @abstractmethod
     def get_instance(self) -> T:
         """Returns an instance of the item."""
 
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Returns the item as JSON serializable dict for catalog snapshots.
+
+        Returns:
+            None if the item cannot be restored from a snapshot.
+        """
+        return None
+
     def __str__(self):
         return self.friendly_name
@@ -0,0 +1,208 @@
+""" Module that contains a process-wide registry of bootstrapped catalogs.
+"""
+import copy
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional
+
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+
+from .catalog import Catalog, CatalogItem
+from .catalog_snapshot import CatalogSnapshotStore
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+
+@dataclass
+class _RegistryEntry:
+    catalog: Catalog
+    """ Bootstrapped catalog that is shared by all sessions. Never changed after bootstrap. """
+    loaded_at: float
+    """ Monotonic time of the bootstrap. """
+    refreshing: bool = False
+    """ Whether a background refresh is running. """
+
+
+def _copy_item(item: CatalogItem) -> CatalogItem:
+    item_copy = copy.copy(item)
+    for name, value in vars(item).items():
+        # selected filters, model parameters and callbacks are changed per session
+        if isinstance(value, (dict, list, set)):
+            item_copy.__dict__[name] = copy.copy(value)
+    return item_copy
+
+
+def copy_catalog(catalog: Catalog) -> Catalog:
+    """Returns a copy of a catalog that one session can change.
+
+    Items are copied together with their dict, list and set attributes, so that the
+    filters and parameters selected in one session do not leak into other sessions.
+    Clients and loaded data of the items are shared.
+    """
+    session_catalog = copy.copy(catalog)
+    session_catalog[:] = [_copy_item(item) for item in catalog]
+    return session_catalog
+
+
+class CatalogRegistry:
+    """Process-wide registry that bootstraps each catalog once and shares it between sessions.
+
+    The first session bootstraps a catalog. Later sessions get a copy of the current
+    snapshot immediately. Once a snapshot is older than the TTL, the next request
+    starts a refresh in a background thread and keeps handing out the previous
+    snapshot until the refresh finished.
+
+    With a snapshot store, a new process restores catalogs from the last persisted
+    snapshot instead of waiting for discovery and refreshes them in the background.
+
+    Args:
+        ttl: Seconds after which a catalog is bootstrapped again. 0 bootstraps the
+            catalog for every session. Default: 900
+        snapshot_store: Where bootstrapped catalogs are persisted. Default: None
+
+    Example:
+        ```python
+        registry = CatalogRegistry(ttl=900)
+        model_catalog = registry.get(
+            ("model", tuple(regions)),
+            lambda: ModelCatalog(regions, bedrock_config, llm_config, logger),
+        )
+        ```
+    """
+
+    def __init__(self, ttl: float = 900, snapshot_store: Optional[CatalogSnapshotStore] = None):
+        self.ttl = ttl
+        self.snapshot_store = snapshot_store
+        self._entries: Dict[Hashable, _RegistryEntry] = {}
+        self._bootstrap_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], Catalog]) -> Catalog:
+        """Returns a session copy of the current snapshot of a catalog.
+
+        Args:
+            key: Identifies the catalog and the settings it is bootstrapped with.
+            factory: Creates the catalog. The registry calls its bootstrap method.
+
+        Returns:
+            A bootstrapped catalog that the calling session may change.
+        """
+        if self.ttl <= 0:
+            return self._bootstrap(key, factory)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key, factory)
+        elif time.monotonic() - entry.loaded_at >= self.ttl:
+            self._refresh_in_background(key, entry, factory)
+        return copy_catalog(entry.catalog)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drops one catalog or, without a key, all catalogs so that they are bootstrapped again."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _load(self, key: Hashable, factory: Callable[[], Catalog]) -> _RegistryEntry:
+        with self._lock:
+            bootstrap_lock = self._bootstrap_locks.setdefault(key, threading.Lock())
+        # sessions that start at the same time wait for a single bootstrap
+        with bootstrap_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                restored = self._restore(key, factory)
+                if restored is not None:
+                    # serve the snapshot now and reconcile it with AWS in the background
+                    entry = _RegistryEntry(restored, time.monotonic() - self.ttl)
+                    with self._lock:
+                        self._entries[key] = entry
+                    self._refresh_in_background(key, entry, factory)
+                    return entry
+                entry = _RegistryEntry(self._bootstrap(key, factory), time.monotonic())
+                with self._lock:
+                    self._entries[key] = entry
+            return entry
+
+    def _restore(self, key: Hashable, factory: Callable[[], Catalog]) -> Optional[Catalog]:
+        if self.snapshot_store is None:
+            return None
+        catalog = factory()
+        if not catalog.supports_snapshots:
+            return None
+        items = self.snapshot_store.load(key)
+        if items is None:
+            return None
+        start_time = time.perf_counter()
+        try:
+            catalog.restore(items)
+        except Exception:  # a broken snapshot must not keep the app from starting
+            logger.exception("Restoring catalog %s from snapshot failed", key)
+            return None
+        logger.info(
+            "Catalog %s with %s items restored from snapshot in %.3f seconds",
+            key,
+            len(catalog),
+            time.perf_counter() - start_time,
+        )
+        return catalog
+
+    def _refresh_in_background(
+        self, key: Hashable, entry: _RegistryEntry, factory: Callable[[], Catalog]
+    ) -> None:
+        with self._lock:
+            if entry.refreshing or self._entries.get(key) is not entry:
+                return
+            entry.refreshing = True
+
+        def refresh():
+            try:
+                catalog = self._bootstrap(key, factory)
+            except Exception:  # sessions keep the previous snapshot
+                logger.exception("Refreshing catalog %s failed", key)
+                with self._lock:
+                    entry.refreshing = False
+                    entry.loaded_at = time.monotonic()
+                return
+            with self._lock:
+                self._entries[key] = _RegistryEntry(catalog, time.monotonic())
+
+        threading.Thread(target=refresh, name="catalog-refresh", daemon=True).start()
+
+    def _bootstrap(self, key: Hashable, factory: Callable[[], Catalog]) -> Catalog:
+        start_time = time.perf_counter()
+        catalog = factory()
+        catalog.bootstrap()
+        logger.info(
+            "Catalog %s with %s items bootstrapped in %.3f seconds",
+            key,
+            len(catalog),
+            time.perf_counter() - start_time,
+        )
+        if self.snapshot_store is not None and self.ttl > 0 and catalog.supports_snapshots:
+            self.snapshot_store.save(key, catalog)
+        return catalog
+
+
+_catalog_registry: Optional[CatalogRegistry] = None
+_catalog_registry_lock = threading.Lock()
+
+
+def get_catalog_registry() -> CatalogRegistry:
+    """Returns the process-wide catalog registry."""
+    global _catalog_registry
+    with _catalog_registry_lock:
+        if _catalog_registry is None:
+            env = ChatbotEnvironment()
+            snapshot_uri = env.get_env_variable(ChatbotEnvironmentVariables.CatalogSnapshotURI)
+            _catalog_registry = CatalogRegistry(
+                ttl=float(env.get_env_variable(ChatbotEnvironmentVariables.CatalogTTLSeconds)),
+                snapshot_store=CatalogSnapshotStore(snapshot_uri) if snapshot_uri else None,
+            )
+        return _catalog_registry
@@ -0,0 +1,106 @@
+""" Module that contains a store for versioned catalog snapshots in Amazon S3 or on local disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional
+
+import botocore
+from chatbot.helpers import get_client
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+
+from .catalog import Catalog
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+SNAPSHOT_FORMAT_VERSION = 1
+""" Snapshots with another format version are ignored. Increase it when to_dict changes. """
+
+
+class CatalogSnapshotStore:
+    """Reads and writes catalog snapshots, so that a new process starts without discovery.
+
+    Args:
+        uri: S3 URI ("s3://bucket/prefix") or local directory of the snapshots.
+
+    Example:
+        ```python
+        store = CatalogSnapshotStore("s3://my-bucket/catalog-snapshots")
+        store.save(("model", ("eu-central-1",)), model_catalog)
+        items = store.load(("model", ("eu-central-1",)))
+        ```
+    """
+
+    def __init__(self, uri: str):
+        self.uri = uri.rstrip("/")
+
+    def _file_name(self, key: Hashable) -> str:
+        key_hash = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+        name = key[0] if isinstance(key, tuple) and key else "catalog"
+        return f"{name}-{key_hash}.json"
+
+    def _split_s3_uri(self, key: Hashable):
+        bucket, _, prefix = self.uri[len("s3://") :].partition("/")
+        object_key = self._file_name(key) if not prefix else f"{prefix}/{self._file_name(key)}"
+        return bucket, object_key
+
+    def load(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Returns the items of the snapshot of a catalog, or None if there is no usable snapshot."""
+        try:
+            if self.uri.startswith("s3://"):
+                bucket, object_key = self._split_s3_uri(key)
+                body = get_client("s3").get_object(Bucket=bucket, Key=object_key)["Body"]
+                snapshot = json.loads(body.read())
+            else:
+                with open(
+                    os.path.join(self.uri, self._file_name(key)), encoding="utf-8"
+                ) as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+        except FileNotFoundError:
+            return None
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError, ValueError) as err:
+            logger.info("No catalog snapshot for %s.\n%s", key, err)
+            return None
+
+        if snapshot.get("format_version") != SNAPSHOT_FORMAT_VERSION or snapshot.get(
+            "key"
+        ) != repr(key):
+            logger.info("Ignoring incompatible catalog snapshot for %s", key)
+            return None
+        logger.info("Catalog snapshot for %s from %s loaded", key, snapshot.get("created_at"))
+        return snapshot["items"]
+
+    def save(self, key: Hashable, catalog: Catalog) -> None:
+        """Writes the snapshot of a catalog. Failures are logged and otherwise ignored."""
+        snapshot = json.dumps(
+            {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "key": repr(key),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "items": catalog.to_snapshot(),
+            },
+            # Kendra data sources contain timestamps
+            default=str,
+        )
+        try:
+            if self.uri.startswith("s3://"):
+                bucket, object_key = self._split_s3_uri(key)
+                get_client("s3").put_object(
+                    Bucket=bucket,
+                    Key=object_key,
+                    Body=snapshot.encode("utf-8"),
+                    ContentType="application/json",
+                )
+            else:
+                os.makedirs(self.uri, exist_ok=True)
+                # write and rename, so that other processes never read a partial snapshot
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=self.uri, suffix=".tmp", delete=False, encoding="utf-8"
+                ) as snapshot_file:
+                    snapshot_file.write(snapshot)
+                os.replace(snapshot_file.name, os.path.join(self.uri, self._file_name(key)))
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError, OSError) as err:
+            logger.warning("Cannot write catalog snapshot for %s.\n%s", key, err)
@@ -1,5 +1,7 @@
 """ Module that contains a class that represents a File Upload retriever catalog item. """
+import hashlib
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 from langchain.chains.base import Chain
 
@@ -9,13 +11,80 @@ from .flow_catalog_item import FlowCatalogItem
 from .retriever_catalog_item import RetrieverCatalogItem
 from .catalog import CatalogById
 from .model_catalog_item import ModelCatalogItem
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
 from chatbot.llm_app import BaseLLMApp, LLMApp, RAGApp
+from chatbot.retrieval import (
+    ContextPacker,
+    CrossEncoderReranker,
+    RerankingRetriever,
+    get_cross_encoder_reranker,
+    get_token_counter,
+)
+from chatbot.semantic_cache import get_semantic_cache
 from .agent_chain_catalog_item import AgentChainCatalogItem
+from langchain.schema import BaseRetriever
 
 
 RETRIEVAL_AUGMENTED_GENERATION = "Retrieval Augmented Generation"
 
 
+def get_configured_reranker() -> Optional[CrossEncoderReranker]:
+    """Returns the reranker configured with RERANKER_MODEL, or None without one.
+
+    The first call starts loading the model in the background, e.g. at app start.
+    """
+    env = ChatbotEnvironment()
+    model_name = env.get_env_variable(ChatbotEnvironmentVariables.RerankerModel)
+    if not model_name:
+        return None
+    return get_cross_encoder_reranker(
+        model_name,
+        batch_size=int(env.get_env_variable(ChatbotEnvironmentVariables.RerankerBatchSize)),
+        backend=env.get_env_variable(ChatbotEnvironmentVariables.RerankerBackend),
+    )
+
+
+def _get_reranker_settings() -> Optional[Tuple[str, str, int, float]]:
+    """Reranker model, backend, candidate count and latency budget, or None without a reranker."""
+    env = ChatbotEnvironment()
+    model_name = env.get_env_variable(ChatbotEnvironmentVariables.RerankerModel)
+    if not model_name:
+        return None
+    return (
+        model_name,
+        env.get_env_variable(ChatbotEnvironmentVariables.RerankerBackend),
+        int(env.get_env_variable(ChatbotEnvironmentVariables.RerankerCandidateCount)),
+        float(env.get_env_variable(ChatbotEnvironmentVariables.RerankerLatencyBudgetMs)),
+    )
+
+
+def _get_reranking_retriever(retriever: RetrieverCatalogItem) -> Optional[BaseRetriever]:
+    """Returns the retriever wrapped in a cross-encoder reranking stage.
+
+    Returns None if no reranker model is configured or the retriever does not
+    support fetching a larger candidate pool.
+    """
+    reranker = get_configured_reranker()
+    if reranker is None:
+        return None
+    env = ChatbotEnvironment()
+    candidate_count = int(
+        env.get_env_variable(ChatbotEnvironmentVariables.RerankerCandidateCount)
+    )
+    candidates = retriever.get_candidate_instance(candidate_count)
+    if candidates is None:
+        return None
+    latency_budget_ms = float(
+        env.get_env_variable(ChatbotEnvironmentVariables.RerankerLatencyBudgetMs)
+    )
+    return RerankingRetriever(
+        base_retriever=candidates,
+        reranker=reranker,
+        top_n=retriever.top_k,
+        latency_budget=latency_budget_ms / 1000,
+    )
+
+
 @dataclass
 class RagItem(FlowCatalogItem):
     """
@@ -57,7 +126,36 @@ class RagItem(FlowCatalogItem):
             "prompts/condense_question.yaml"
         ].get_instance()
 
-        retriever = retriever.get_instance()
+        semantic_cache = get_semantic_cache()
+        semantic_cache_scope = None
+        query_embeddings = None
+        retriever_scope = retriever.get_semantic_cache_scope()
+        if semantic_cache is not None and retriever_scope is not None:
+            # the prompt hash acts as prompt version, edited prompts do not reuse answers
+            prompt_version = hashlib.sha256(repr(rag_prompt).encode("utf-8")).hexdigest()
+            semantic_cache_scope = (
+                retriever_scope,
+                # reranking and context packing change the documents the answer is based on
+                _get_reranker_settings(),
+                model.context_token_budget,
+                model.friendly_name,
+                model.rag_prompt_identifier,
+                prompt_version,
+            )
+            query_embeddings = retriever.get_query_embeddings()
+
+        retriever = _get_reranking_retriever(retriever) or retriever.get_instance()
+
+        # documents are only packed if the model configuration defines a budget
+        context_packer = None
+        if model.context_token_budget:
+            count_tokens = get_token_counter(llm)
+            # the prompt template itself takes part of the budget
+            prompt_tokens = count_tokens(getattr(rag_prompt, "template", ""))
+            context_packer = ContextPacker(
+                count_tokens,
+                token_budget=model.context_token_budget - prompt_tokens,
+            )
 
         # Checking if retriever is initialized, if not app will print retriever errors
         # TODO: implemenent error handling on app level then retriver can throw an error
@@ -67,4 +165,8 @@ class RagItem(FlowCatalogItem):
                 llm=llm,
                 condense_question_prompt_template=condense_question_prompt,
                 retriever=retriever,
+                semantic_cache=semantic_cache,
+                semantic_cache_scope=semantic_cache_scope,
+                query_embeddings=query_embeddings,
+                context_packer=context_packer,
             )
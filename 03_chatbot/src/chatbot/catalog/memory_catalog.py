@@ -4,11 +4,13 @@ import sys
 import time
 from dataclasses import dataclass
 from logging import Logger, getLogger
-from typing import List
+from typing import Any, Dict, List, Optional
 
-import boto3
+from chatbot.helpers import get_client
 
+from .bootstrap_executor import BootstrapExecutor
 from .catalog import Catalog
+from .tagged_resource_discovery import TaggedResourceDiscovery, get_tagged_resource_discovery
 from .memory_catalog_item_dynamodb_table import DynamoDBTableMemoryItem
 
 
@@ -16,24 +18,30 @@ from .memory_catalog_item_dynamodb_table import DynamoDBTableMemoryItem
 class MemoryCatalog(Catalog):
     """Class for chat history memory catalog."""
 
+    supports_snapshots = True
+
     regions: List[str]
 
     account_id: str
 
     logger: Logger
 
+    resource_discovery: TaggedResourceDiscovery
+
     def __init__(
         self,
         account_id: str,
         regions: list,
         logger: Logger = getLogger("MemoryCatalogLogger"),
+        resource_discovery: Optional[TaggedResourceDiscovery] = None,
     ) -> None:
         self.regions = regions
         self.account_id = account_id
         self.logger = logger
+        self.resource_discovery = resource_discovery or get_tagged_resource_discovery()
         super().__init__()
 
-    def _get_dynamodb_memory_table(self, account):
+    def _get_dynamodb_memory_table(self, account, executor: BootstrapExecutor):
         """Get Amazon DynamoDB table available in the account that is part of Genie."""
         start_time = time.time()
         self.logger.info("Retrieving DynamoDB memory table...")
@@ -41,7 +49,7 @@ class MemoryCatalog(Catalog):
         memory_tables = []
 
         for region in self.regions:
-            dynamodb_client = boto3.client("dynamodb", region)
+            dynamodb_client = get_client("dynamodb", region)
 
             paginator = dynamodb_client.get_paginator("list_tables")
             tables = paginator.paginate().build_full_result()["TableNames"]
@@ -50,7 +58,18 @@ class MemoryCatalog(Catalog):
                 lambda table_name, region: f"arn:aws:dynamodb:{region}:{account}:table/{table_name}"
             )
             genaix_dynamodb_tag_filter = lambda tag: tag["Key"] == "genie:memory-table"
-            for table_name in tables:
+
+            tags_by_arn = self.resource_discovery.get_tags(region, "dynamodb:table")
+            if tags_by_arn is not None:
+                memory_tables += [
+                    DynamoDBTableMemoryItem(table_name=table_name)
+                    for table_name in tables
+                    if "genie:memory-table"
+                    in tags_by_arn.get(table_name_to_arn(table_name, region=region), {})
+                ]
+                continue
+
+            def get_memory_table(table_name):
                 table_arn = table_name_to_arn(table_name, region=region)
                 tags_paginator = dynamodb_client.get_paginator("list_tags_of_resource")
                 tags = tags_paginator.paginate(
@@ -58,7 +77,15 @@ class MemoryCatalog(Catalog):
                 ).build_full_result()["Tags"]
                 genaix_tags = list(filter(genaix_dynamodb_tag_filter, tags))
                 if len(genaix_tags) > 0:
-                    memory_tables.append(DynamoDBTableMemoryItem(table_name=table_name))
+                    return DynamoDBTableMemoryItem(table_name=table_name)
+                return None
+
+            memory_tables += filter(
+                None,
+                executor.map(
+                    f"dynamodb:list_tags_of_resource({region})", get_memory_table, tables
+                ),
+            )
 
         self.logger.info(
             "%s DynamoDB tables retrieved in %s seconds",
@@ -73,7 +100,17 @@ class MemoryCatalog(Catalog):
             )
             self.append(memory_tables[0])
 
+    def restore(self, items: List[Dict[str, Any]]) -> None:
+        """Restores the memory table from a snapshot."""
+        self += [
+            DynamoDBTableMemoryItem.from_dict(data)
+            for data in items
+            if data["type"] == "dynamodb"
+        ]
+
     def bootstrap(self) -> None:
         """Bootstraps the catalog."""
 
-        self._get_dynamodb_memory_table(self.account_id)
+        executor = BootstrapExecutor.from_environment(self.logger)
+        self._get_dynamodb_memory_table(self.account_id, executor)
+        executor.log_timings()
@@ -1,5 +1,6 @@
 """ from.Module that contains a class that represents a OpenSearch retriever catalog item. """
 from dataclasses import dataclass
+from typing import Any, Dict
 
 from langchain.memory.chat_message_histories import DynamoDBChatMessageHistory
 from langchain.schema import BaseChatMessageHistory
@@ -11,6 +12,8 @@ from .memory_catalog_item import MemoryCatalogItem
 class DynamoDBTableMemoryItem(MemoryCatalogItem):
     """Class that represents a Amazon DynamoDB table memory catalog item."""
 
+    backend = "dynamodb"
+
     table_name: str
     """ DynamoDB table name """
 
@@ -18,6 +21,14 @@ class DynamoDBTableMemoryItem(MemoryCatalogItem):
         super().__init__(f"Memory table: {table_name}")
         self.table_name = table_name
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": "dynamodb", "table_name": self.table_name}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DynamoDBTableMemoryItem":
+        """Creates an item from a dict returned by to_dict."""
+        return cls(table_name=data["table_name"])
+
     def get_instance(self, session_id) -> BaseChatMessageHistory:
         return DynamoDBChatMessageHistory(
             table_name=self.table_name, session_id=session_id
@@ -1,24 +1,31 @@
 """ Module that contains a model catalog. """
 import re
+import threading
 import time
 from dataclasses import dataclass
 from logging import Logger, getLogger
-from typing import Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, List, Optional
 
-import boto3
 import botocore
 from chatbot.config import AmazonBedrock, LLMConfig
-from chatbot.helpers import get_boto_session
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables, get_client
+from chatbot.helpers.sagemaker_warmup import is_within_warmup_hours
 
+from .bootstrap_executor import BootstrapExecutor
 from .model_catalog_item_bedrock import BedrockModelItem
+from .model_catalog_item_bedrock_hedged import HedgedBedrockModelItem
 from .catalog import FRIENDLY_NAME_TAG, Catalog
 from .model_catalog_item_sagemaker import SageMakerModelItem
+from .tagged_resource_discovery import TaggedResourceDiscovery, get_tagged_resource_discovery
 
 
 @dataclass
 class ModelCatalog(Catalog):
     """Class for model catalog."""
 
+    supports_snapshots = True
+
     regions: List[str]
 
     bedrock_config: List[AmazonBedrock]
@@ -33,15 +40,23 @@ class ModelCatalog(Catalog):
         bedrock_config: List[AmazonBedrock],
         llm_config: Dict[str, LLMConfig],
         logger: Logger = getLogger("ModelCatalogLogger"),
-        callbacks = []
+        callbacks = [],
+        resource_discovery: Optional[TaggedResourceDiscovery] = None,
     ) -> None:
         self.regions = regions
+        self.resource_discovery = resource_discovery or get_tagged_resource_discovery()
         self.bedrock_config = bedrock_config
         self.logger = logger
         self.llm_config = llm_config
         self.callbacks = callbacks
         super().__init__()
 
+    def set_callbacks(self, callbacks) -> None:
+        """Sets the callbacks of the current session on the catalog and all its items."""
+        self.callbacks = callbacks
+        for item in self:
+            item.callbacks = callbacks
+
     def get_llm_config(
         self, model_id, config_model_id_regexs: List[re.Pattern]
     ) -> Optional[LLMConfig]:
@@ -54,119 +69,125 @@ class ModelCatalog(Catalog):
 
         return None
 
-    def _get_bedrock_models(self, config_model_id_regexs: List[re.Pattern]):
+    def _get_bedrock_models(
+        self, config_model_id_regexs: List[re.Pattern], executor: BootstrapExecutor
+    ):
         """Get list of Bedrock models available in the account."""
 
         start_time = time.time()
         self.logger.info("Retrieving Bedrock models in...")
-        models = []
-        for bedrock_config in self.bedrock_config:
-            region = bedrock_config.parameters.region.value
-            endpoint_url = bedrock_config.parameters.endpoint_url
-            iam_config = bedrock_config.parameters.iam
-
-            session = get_boto_session(iam_config, region)
-
-            try:
-                bedrock_client = session.client(
-                    "bedrock", region, endpoint_url=endpoint_url
-                )
-                foundation_models = bedrock_client.list_foundation_models(
-                    byOutputModality="TEXT"
-                )["modelSummaries"]
-
-                def sort_list_by_string(matching_str = "", model_list = []):
-                    for i, model in enumerate(model_list):
-                        if(matching_str in model["modelId"]):
-                            model_list = [model_list[i]] + model_list[:i] + model_list[i+1:]
-                    return model_list
-                
-                # surface anthropic models first, then ai21, then others
-                foundation_models = sort_list_by_string("ai21", foundation_models)
-                foundation_models = sort_list_by_string("anthropic", foundation_models)
-
-                models += [
-                    BedrockModelItem(
-                        model_id=fm["modelId"],
-                        llm_config=self.get_llm_config(
-                            fm["modelId"], config_model_id_regexs
-                        ),
-                        bedrock_config=bedrock_config.parameters,
-                        callbacks=self.callbacks,
-                        supports_streaming= ("responseStreamingSupported" in fm) and fm["responseStreamingSupported"]
-                    )
-                    for fm in foundation_models
-                    if any(
-                        config_model_id_regex.match(fm["modelId"])
-                        for config_model_id_regex in config_model_id_regexs
-                    )
-                ]
-
-            except (
-                botocore.exceptions.EndpointConnectionError,
-                botocore.exceptions.NoCredentialsError,
-                botocore.exceptions.ConnectTimeoutError,
-            ) as err:
-                self.logger.info(
-                    "No Amazon Bedrock models retrieved in %s.\n%s", region, err
-                )
-            except botocore.exceptions.ClientError as err:
-                self.logger.error(
-                    "There was an error while retrieving models from Amazon Bedrock.\n%s",
-                    err,
-                )
-            except botocore.exceptions.UnknownServiceError as err:
-                self.logger.info("Running without Amazon Bedrock.\n%s", err)
+        models = [
+            model
+            for config_models in executor.map(
+                "bedrock:list_foundation_models",
+                lambda bedrock_config: self._get_bedrock_config_models(
+                    bedrock_config, config_model_id_regexs
+                ),
+                self.bedrock_config,
+                label=lambda bedrock_config: bedrock_config.parameters.region.value,
+            )
+            for model in config_models
+        ]
         self.logger.info(
             "%s Bedrock models retrieved in %s seconds",
             len(models),
             time.time() - start_time,
         )
-        self += models
+        return models
+
+    def _get_bedrock_config_models(
+        self, bedrock_config: AmazonBedrock, config_model_id_regexs: List[re.Pattern]
+    ):
+        """Get list of Bedrock models of one Bedrock configuration."""
+        region = bedrock_config.parameters.region.value
+        endpoint_url = bedrock_config.parameters.endpoint_url
+        iam_config = bedrock_config.parameters.iam
+
+        try:
+            bedrock_client = get_client("bedrock", region, iam_config, endpoint_url)
+            foundation_models = bedrock_client.list_foundation_models(
+                byOutputModality="TEXT"
+            )["modelSummaries"]
+
+            def sort_list_by_string(matching_str = "", model_list = []):
+                for i, model in enumerate(model_list):
+                    if(matching_str in model["modelId"]):
+                        model_list = [model_list[i]] + model_list[:i] + model_list[i+1:]
+                return model_list
+            
+            # surface anthropic models first, then ai21, then others
+            foundation_models = sort_list_by_string("ai21", foundation_models)
+            foundation_models = sort_list_by_string("anthropic", foundation_models)
 
-    def _get_sagemaker_models(self):
+            return [
+                BedrockModelItem(
+                    model_id=fm["modelId"],
+                    llm_config=self.get_llm_config(
+                        fm["modelId"], config_model_id_regexs
+                    ),
+                    bedrock_config=bedrock_config.parameters,
+                    callbacks=self.callbacks,
+                    supports_streaming= ("responseStreamingSupported" in fm) and fm["responseStreamingSupported"]
+                )
+                for fm in foundation_models
+                if any(
+                    config_model_id_regex.match(fm["modelId"])
+                    for config_model_id_regex in config_model_id_regexs
+                )
+            ]
+
+        except (
+            botocore.exceptions.EndpointConnectionError,
+            botocore.exceptions.NoCredentialsError,
+            botocore.exceptions.ConnectTimeoutError,
+        ) as err:
+            self.logger.info(
+                "No Amazon Bedrock models retrieved in %s.\n%s", region, err
+            )
+        except botocore.exceptions.ClientError as err:
+            self.logger.error(
+                "There was an error while retrieving models from Amazon Bedrock.\n%s",
+                err,
+            )
+        except botocore.exceptions.UnknownServiceError as err:
+            self.logger.info("Running without Amazon Bedrock.\n%s", err)
+        return []
+
+    def _get_sagemaker_models(self, executor: BootstrapExecutor):
         """Get list of SageMaker models available in the account that are part of Genie."""
         start_time = time.time()
         self.logger.info("Retrieving SageMaker models...")
 
-        models = []
-
-        for region in self.regions:
-            sagemaker_client = boto3.client("sagemaker", region)
+        def get_region_models(region):
+            sagemaker_client = get_client("sagemaker", region)
 
             paginator = sagemaker_client.get_paginator("list_endpoints")
             endpoints = paginator.paginate(
                 StatusEquals="InService"
             ).build_full_result()["Endpoints"]
 
-            for endpoint in endpoints:
-                tags = sagemaker_client.list_tags(ResourceArn=endpoint["EndpointArn"])[
-                    "Tags"
+            tags_by_arn = self.resource_discovery.get_tags(region, "sagemaker:endpoint")
+            if tags_by_arn is not None:
+                endpoints = [
+                    endpoint for endpoint in endpoints if endpoint["EndpointArn"] in tags_by_arn
                 ]
-                tags_dict = {tag["Key"]: tag["Value"] for tag in tags}
-
-                if FRIENDLY_NAME_TAG in tags_dict:
-                    friendly_name = tags_dict[FRIENDLY_NAME_TAG]
-
-                    chat_prompt_identifier = "prompts/falcon_chat.yaml"
-                    if "genie:prompt-chat" in tags_dict:
-                        chat_prompt_identifier = tags_dict["genie:prompt-chat"]
-                    rag_prompt_identifier = "prompts/falcon_instruct_rag.yaml"
-                    if "genie:prompt-rag" in tags_dict:
-                        rag_prompt_identifier = tags_dict["genie:prompt-rag"]
-                    async_endpoint_s3 = None
-                    if "genie:async-endpoint-s3" in tags_dict:
-                        async_endpoint_s3 = tags_dict["genie:async-endpoint-s3"]
-                    models.append(
-                        SageMakerModelItem(
-                            model_name=friendly_name,
-                            endpoint_name=endpoint["EndpointName"],
-                            region=region,
-                            chat_prompt_identifier=chat_prompt_identifier,
-                            rag_prompt_identifier=rag_prompt_identifier,
-                            async_endpoint_s3=async_endpoint_s3,
-                        )
-                    )
+            return executor.map(
+                f"sagemaker:list_tags({region})",
+                lambda endpoint: self._get_sagemaker_model(
+                    sagemaker_client, region, endpoint, tags_by_arn
+                ),
+                endpoints,
+                label=itemgetter("EndpointName"),
+            )
+
+        models = [
+            model
+            for region_models in executor.map(
+                "sagemaker:list_endpoints", get_region_models, self.regions
+            )
+            for model in region_models
+            if model is not None
+        ]
 
         self.logger.info(
             "%s SageMaker models retrieved in %s seconds",
@@ -175,10 +196,150 @@ class ModelCatalog(Catalog):
         )
         self.logger.info(models)
 
-        self += models
+        return models
+
+    def _get_sagemaker_model(self, sagemaker_client, region, endpoint, tags_by_arn=None):
+        """Returns a model item for a tagged SageMaker endpoint or None."""
+        if tags_by_arn is None:
+            tags = sagemaker_client.list_tags(ResourceArn=endpoint["EndpointArn"])[
+                "Tags"
+            ]
+            tags_dict = {tag["Key"]: tag["Value"] for tag in tags}
+        else:
+            tags_dict = tags_by_arn.get(endpoint["EndpointArn"], {})
+
+        if FRIENDLY_NAME_TAG not in tags_dict:
+            return None
+        friendly_name = tags_dict[FRIENDLY_NAME_TAG]
+
+        chat_prompt_identifier = "prompts/falcon_chat.yaml"
+        if "genie:prompt-chat" in tags_dict:
+            chat_prompt_identifier = tags_dict["genie:prompt-chat"]
+        rag_prompt_identifier = "prompts/falcon_instruct_rag.yaml"
+        if "genie:prompt-rag" in tags_dict:
+            rag_prompt_identifier = tags_dict["genie:prompt-rag"]
+        async_endpoint_s3 = None
+        if "genie:async-endpoint-s3" in tags_dict:
+            async_endpoint_s3 = tags_dict["genie:async-endpoint-s3"]
+        async_endpoint_sqs = tags_dict.get("genie:async-endpoint-sqs")
+        supports_streaming = tags_dict.get("genie:supports-streaming", "").lower() == "true"
+        return SageMakerModelItem(
+            model_name=friendly_name,
+            endpoint_name=endpoint["EndpointName"],
+            region=region,
+            chat_prompt_identifier=chat_prompt_identifier,
+            rag_prompt_identifier=rag_prompt_identifier,
+            async_endpoint_s3=async_endpoint_s3,
+            async_endpoint_sqs=async_endpoint_sqs,
+            supports_streaming=supports_streaming,
+            callbacks=self.callbacks,
+        )
+
+    def restore(self, items: List[Dict[str, Any]]) -> None:
+        """Restores models from a snapshot.
+
+        Prompts and parameters of Bedrock models are taken from the current app config.
+        Bedrock models that are no longer configured are skipped.
+        """
+        model_id_regex = list(map(re.compile, self.llm_config.keys()))
+        bedrock_configs = {
+            (config.parameters.region.value, config.parameters.endpoint_url): config
+            for config in self.bedrock_config
+        }
+        for data in items:
+            if data["type"] == "sagemaker":
+                self.append(SageMakerModelItem.from_dict(data))
+            elif data["type"] == "bedrock":
+                bedrock_config = bedrock_configs.get((data["region"], data["endpoint_url"]))
+                if bedrock_config is None or not any(
+                    regex.match(data["model_id"]) for regex in model_id_regex
+                ):
+                    continue
+                self.append(
+                    BedrockModelItem(
+                        model_id=data["model_id"],
+                        llm_config=self.get_llm_config(data["model_id"], model_id_regex),
+                        bedrock_config=bedrock_config.parameters,
+                        callbacks=self.callbacks,
+                        supports_streaming=data["supports_streaming"],
+                    )
+                )
+        self._add_hedged_bedrock_models()
+        self.warm_up()
 
     def bootstrap(self) -> None:
         """Bootstraps the catalog."""
         model_id_regex = list(map(re.compile, self.llm_config.keys()))
-        self._get_bedrock_models(model_id_regex)
-        # self._get_sagemaker_models()
+        executor = BootstrapExecutor.from_environment(self.logger)
+        self += self._get_bedrock_models(model_id_regex, executor)
+        if (
+            ChatbotEnvironment()
+            .get_env_variable(ChatbotEnvironmentVariables.SageMakerModelDiscoveryEnabled)
+            .lower()
+            == "true"
+        ):
+            self += self._get_sagemaker_models(executor)
+        executor.log_timings()
+        self._add_hedged_bedrock_models()
+        self.warm_up()
+
+    def _add_hedged_bedrock_models(self) -> None:
+        """Adds a hedged model before the Bedrock models that are available in several regions.
+
+        Only if BEDROCK_HEDGING_ENABLED is true.
+        """
+        if (
+            ChatbotEnvironment()
+            .get_env_variable(ChatbotEnvironmentVariables.BedrockHedgingEnabled)
+            .lower()
+            != "true"
+        ):
+            return
+        items_by_model_id: Dict[str, List[BedrockModelItem]] = {}
+        for item in self:
+            if isinstance(item, BedrockModelItem):
+                items_by_model_id.setdefault(item.model_id, []).append(item)
+
+        items = []
+        for item in self:
+            regional_items = (
+                items_by_model_id.get(item.model_id, [])
+                if isinstance(item, BedrockModelItem)
+                else []
+            )
+            if len(regional_items) > 1 and regional_items[0] is item:
+                items.append(
+                    HedgedBedrockModelItem(
+                        item.model_id,
+                        [regional_item.config for regional_item in regional_items],
+                        item.llm_config,
+                        supports_streaming=all(
+                            regional_item.supports_streaming for regional_item in regional_items
+                        ),
+                        callbacks=self.callbacks,
+                    )
+                )
+            items.append(item)
+        self[:] = items
+
+    def warm_up(self) -> None:
+        """Wakes up cold async SageMaker endpoints in the background during SAGEMAKER_WARMUP_HOURS."""
+        if not is_within_warmup_hours():
+            return
+        async_models = [
+            item for item in self if isinstance(item, SageMakerModelItem) and item.is_async
+        ]
+        if not async_models:
+            return
+
+        def wake_up_all():
+            for model in async_models:
+                try:
+                    if model.wake_up():
+                        self.logger.info("Woke up SageMaker endpoint %s", model.endpoint_name)
+                except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as err:
+                    self.logger.warning(
+                        "Waking up SageMaker endpoint %s failed.\n%s", model.endpoint_name, err
+                    )
+
+        threading.Thread(target=wake_up_all, name="sagemaker-warmup", daemon=True).start()
@@ -1,5 +1,6 @@
 """ Abstract base class that represents a catalog item. """
 from dataclasses import dataclass
+from typing import Optional
 
 from langchain.llms.base import LLM
 
@@ -21,3 +22,6 @@ class ModelCatalogItem(CatalogItem[LLM]):
 
     streaming_on: bool = False
     """ Whether the model is streaming the response. """
+
+    context_token_budget: Optional[int] = None
+    """ Maximum number of tokens of the prompt including the retrieved documents. """
@@ -1,12 +1,12 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
-import boto3
 from chatbot.config import AmazonBedrockParameters, LLMConfig, LLMConfigParameters
-from chatbot.helpers import get_boto_session
+from chatbot.helpers import get_boto_session, get_client
 from langchain.llms.base import LLM
 from langchain_community.chat_models import BedrockChat
 #from langchain.llms.bedrock import Bedrock
 from chatbot.helpers import Bedrock
+from chatbot.llm_cache import is_deterministic
 
 from .model_catalog_item import ModelCatalogItem
 
@@ -16,6 +16,8 @@ class BedrockModelItem(ModelCatalogItem):
     Class that represents a Kendra retriever catalog item.
     """
 
+    backend = "bedrock"
+
     config: AmazonBedrockParameters
     """Amazon Bedrock configuration"""
     model_id: str
@@ -62,32 +64,51 @@ class BedrockModelItem(ModelCatalogItem):
             chat_prompt_identifier=llm_config.parameters.chat_prompt,
             rag_prompt_identifier=llm_config.parameters.rag_prompt,
             supports_streaming=supports_streaming,
-            streaming_on=supports_streaming
+            streaming_on=supports_streaming,
+            context_token_budget=llm_config.parameters.context_token_budget,
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        # prompts and parameters come from the app config when the item is restored
+        return {
+            "type": "bedrock",
+            "model_id": self.model_id,
+            "region": self.config.region.value,
+            "endpoint_url": self.config.endpoint_url,
+            "supports_streaming": self.supports_streaming,
+        }
+
     def get_instance(self) -> LLM:
         region = self.config.region.value
         endpoint_url = self.config.endpoint_url
 
         iam_config = self.config.iam
 
-        session = get_boto_session(iam_config, region)
+        client = get_client("bedrock-runtime", region, iam_config, endpoint_url)
+        # responses are only served from the LLM cache if the model samples greedily
+        cache = None if is_deterministic(self.model_kwargs) else False
 
         if self.model_id.startswith("anthropic.claude-3") or self.model_id.startswith("anthropic.claude-v2"):
+            # the messages API rejects the text completion kwargs, only pass the temperature
             return BedrockChat(
-                client=session.client("bedrock-runtime", region, endpoint_url=endpoint_url),
+                client=client,
                 model_id=self.model_id,
+                model_kwargs={"temperature": self.model_kwargs.get("temperature", 0)},
                 streaming=self.supports_streaming and self.streaming_on,
                 callbacks=self.callbacks,
+                cache=cache,
             )
 
         return Bedrock(
-            client=session.client("bedrock-runtime", region, endpoint_url=endpoint_url),
+            client=client,
             model_id=self.model_id,
             # region_name=region,
             model_kwargs=self.model_kwargs,
             streaming=self.supports_streaming and self.streaming_on,
             callbacks=self.callbacks,
+            cache=cache,
+            # the async client signs with the same credentials as the synchronous client
+            boto_session=get_boto_session(iam_config, region),
         )
 
     def _set_default_model_kwargs(self):
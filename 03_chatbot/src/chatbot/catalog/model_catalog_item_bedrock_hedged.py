@@ -0,0 +1,89 @@
+""" Module that contains a class that represents an Amazon Bedrock model in several regions.
+"""
+from typing import List, Optional
+
+from chatbot.config import AmazonBedrockParameters, LLMConfig
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+from chatbot.helpers.hedged_llm import HedgedLLM, get_latency_tracker
+from chatbot.llm_cache import is_deterministic
+from langchain.llms.base import LLM
+
+from .model_catalog_item import ModelCatalogItem
+from .model_catalog_item_bedrock import BedrockModelItem
+
+
+class HedgedBedrockModelItem(ModelCatalogItem):
+    """Class that represents an Amazon Bedrock model that fails over to other regions.
+
+    Requests go to the first region. If it is throttled or slower than the
+    BEDROCK_HEDGING_PERCENTILE of its first token latencies, the request is also sent
+    to the next region and the first answer wins.
+
+    Args:
+        model_id: Amazon Bedrock model ID
+        bedrock_configs: Amazon Bedrock configurations in the order of preference
+        llm_config: Prompts and parameters of the model
+        supports_streaming: Whether the model supports streaming. Default: False
+    """
+
+    backend = "bedrock"
+
+    model_id: str
+    """ Model ID """
+    regional_items: List[BedrockModelItem]
+    """ Model in each region, in the order in which requests are sent """
+    model_kwargs: dict
+    """ Model kwargs, shared by all regions """
+
+    def __init__(
+        self,
+        model_id: str,
+        bedrock_configs: List[AmazonBedrockParameters],
+        llm_config: Optional[LLMConfig],
+        supports_streaming: bool = False,
+        callbacks = [],
+    ):
+        # the regional models do not call the callbacks, the hedged LLM does
+        self.regional_items = [
+            BedrockModelItem(model_id, bedrock_config, llm_config, supports_streaming)
+            for bedrock_config in bedrock_configs
+        ]
+        primary = self.regional_items[0]
+        self.model_id = model_id
+        self.model_kwargs = primary.model_kwargs
+        for item in self.regional_items:
+            item.model_kwargs = self.model_kwargs
+        self.callbacks = callbacks
+        regions = " / ".join(item.config.region.value for item in self.regional_items)
+        super().__init__(
+            f"Bedrock - {model_id.replace(':', '.')} - ({regions})",
+            chat_prompt_identifier=primary.chat_prompt_identifier,
+            rag_prompt_identifier=primary.rag_prompt_identifier,
+            supports_streaming=supports_streaming,
+            streaming_on=supports_streaming,
+            context_token_budget=primary.context_token_budget,
+        )
+
+    def get_instance(self) -> LLM:
+        env = ChatbotEnvironment()
+        return HedgedLLM(
+            llms=[item.get_instance() for item in self.regional_items],
+            latency_trackers=[
+                get_latency_tracker(
+                    (self.model_id, item.config.region.value, item.config.endpoint_url)
+                )
+                for item in self.regional_items
+            ],
+            hedge_percentile=float(
+                env.get_env_variable(ChatbotEnvironmentVariables.BedrockHedgingPercentile)
+            ),
+            initial_hedge_delay=float(
+                env.get_env_variable(ChatbotEnvironmentVariables.BedrockHedgingInitialDelayMs)
+            )
+            / 1000,
+            streaming=self.supports_streaming and self.streaming_on,
+            stream_llms=self.supports_streaming,
+            callbacks=self.callbacks,
+            # responses are only served from the LLM cache if the model samples greedily
+            cache=None if is_deterministic(self.model_kwargs) else False,
+        )
@@ -2,14 +2,21 @@
 """
 import json
 import re
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from langchain import SagemakerEndpoint
 from langchain.llms.base import LLM
 from langchain.llms.sagemaker_endpoint import LLMContentHandler
 
 from .model_catalog_item import ModelCatalogItem
-from chatbot.helpers.sagemaker_async_endpoint import SagemakerAsyncEndpoint
+from chatbot.helpers.aws_helpers import get_client
+from chatbot.helpers.sagemaker_async_endpoint import (
+    SagemakerAsyncEndpoint,
+    get_endpoint_readiness,
+    wake_up_endpoint,
+)
+from chatbot.helpers.sagemaker_streaming_endpoint import SagemakerStreamingEndpoint
+from chatbot.llm_cache import is_deterministic
 
 
 class SageMakerModelItem(ModelCatalogItem):
@@ -21,6 +28,7 @@ class SageMakerModelItem(ModelCatalogItem):
         chat_prompt_identifier: Amazon S3 URI, local path, or LangChainHub path that stores langchain prompt template to use when chatting with the model. Default: "prompts/falcon_chat.yaml"
         rag_prompt_identifier: Amazon S3 URI, local path, or LangChainHub path that stores langchain prompt template to use when using document retrieval. Default: "prompts/falcon_instruct_rag.yaml"
         region: AWS region where the model is running. Default: us-east-1
+        supports_streaming: Whether the real-time endpoint runs a Text Generation Inference container that streams tokens. Default: False
         model_kwargs: Keyword arguments to pass to the model during inference.
 
     Example:
@@ -34,6 +42,8 @@ class SageMakerModelItem(ModelCatalogItem):
         ```
     """
 
+    backend = "sagemaker"
+
     region: str
     """ AWS Region """
     endpoint_name: str
@@ -42,6 +52,8 @@ class SageMakerModelItem(ModelCatalogItem):
     """ SageMaker model name """
     async_endpoint_s3: str | None
     """S3 bucket used by the Asynchronous Sagemaker Endpoint"""
+    async_endpoint_sqs: str | None
+    """SQS queue that receives the completion notifications of the Asynchronous Sagemaker Endpoint"""
     model_kwargs: dict
     """ SageMaker model kwargs """
 
@@ -53,17 +65,49 @@ class SageMakerModelItem(ModelCatalogItem):
         rag_prompt_identifier: str = "prompts/falcon_instruct_rag.yaml",
         region: str = "us-east-1",
         async_endpoint_s3: str | None = None,
+        async_endpoint_sqs: str | None = None,
+        context_token_budget: int | None = None,
+        supports_streaming: bool = False,
+        callbacks = [],
         **model_kwargs,
     ):
+        # async endpoints return the response as S3 object, they cannot stream
+        supports_streaming = supports_streaming and async_endpoint_s3 is None
         super().__init__(
-            f"SageMaker - {model_name}", chat_prompt_identifier, rag_prompt_identifier
+            f"SageMaker - {model_name}",
+            chat_prompt_identifier,
+            rag_prompt_identifier,
+            supports_streaming=supports_streaming,
+            streaming_on=supports_streaming,
+            context_token_budget=context_token_budget,
         )
+        self.callbacks = callbacks
         self.region = region
         self.endpoint_name = endpoint_name
         self.model_name = model_name
         self.async_endpoint_s3 = async_endpoint_s3
+        self.async_endpoint_sqs = async_endpoint_sqs
         self.model_kwargs = model_kwargs
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "sagemaker",
+            "model_name": self.model_name,
+            "endpoint_name": self.endpoint_name,
+            "chat_prompt_identifier": self.chat_prompt_identifier,
+            "rag_prompt_identifier": self.rag_prompt_identifier,
+            "region": self.region,
+            "async_endpoint_s3": self.async_endpoint_s3,
+            "async_endpoint_sqs": self.async_endpoint_sqs,
+            "context_token_budget": self.context_token_budget,
+            "supports_streaming": self.supports_streaming,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SageMakerModelItem":
+        """Creates an item from a dict returned by to_dict."""
+        return cls(**{key: value for key, value in data.items() if key != "type"})
+
     class ContentHandler(LLMContentHandler):
         content_type = "application/json"
         accepts = "application/json"
@@ -104,23 +148,75 @@ class SageMakerModelItem(ModelCatalogItem):
         stop_words=["[|Human|]", "<|endoftext|>", "[|AI|]", "Best regards"]
     )
 
+    @property
+    def is_async(self) -> bool:
+        """Whether the model runs on an asynchronous endpoint that scales to zero."""
+        return self.async_endpoint_s3 is not None
+
+    def _get_async_input_location(self) -> Tuple[str, str]:
+        inputs = (self.async_endpoint_s3).replace("s3://", "").split("/", 1)
+        return inputs[0], inputs[1]
+
+    def wake_up(self, force: bool = False) -> bool:
+        """Wakes up the asynchronous endpoint of the model if it is cold.
+
+        Args:
+            force: Send a request even if the endpoint is running, e.g. as
+                keep-warm heartbeat. Default: False
+
+        Returns:
+            Whether a wake-up request was sent.
+        """
+        if not self.is_async:
+            return False
+        input_bucket, input_prefix = self._get_async_input_location()
+        return wake_up_endpoint(
+            self.endpoint_name,
+            self.region,
+            input_bucket,
+            input_prefix,
+            content_type=self.content_handler.content_type,
+            accepts=self.content_handler.accepts,
+            force=force,
+        )
+
+    def get_readiness(self) -> str:
+        """Returns whether the endpoint of the model is ready, waking up or cold."""
+        return get_endpoint_readiness(self.endpoint_name, self.region)
+
     def get_instance(self) -> LLM:
-        if self.async_endpoint_s3 is None:
+        # responses are only served from the LLM cache if the model samples greedily
+        cache = None if is_deterministic(self.model_kwargs) else False
+        if self.async_endpoint_s3 is None and self.supports_streaming and self.streaming_on:
+            llm_sagemaker = SagemakerStreamingEndpoint(
+                client=get_client("sagemaker-runtime", self.region),
+                endpoint_name=self.endpoint_name,
+                region_name=self.region,
+                content_handler=self.content_handler,
+                model_kwargs=self.model_kwargs,
+                callbacks=self.callbacks,
+                cache=cache,
+            )
+        elif self.async_endpoint_s3 is None:
             llm_sagemaker = SagemakerEndpoint(
+                client=get_client("sagemaker-runtime", self.region),
                 endpoint_name=self.endpoint_name,
                 region_name=self.region,
                 content_handler=self.content_handler,
                 model_kwargs=self.model_kwargs,
+                cache=cache,
             )
         else:
-            inputs = (self.async_endpoint_s3).replace("s3://", "").split("/", 1)
-            input_bucket, input_prefix = inputs[0], inputs[1]
+            input_bucket, input_prefix = self._get_async_input_location()
             llm_sagemaker = SagemakerAsyncEndpoint(
+                    client=get_client("sagemaker-runtime", self.region),
                     endpoint_name=self.endpoint_name,
                     region_name=self.region,
                     content_handler=self.content_handler,
                     input_bucket=input_bucket,
-                    input_prefix=input_prefix
+                    input_prefix=input_prefix,
+                    notification_queue_url=self.async_endpoint_sqs,
+                    cache=cache,
             )
 
         return llm_sagemaker
@@ -6,8 +6,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Union
 
-import boto3
 import yaml
+from chatbot.helpers import get_client
 from langchain.prompts import BasePromptTemplate
 from langchain.prompts import load_prompt as langchain_load_prompt
 from langchain.prompts.loading import load_prompt_from_config
@@ -33,7 +33,7 @@ class PromptCatalog(CatalogById[PromptCatalogItem]):
     ) -> BasePromptTemplate:
         """Load configuration from S3."""
         S3_URI = re.compile(r"s3://(?P<ref>.+)/(?P<path>.*)")
-        s3Client = boto3.client("s3")
+        s3Client = get_client("s3")
 
         if not isinstance(path, str) or not (match := S3_URI.match(path)):
             return None
@@ -5,23 +5,37 @@ import time
 from dataclasses import dataclass
 from logging import Logger, getLogger
 from operator import itemgetter
-from typing import List
+from typing import Any, Dict, List, Optional
+
+import os
+import tempfile
 
-import boto3
 import botocore
 
+from .bootstrap_executor import BootstrapExecutor
 from .catalog import FRIENDLY_NAME_TAG, Catalog
 from .retriever_catalog_item_kendra import KendraRetrieverItem
-from .retriever_catalog_item_open_search import OpenSearchRetrieverItem
+from .retriever_catalog_item_local_vector_store import LocalVectorStoreRetrieverItem
+from .retriever_catalog_item_open_search import OpenSearchRetrieverItem, prune_retriever_cache
+from .tagged_resource_discovery import TaggedResourceDiscovery, get_tagged_resource_discovery
 from ..fin_analyzer.retriever_catalog_item_fin_analyzer import FinAnalyzerRetrieverItem
 from chatbot.open_search import get_credentials, get_open_search_index_list
 from chatbot.config import AppConfig
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables, get_client
+from chatbot.kendra import prune_kendra_cache
+from chatbot.local_vector_store import (
+    find_local_vector_indices,
+    read_manifest,
+    sync_local_vector_stores,
+)
 import opensearchpy
 
 @dataclass
 class RetrieverCatalog(Catalog):
     """Catalog to get document retrievers."""
 
+    supports_snapshots = True
+
     regions: List[str]
 
     account_id: str
@@ -30,7 +44,7 @@ class RetrieverCatalog(Catalog):
 
     app_config: AppConfig
 
-
+    resource_discovery: TaggedResourceDiscovery
 
     def __init__(
         self,
@@ -38,22 +52,23 @@ class RetrieverCatalog(Catalog):
         regions: list,
         app_config: AppConfig,
         logger: Logger = getLogger("RetrieverCatalogLogger"),
+        resource_discovery: Optional[TaggedResourceDiscovery] = None,
     ) -> None:
         self.regions = regions
         self.account_id = account_id
         self.logger = logger
+        self.resource_discovery = resource_discovery or get_tagged_resource_discovery()
         self.app_config = app_config
         super().__init__()
 
-    def _get_kendra_indices(self, account):
+    def _get_kendra_indices(self, account, executor: BootstrapExecutor):
         """Get list of kendra indices that contain a "friendly-name" tag."""
 
         start_time = time.time()
         self.logger.info("Retrieving Kendra indices...")
-        index_summary_items = []
 
-        for region in self.regions:
-            kendra_client = boto3.client("kendra", region)
+        def get_region_indices(region):
+            kendra_client = get_client("kendra", region)
             response = kendra_client.list_indices()
             index_summary_items = response["IndexConfigurationSummaryItems"]
 
@@ -63,54 +78,87 @@ class RetrieverCatalog(Catalog):
                 index_summary_items += response["IndexConfigurationSummaryItems"]
 
             # Filter out active indices
-            for index in filter(lambda x: x["Status"] == "ACTIVE", index_summary_items):
-                index_id = index["Id"]
-
-                kendra_index_arn = f"arn:aws:kendra:{region}:{account}:index/{index_id}"
-                tags = kendra_client.list_tags_for_resource(
-                    ResourceARN=kendra_index_arn
-                )["Tags"]
-                tags_dict = {tag["Key"]: tag["Value"] for tag in tags}
-                if FRIENDLY_NAME_TAG in tags_dict:
-                    response = kendra_client.list_data_sources(IndexId=index_id)
-                    data_sources = response["SummaryItems"]
-
-                    while "NextToken" in response:
-                        next_token = response.get("NextToken")
-                        response = kendra_client.list_data_sources(
-                            IndexId=index_id, NextToken=next_token
-                        )
-                        data_sources += response["SummaryItems"]
-
-                    active_data_sources = list(
-                        filter(lambda x: x["Status"] == "ACTIVE", data_sources)
+            active_indices = filter(lambda x: x["Status"] == "ACTIVE", index_summary_items)
+            tags_by_arn = self.resource_discovery.get_tags(region, "kendra:index")
+            if tags_by_arn is not None:
+                active_indices = filter(
+                    lambda x: FRIENDLY_NAME_TAG
+                    in tags_by_arn.get(f"arn:aws:kendra:{region}:{account}:index/{x['Id']}", {}),
+                    active_indices,
+                )
+            return region, executor.map(
+                f"kendra:describe_index({region})",
+                lambda index: self._get_kendra_index(
+                    kendra_client, account, region, index["Id"], tags_by_arn
+                ),
+                active_indices,
+                label=itemgetter("Id"),
+            )
+
+        kendra_items = {}
+        for region, indices in executor.map(
+            "kendra:list_indices", get_region_indices, self.regions
+        ):
+            for index in filter(None, indices):
+                index_id, friendly_name, active_data_sources = index
+                # indices with the same friendly name are searched together
+                item_key = (region, friendly_name)
+                if item_key in kendra_items:
+                    kendra_items[item_key].add_index(index_id, active_data_sources)
+                else:
+                    kendra_items[item_key] = KendraRetrieverItem(
+                        index_id=index_id,
+                        friendly_name=friendly_name,
+                        region=region,
+                        data_sources=active_data_sources,
                     )
-                    if len(active_data_sources) > 0:
-                        self.append(
-                            KendraRetrieverItem(
-                                index_id=index_id,
-                                friendly_name=tags_dict[FRIENDLY_NAME_TAG],
-                                region=region,
-                                data_sources=active_data_sources,
-                            )
-                        )
 
         self.logger.info(
             "%s Kendra indices retrieved in %s seconds",
-            len(self),
+            len(kendra_items),
             time.time() - start_time,
         )
+        return list(kendra_items.values())
+
+    def _get_kendra_index(self, kendra_client, account, region, index_id, tags_by_arn=None):
+        """Returns the friendly name and active data sources of a tagged Kendra index."""
+        kendra_index_arn = f"arn:aws:kendra:{region}:{account}:index/{index_id}"
+        if tags_by_arn is None:
+            tags = kendra_client.list_tags_for_resource(
+                ResourceARN=kendra_index_arn
+            )["Tags"]
+            tags_dict = {tag["Key"]: tag["Value"] for tag in tags}
+        else:
+            tags_dict = tags_by_arn.get(kendra_index_arn, {})
+        if FRIENDLY_NAME_TAG not in tags_dict:
+            return None
+
+        response = kendra_client.list_data_sources(IndexId=index_id)
+        data_sources = response["SummaryItems"]
+
+        while "NextToken" in response:
+            next_token = response.get("NextToken")
+            response = kendra_client.list_data_sources(
+                IndexId=index_id, NextToken=next_token
+            )
+            data_sources += response["SummaryItems"]
 
-    def _get_open_search_indices(self, account):
+        active_data_sources = list(
+            filter(lambda x: x["Status"] == "ACTIVE", data_sources)
+        )
+        if len(active_data_sources) == 0:
+            return None
+        return index_id, tags_dict[FRIENDLY_NAME_TAG], active_data_sources
+
+    def _get_open_search_indices(self, account, executor: BootstrapExecutor):
         """Get list of OpenSearch indices that contain a "friendly-name" tag."""
         start_time = time.time()
         self.logger.info("Retrieving OpenSearch indices...")
-        opensearch_indices = []
 
-        for region in self.regions:
+        def get_region_indices(region):
             # Get OpenSearch domains
             self.logger.info("OpenSearch region: %s", region)
-            open_search_client = boto3.client("opensearch", region)
+            open_search_client = get_client("opensearch", region)
             try:
                 response = open_search_client.list_domain_names(EngineType="OpenSearch")
             except (
@@ -120,7 +168,7 @@ class RetrieverCatalog(Catalog):
                 self.logger.info(
                     f"Not using OpenSearch in region {region}. Cannot connect to OpenSearch to list domains."
                 )
-                continue
+                return []
             self.logger.info("OpenSearch response: %s", response)
 
             domain_names = [
@@ -138,164 +186,201 @@ class RetrieverCatalog(Catalog):
                 self.logger.info(
                     f"Not using OpenSearch in region {region}. Cannot connect to OpenSearch to describe domains."
                 )
-                continue
+                return []
             domains = response["DomainStatusList"]
 
-            sagemaker_client = boto3.client("sagemaker", region)
-            secrets_manager_client = boto3.client("secretsmanager", region)
+            clients = (
+                open_search_client,
+                get_client("sagemaker", region),
+                get_client("secretsmanager", region),
+            )
 
             active_domain_filter = (
                 lambda domain: not domain["Processing"] and domain["Created"]
             )
-            for domain in filter(active_domain_filter, domains):
-                domain_arn = domain["ARN"]
-                self.logger.info("domain: %s", domain_arn)
-                try:
-                    tags = open_search_client.list_tags(ARN=domain_arn)["TagList"]
-                except (
-                    botocore.exceptions.ClientError,
-                    botocore.exceptions.ConnectTimeoutError,
-                ):
-                    self.logger.info(
-                        f"Cannot connect to OpenSearch to list tags for {domain_arn}."
-                    )
-                    continue
-                tags_keys = list(map(itemgetter("Key"), tags))
-                
-                
-                def get_genai_tag_value_by_key(tags, key):
-                    if key not in tags_keys:
-                        return None
-                    return tags[list(map(itemgetter("Key"), tags)).index(key)][
-                        "Value"
-                    ]
-
-                friendly_name_tag_value = get_genai_tag_value_by_key(
-                    tags, FRIENDLY_NAME_TAG
-                )
-                secrets_tag_value = get_genai_tag_value_by_key(
-                    tags, "genie:secrets-id"
-                )
-                embedding_sagemaker_name = get_genai_tag_value_by_key(
-                    tags,
-                    "genie:sagemaker-embedding-endpoint-name",
-                )
+            tags_by_arn = self.resource_discovery.get_tags(region, "es:domain")
+            if tags_by_arn is not None:
+                domains = [domain for domain in domains if domain["ARN"] in tags_by_arn]
+            return executor.map(
+                f"opensearch:domain({region})",
+                lambda domain: self._get_open_search_domain_item(
+                    region, domain, *clients, tags_by_arn=tags_by_arn
+                ),
+                filter(active_domain_filter, domains),
+                label=itemgetter("DomainName"),
+            )
 
-                vpc_endpoint_value = get_genai_tag_value_by_key(
-                    tags,
-                    "genie:chatbot_vpc_endpoint",
-                )
+        opensearch_indices = [
+            item
+            for items in executor.map("opensearch:list_domains", get_region_indices, self.regions)
+            for item in items
+            if item is not None
+        ]
 
-                if (
-                    friendly_name_tag_value
-                    and secrets_tag_value
-                    and embedding_sagemaker_name
-                ):
-                    
-                    try:
-                        embedding_endpoint = sagemaker_client.describe_endpoint(
-                            EndpointName=embedding_sagemaker_name
-                        )
-                    except (
-                        botocore.exceptions.ClientError,
-                        botocore.exceptions.ConnectTimeoutError,
-                    ):
-                        self.logger.info(
-                            f"Cannot connect to embeddings endpoint {embedding_sagemaker_name} on Amazon SageMaker for OpenSearch domain {domain_arn}."
-                        )
-                        continue
-
-                    if (
-                        not embedding_endpoint
-                        or "EndpointStatus" not in embedding_endpoint
-                        or embedding_endpoint["EndpointStatus"] != "InService"
-                    ):
-                        self.logger.info(
-                            f"Ignoring OpenSearch domain {domain_arn} because embeddings endpoint {embedding_sagemaker_name} on Amazon SageMaker is not in service."
-                        )
-                        continue
-
-                    try:
-                        secret = get_credentials(secrets_tag_value, region)
-                        os_http_auth = (secret["user"] or "admin", secret["password"])
-                    except (
-                        botocore.exceptions.ClientError,
-                        botocore.exceptions.ConnectTimeoutError,
-                    ):
-                        self.logger.info(
-                            f"Cannot get credentials for OpenSearch domain from AWS Secrets Manager. Ignoring OpenSearch domain {domain_arn}."
-                        )
-                        continue
-                    
-                    try:
-                        #vpc_id = self.environment.get_env_variable(ChatbotEnvironmentVariables.Vpc)
-
-                        endpoint = None
-                        if vpc_endpoint_value:
-                            # get the VPC endpoint for the domain
-
-                            # next_token = None
-
-                            # list_endpoint_response = open_search_client.list_vpc_endpoints_for_domain(
-                            #     DomainName=domain["DomainName"],
-                            #     NextToken=next_token
-                            # )
-                            # if 'NextToken' in list_endpoint_response:
-                            #     next_token = list_endpoint_response['NextToken']
-                            # else: 
-                            #     next_token = None
-                            # available_vpc_endpoint_ids = [vpc_endpoint['VpcEndpointId']  for vpc_endpoint in list_endpoint_response['VpcEndpointSummaryList'] if vpc_endpoint['VpcEndpointOwner'] == account and vpc_endpoint['Status'] == "ACTIVE"]
-                            # describe_vpc_endpoints_response = open_search_client.describe_vpc_endpoints(
-                            #     VpcEndpointIds=available_vpc_endpoint_ids
-                            # )
-                            # vpc_endpoints_in_vpc = [vpc_endpoint for vpc_endpoint in describe_vpc_endpoints_response['VpcEndpoints'] if vpc_endpoint['VpcOptions']['VPCId'] == vpc_id]
-                            endpoint = vpc_endpoint_value
-                        else:
-                            if 'Endpoint' in domain:
-                                endpoint=domain['Endpoint']
-                            elif 'EndpointV2' in domain:
-                                endpoint=domain['EndpointV2']
-                            elif 'Endpoints' in domain:
-                                endpoint = domain['Endpoints']['vpc']
-                            else:
-                                self.logger.info(
-                                    f"Cannot get endpoint for OpenSearch domain. Ignoring OpenSearch domain {domain_arn}."
-                                )
-                                continue
-
-                        if endpoint:
-                            domain['Endpoint'] = endpoint
-
-                            data_sources = get_open_search_index_list(region, domain, os_http_auth)
-
-
-                            if data_sources:
-                                opensearch_indices.append(
-                                    OpenSearchRetrieverItem(
-                                        friendly_name=friendly_name_tag_value,
-                                        region=region,
-                                        data_sources = data_sources,
-                                        endpoint=f"https://{endpoint}",
-                                        embedding_endpoint_name=embedding_sagemaker_name,
-                                        os_http_auth = os_http_auth
-
-                                    )
-                                )
-                    except (
-                        opensearchpy.ImproperlyConfigured,
-                        opensearchpy.OpenSearchException
-                    ) as e:
-                        self.logger.info(
-                            f"Cannot connect to OpenSearch domain. Ignoring OpenSearch domain {domain_arn}. {str(e)}"
-                        )
-                        continue
-
-        self += opensearch_indices
         self.logger.info(
             "%s OpenSearch indices retrieved in %s seconds",
             len(opensearch_indices),
             time.time() - start_time,
         )
+        return opensearch_indices
+
+    def _get_open_search_domain_item(
+        self,
+        region,
+        domain,
+        open_search_client,
+        sagemaker_client,
+        secrets_manager_client,
+        tags_by_arn=None,
+    ):
+        """Returns a retriever item for a tagged OpenSearch domain or None."""
+        domain_arn = domain["ARN"]
+        self.logger.info("domain: %s", domain_arn)
+        if tags_by_arn is not None:
+            tags = [
+                {"Key": key, "Value": value}
+                for key, value in tags_by_arn.get(domain_arn, {}).items()
+            ]
+        else:
+            try:
+                tags = open_search_client.list_tags(ARN=domain_arn)["TagList"]
+            except (
+                botocore.exceptions.ClientError,
+                botocore.exceptions.ConnectTimeoutError,
+            ):
+                self.logger.info(
+                    f"Cannot connect to OpenSearch to list tags for {domain_arn}."
+                )
+                return None
+        tags_keys = list(map(itemgetter("Key"), tags))
+        
+        
+        def get_genai_tag_value_by_key(tags, key):
+            if key not in tags_keys:
+                return None
+            return tags[list(map(itemgetter("Key"), tags)).index(key)][
+                "Value"
+            ]
+
+        friendly_name_tag_value = get_genai_tag_value_by_key(
+            tags, FRIENDLY_NAME_TAG
+        )
+        secrets_tag_value = get_genai_tag_value_by_key(
+            tags, "genie:secrets-id"
+        )
+        embedding_sagemaker_name = get_genai_tag_value_by_key(
+            tags,
+            "genie:sagemaker-embedding-endpoint-name",
+        )
+
+        vpc_endpoint_value = get_genai_tag_value_by_key(
+            tags,
+            "genie:chatbot_vpc_endpoint",
+        )
+
+        if not (
+            friendly_name_tag_value
+            and secrets_tag_value
+            and embedding_sagemaker_name
+        ):
+            return None
+
+        try:
+            embedding_endpoint = sagemaker_client.describe_endpoint(
+                EndpointName=embedding_sagemaker_name
+            )
+        except (
+            botocore.exceptions.ClientError,
+            botocore.exceptions.ConnectTimeoutError,
+        ):
+            self.logger.info(
+                f"Cannot connect to embeddings endpoint {embedding_sagemaker_name} on Amazon SageMaker for OpenSearch domain {domain_arn}."
+            )
+            return None
+
+        if (
+            not embedding_endpoint
+            or "EndpointStatus" not in embedding_endpoint
+            or embedding_endpoint["EndpointStatus"] != "InService"
+        ):
+            self.logger.info(
+                f"Ignoring OpenSearch domain {domain_arn} because embeddings endpoint {embedding_sagemaker_name} on Amazon SageMaker is not in service."
+            )
+            return None
+
+        try:
+            secret = get_credentials(secrets_tag_value, region)
+            os_http_auth = (secret["user"] or "admin", secret["password"])
+        except (
+            botocore.exceptions.ClientError,
+            botocore.exceptions.ConnectTimeoutError,
+        ):
+            self.logger.info(
+                f"Cannot get credentials for OpenSearch domain from AWS Secrets Manager. Ignoring OpenSearch domain {domain_arn}."
+            )
+            return None
+        
+        try:
+            #vpc_id = self.environment.get_env_variable(ChatbotEnvironmentVariables.Vpc)
+
+            endpoint = None
+            if vpc_endpoint_value:
+                # get the VPC endpoint for the domain
+
+                # next_token = None
+
+                # list_endpoint_response = open_search_client.list_vpc_endpoints_for_domain(
+                #     DomainName=domain["DomainName"],
+                #     NextToken=next_token
+                # )
+                # if 'NextToken' in list_endpoint_response:
+                #     next_token = list_endpoint_response['NextToken']
+                # else: 
+                #     next_token = None
+                # available_vpc_endpoint_ids = [vpc_endpoint['VpcEndpointId']  for vpc_endpoint in list_endpoint_response['VpcEndpointSummaryList'] if vpc_endpoint['VpcEndpointOwner'] == account and vpc_endpoint['Status'] == "ACTIVE"]
+                # describe_vpc_endpoints_response = open_search_client.describe_vpc_endpoints(
+                #     VpcEndpointIds=available_vpc_endpoint_ids
+                # )
+                # vpc_endpoints_in_vpc = [vpc_endpoint for vpc_endpoint in describe_vpc_endpoints_response['VpcEndpoints'] if vpc_endpoint['VpcOptions']['VPCId'] == vpc_id]
+                endpoint = vpc_endpoint_value
+            else:
+                if 'Endpoint' in domain:
+                    endpoint=domain['Endpoint']
+                elif 'EndpointV2' in domain:
+                    endpoint=domain['EndpointV2']
+                elif 'Endpoints' in domain:
+                    endpoint = domain['Endpoints']['vpc']
+                else:
+                    self.logger.info(
+                        f"Cannot get endpoint for OpenSearch domain. Ignoring OpenSearch domain {domain_arn}."
+                    )
+                    return None
+
+            if endpoint:
+                domain['Endpoint'] = endpoint
+
+                data_sources = get_open_search_index_list(region, domain, os_http_auth)
+
+
+                if data_sources:
+                    return OpenSearchRetrieverItem(
+                        friendly_name=friendly_name_tag_value,
+                        region=region,
+                        data_sources = data_sources,
+                        endpoint=f"https://{endpoint}",
+                        embedding_endpoint_name=embedding_sagemaker_name,
+                        os_http_auth = os_http_auth,
+                        secret_id=secrets_tag_value,
+
+                    )
+        except (
+            opensearchpy.ImproperlyConfigured,
+            opensearchpy.OpenSearchException
+        ) as e:
+            self.logger.info(
+                f"Cannot connect to OpenSearch domain. Ignoring OpenSearch domain {domain_arn}. {str(e)}"
+            )
+        return None
 
     def _get_fin_analyzer_indices(self, account):
         """Get list of FinAnalyzer indices, based on application config (appconfig.json)."""
@@ -305,28 +390,115 @@ class RetrieverCatalog(Catalog):
             self.logger.info(
                 f"Skipping Finance Analyzer indices due to missing configuration."
             )
-            return
+            return []
 
         start_time = time.time()
         logging.info("Retrieving FinAnalyzer indices...")
 
-        for region in self.regions:
-            self.append(
-                FinAnalyzerRetrieverItem(
-                    index_id="FinAnalyzer",
-                    config=config.parameters,
-                    region=region
-                )
+        fin_analyzer_indices = [
+            FinAnalyzerRetrieverItem(
+                index_id="FinAnalyzer",
+                config=config.parameters,
+                region=region
             )
+            for region in self.regions
+        ]
 
         logging.info(
             "%s FinAnalyzer indices retrieved in %s seconds",
-            len(self),
+            len(fin_analyzer_indices),
             time.time() - start_time,
         )
+        return fin_analyzer_indices
+
+    def _get_local_vector_stores(self):
+        """Get list of vector indices on local disk below LOCAL_VECTOR_STORE_PATH.
+
+        With LOCAL_VECTOR_STORE_S3_URI, new versions of the stores are downloaded first.
+        """
+        env = ChatbotEnvironment()
+        root = env.get_env_variable(ChatbotEnvironmentVariables.LocalVectorStorePath)
+        s3_uri = env.get_env_variable(ChatbotEnvironmentVariables.LocalVectorStoreS3Uri)
+        if s3_uri:
+            root = root or os.path.join(tempfile.gettempdir(), "local_vector_stores")
+        if not root:
+            return []
+
+        start_time = time.time()
+        if s3_uri:
+            self.logger.info("Downloading local vector stores from %s...", s3_uri)
+            sync_local_vector_stores(s3_uri, root)
+        self.logger.info("Retrieving local vector stores in %s...", root)
+        use_ann = (
+            env.get_env_variable(ChatbotEnvironmentVariables.LocalVectorStoreANN).lower()
+            == "true"
+        )
+        local_vector_stores = []
+        for path in find_local_vector_indices(root):
+            manifest = read_manifest(path)
+            if manifest is None or not manifest.get("embedding_endpoint_name"):
+                self.logger.info(
+                    f"Ignoring local vector store {path} without embedding endpoint in manifest."
+                )
+                continue
+            local_vector_stores.append(
+                LocalVectorStoreRetrieverItem(
+                    friendly_name=manifest.get("friendly_name") or os.path.basename(path),
+                    path=path,
+                    embedding_endpoint_name=manifest["embedding_endpoint_name"],
+                    region=manifest.get("region") or self.regions[0],
+                    use_ann=use_ann,
+                )
+            )
+
+        self.logger.info(
+            "%s local vector stores retrieved in %s seconds",
+            len(local_vector_stores),
+            time.time() - start_time,
+        )
+        return local_vector_stores
+
+    def restore(self, items: List[Dict[str, Any]]) -> None:
+        """Restores Kendra and OpenSearch retrievers from a snapshot.
+
+        Finance analyzer and local vector store retrievers do not need AWS calls and are
+        discovered as during bootstrap.
+        """
+        item_types = {
+            "kendra": KendraRetrieverItem,
+            "opensearch": OpenSearchRetrieverItem,
+        }
+        for data in items:
+            if data["type"] in item_types:
+                self.append(item_types[data["type"]].from_dict(data))
+        self += self._get_fin_analyzer_indices(self.account_id)
+        self += self._get_local_vector_stores()
 
     def bootstrap(self) -> None:
         """Bootstraps the catalog."""
-        self._get_kendra_indices(self.account_id)
-        self._get_open_search_indices(self.account_id)
-        self._get_fin_analyzer_indices(self.account_id)
+        start_time = time.time()
+        executor = BootstrapExecutor.from_environment(self.logger)
+        sources = {
+            "kendra": lambda: self._get_kendra_indices(self.account_id, executor),
+            "opensearch": lambda: self._get_open_search_indices(self.account_id, executor),
+            "fin_analyzer": lambda: self._get_fin_analyzer_indices(self.account_id),
+            "local_vector_store": self._get_local_vector_stores,
+        }
+        items = executor.run(sources)
+        # keep the order of the knowledge bases independent of which source answered first
+        for source in sources:
+            self += items.get(source, [])
+        # cached retrievers and results of items that did not change stay warm
+        prune_retriever_cache(
+            [item for item in self if isinstance(item, OpenSearchRetrieverItem)]
+        )
+        prune_kendra_cache(
+            (item.region, index_id)
+            for item in self
+            if isinstance(item, KendraRetrieverItem)
+            for index_id in item.index_ids
+        )
+        executor.log_timings()
+        self.logger.info(
+            "%s retrievers retrieved in %s seconds", len(self), time.time() - start_time
+        )
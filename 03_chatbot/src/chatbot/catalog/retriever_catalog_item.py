@@ -1,9 +1,10 @@
 """ Module that contains an abstract base class that represents a retriever catalog item.
 """
 from dataclasses import dataclass
-from typing import Any, List, Tuple, Union
+from typing import Any, Hashable, List, Optional, Tuple, Union
 
 from chatbot.llm_app import BaseLLMApp, LLMApp, RAGApp
+from langchain.embeddings.base import Embeddings
 from langchain.schema import BaseRetriever
 
 from .catalog import CatalogById
@@ -26,3 +27,33 @@ class RetrieverCatalogItem(CatalogItem[BaseRetriever]):
     @current_filter.setter
     def current_filter(self, value: List[Tuple[str, Any]]):
         pass
+
+    def get_candidate_instance(self, candidate_count: int) -> Optional[BaseRetriever]:
+        """Returns a retriever that fetches a larger candidate pool for reranking.
+
+        Args:
+            candidate_count: Number of candidates to retrieve.
+
+        Returns:
+            None if this retriever does not support a reranking stage.
+        """
+        return None
+
+    def get_semantic_cache_scope(self) -> Optional[Hashable]:
+        """Returns the key under which answers based on this retriever are cached.
+
+        The key has to change whenever the retrieved documents could change, e.g. with
+        the selected filter or after the knowledge base was re-ingested.
+
+        Returns:
+            None if answers based on this retriever must not be cached.
+        """
+        return None
+
+    def get_query_embeddings(self) -> Optional[Embeddings]:
+        """Returns the embeddings used to match questions in the semantic cache.
+
+        Returns:
+            None if this retriever has no embedding model.
+        """
+        return None
@@ -1,19 +1,24 @@
 """ Module that contains a class that represents a Kendra retriever catalog item. """
+import json
 from dataclasses import dataclass, field
-from typing import Any, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from langchain.retrievers.kendra import AmazonKendraRetriever
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+from chatbot.kendra import KendraIndexQuery, KendraIndexRetriever
 from langchain.schema import BaseRetriever
 
 from .retriever_catalog_item import RetrieverCatalogItem
 
-import boto3
-from botocore.config import Config
-
 
 @dataclass
 class KendraRetrieverItem(RetrieverCatalogItem):
-    """Class that represents a Kendra retriever catalog item."""
+    """Class that represents a Kendra retriever catalog item.
+
+    Kendra indices with the same friendly name are combined into one item and
+    queried in parallel.
+    """
+
+    backend = "kendra"
 
     region: str
     """ AWS Region """
@@ -24,18 +29,67 @@ class KendraRetrieverItem(RetrieverCatalogItem):
     """ Number of documents to be retrieved """
 
     _data_sources: Any
-    """ Kendra Data Sources in this index """
+    """ Kendra Data Sources in all indices of this item """
 
     _selected_data_sources: List[Tuple[str, Any]]
     """ Kendra Data Source IDs that the retriever is supposed to use at the moment. """
 
+    _index_ids: List[str]
+    """ Kendra Index IDs of this item """
+
     def __init__(self, friendly_name, index_id, data_sources, region=None, top_k=3):
         super().__init__(friendly_name)
-        self._data_sources = data_sources
+        self._data_sources = []
         self._selected_data_sources = []
+        self._index_ids = []
         self.index_id = index_id
         self.region = region
         self.top_k = top_k
+        self.add_index(index_id, data_sources)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "kendra",
+            "friendly_name": self.friendly_name,
+            "region": self.region,
+            "indices": [
+                {
+                    "index_id": index_id,
+                    "data_sources": [
+                        {key: value for key, value in data_src.items() if key != "IndexId"}
+                        for data_src in self._data_sources
+                        if data_src["IndexId"] == index_id
+                    ],
+                }
+                for index_id in self._index_ids
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KendraRetrieverItem":
+        """Creates an item from a dict returned by to_dict."""
+        first_index, *other_indices = data["indices"]
+        item = cls(
+            friendly_name=data["friendly_name"],
+            index_id=first_index["index_id"],
+            data_sources=first_index["data_sources"],
+            region=data["region"],
+        )
+        for index in other_indices:
+            item.add_index(index["index_id"], index["data_sources"])
+        return item
+
+    @property
+    def index_ids(self) -> List[str]:
+        """Kendra Index IDs of this item"""
+        return list(self._index_ids)
+
+    def add_index(self, index_id: str, data_sources: List[Dict[str, Any]]):
+        """Adds another index in the same region to this item."""
+        self._index_ids.append(index_id)
+        self._data_sources += [
+            {**data_src, "IndexId": index_id} for data_src in data_sources
+        ]
 
     @property
     def available_filter_options(self) -> Union[List[Tuple[str, Any]], None]:
@@ -55,6 +109,12 @@ class KendraRetrieverItem(RetrieverCatalogItem):
         self._selected_data_sources = selected_and_part_of_index
 
     def get_instance(self) -> BaseRetriever:
+        return self._get_instance(self.top_k)
+
+    def get_candidate_instance(self, candidate_count: int) -> BaseRetriever:
+        return self._get_instance(max(candidate_count, self.top_k))
+
+    def _get_attribute_filter(self, selected_data_sources) -> Optional[Dict[str, Any]]:
         data_src_filters = [
             {
                 "EqualsTo": {
@@ -62,15 +122,15 @@ class KendraRetrieverItem(RetrieverCatalogItem):
                     "Value": {"StringValue": src[1]["Id"]},
                 }
             }
-            for src in self._selected_data_sources
+            for src in selected_data_sources
         ]
 
         attribute_filter = {"OrAllFilters": data_src_filters}
         filter = attribute_filter
 
-        if len(self._selected_data_sources) == 1:
+        if len(selected_data_sources) == 1:
             # Add data source language filter if the language is not English
-            language = self._selected_data_sources[0][1].get("LanguageCode", None)
+            language = selected_data_sources[0][1].get("LanguageCode", None)
             if language and language != "en":
                 lang_filter = {
                     "EqualsTo": {
@@ -83,9 +143,34 @@ class KendraRetrieverItem(RetrieverCatalogItem):
 
                 filter = {"AndAllFilters": [attribute_filter, lang_filter]}
 
-        return AmazonKendraRetriever(
-            index_id=self.index_id,
-            region_name=self.region,
-            attribute_filter=filter,
-            top_k=self.top_k
+        return filter
+
+    def _get_index_queries(self) -> List[KendraIndexQuery]:
+        if not self._selected_data_sources:
+            # Without a filter all indices are searched ("Full search").
+            return [KendraIndexQuery(index_id) for index_id in self._index_ids]
+
+        queries = []
+        for index_id in self._index_ids:
+            selected = [
+                src for src in self._selected_data_sources if src[1]["IndexId"] == index_id
+            ]
+            if selected:
+                attribute_filter = self._get_attribute_filter(selected)
+                queries.append(
+                    KendraIndexQuery(index_id, json.dumps(attribute_filter, sort_keys=True))
+                )
+        return queries
+
+    def _get_instance(self, top_k: int) -> BaseRetriever:
+        cache_ttl = float(
+            ChatbotEnvironment().get_env_variable(
+                ChatbotEnvironmentVariables.KendraResultCacheTTLSeconds
+            )
+        )
+        return KendraIndexRetriever(
+            region=self.region,
+            queries=self._get_index_queries(),
+            top_k=top_k,
+            cache_ttl=cache_ttl,
         )
@@ -0,0 +1,73 @@
+""" Module that contains a class that represents a local vector store retriever catalog item. """
+from dataclasses import dataclass
+from typing import Hashable
+
+from chatbot.embeddings import SageMakerEndpointEmbeddings
+from chatbot.local_vector_store import LocalVectorStoreRetriever, get_local_vector_index
+from langchain.embeddings.base import Embeddings
+from langchain.schema import BaseRetriever
+
+from .retriever_catalog_item import RetrieverCatalogItem
+from .retriever_catalog_item_open_search import _get_embeddings_predictor
+
+
+@dataclass
+class LocalVectorStoreRetrieverItem(RetrieverCatalogItem):
+    """Class that represents a vector index on local disk as retriever catalog item."""
+
+    # the search runs in process, the query embeddings come from SageMaker
+    backend = "sagemaker"
+
+    path: str
+    """ Directory of the local vector index """
+
+    region: str
+    """ AWS Region of the embedding endpoint """
+
+    embedding_endpoint_name: str
+    """ SageMaker embedding endpoint that the index was built with """
+
+    use_ann: bool
+    """ Whether to use approximate instead of exact nearest neighbor search """
+
+    top_k: int
+    """ Number of documents to be retrieved """
+
+    def __init__(
+        self,
+        friendly_name,
+        path: str,
+        embedding_endpoint_name: str,
+        region=None,
+        use_ann: bool = False,
+        top_k=3,
+    ):
+        super().__init__(friendly_name)
+        self.path = path
+        self.embedding_endpoint_name = embedding_endpoint_name
+        self.region = region
+        self.use_ann = use_ann
+        self.top_k = top_k
+
+    def get_instance(self) -> BaseRetriever:
+        return self._get_instance(self.top_k)
+
+    def get_candidate_instance(self, candidate_count: int) -> BaseRetriever:
+        return self._get_instance(max(candidate_count, self.top_k))
+
+    def _get_instance(self, top_k: int) -> BaseRetriever:
+        return LocalVectorStoreRetriever(
+            index=get_local_vector_index(self.path, self.use_ann),
+            embeddings=self.get_query_embeddings(),
+            k=top_k,
+        )
+
+    def get_semantic_cache_scope(self) -> Hashable:
+        manifest = get_local_vector_index(self.path, self.use_ann).manifest
+        # created_at changes whenever the ingestion pipeline rewrites the index
+        return (self.friendly_name, self.path, manifest.get("created_at"), self.top_k)
+
+    def get_query_embeddings(self) -> Embeddings:
+        return SageMakerEndpointEmbeddings(
+            _get_embeddings_predictor(self.region, self.embedding_endpoint_name)
+        )
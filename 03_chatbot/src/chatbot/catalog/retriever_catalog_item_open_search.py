@@ -1,22 +1,104 @@
 """ Module that contains a class that represents a OpenSearch retriever catalog item. """
 from dataclasses import dataclass
-from typing import List
+from typing import Hashable, List
 
 import boto3
+import botocore
 from babel import Locale
-from chatbot.open_search import OpenSearchIndexRetriever, get_credentials
+from chatbot.embeddings import SageMakerEndpointEmbeddings
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+from chatbot.helpers.ttl_cache import TTLCache
+from chatbot.open_search import (
+    OpenSearchIndexRetriever,
+    clear_open_search_clients,
+    get_credentials,
+    get_open_search_client,
+    invalidate_credentials,
+    prune_open_search_clients,
+)
+from langchain.embeddings.base import Embeddings
 from langchain.schema import BaseRetriever
 from sagemaker.huggingface.model import HuggingFacePredictor
 from sagemaker.session import Session
 
 from .retriever_catalog_item import RetrieverCatalogItem
-from typing import Any, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import streamlit as st
 
+_embeddings_predictors: TTLCache = TTLCache()
+""" SageMaker embedding predictors per (region, endpoint name), shared by all sessions. """
+
+_retrievers: TTLCache = TTLCache(max_size=256)
+""" OpenSearch retrievers per domain, indices, embedding endpoint and search settings, shared by all sessions. """
+
+
+def _get_embeddings_predictor(region: str, endpoint_name: str) -> HuggingFacePredictor:
+    def create_predictor():
+        boto3_session = boto3.Session(region_name=region)
+        session = Session(boto3_session)
+        return HuggingFacePredictor(
+            endpoint_name=endpoint_name, sagemaker_session=session
+        )
+
+    return _embeddings_predictors.get_or_create((region, endpoint_name), create_predictor)
+
+
+def _get_http_auth(secret_id: str, region: str) -> Tuple[str, str]:
+    secret = get_credentials(secret_id, region)
+    return (secret["user"] or "admin", secret["password"])
+
+
+def _renew_http_auth(
+    secret_id: str, region: str, rejected_http_auth: Tuple[str, str]
+) -> Optional[Tuple[str, str]]:
+    http_auth = _get_http_auth(secret_id, region)
+    if http_auth == tuple(rejected_http_auth):
+        # another retriever has not renewed the cached secret yet
+        invalidate_credentials(secret_id, region)
+        http_auth = _get_http_auth(secret_id, region)
+    return None if http_auth == tuple(rejected_http_auth) else http_auth
+
+
+def clear_retriever_cache():
+    """Drops all cached OpenSearch retrievers, clients and embedding predictors."""
+    _retrievers.clear()
+    _embeddings_predictors.clear()
+    clear_open_search_clients()
+
+
+def prune_retriever_cache(items: List["OpenSearchRetrieverItem"]) -> None:
+    """Drops the cached OpenSearch retrievers, clients and embedding predictors that no item uses.
+
+    Call this whenever the retriever catalog changes so that sessions do not keep using
+    retrievers for indices or domains that no longer exist. Retrievers of unchanged
+    items stay cached.
+
+    Args:
+        items: OpenSearch items of the current retriever catalog.
+    """
+    indices = {
+        (item.endpoint, index_name)
+        for item in items
+        for index_name, _ in item.available_filter_options
+    }
+    embedding_endpoints = {
+        (item.endpoint, item.embedding_endpoint_name, item.region) for item in items
+    }
+    _retrievers.invalidate_where(
+        lambda key: (key[0], key[2], key[3]) not in embedding_endpoints
+        or any((key[0], index_name) not in indices for index_name in key[1])
+    )
+    predictors = {(item.region, item.embedding_endpoint_name) for item in items}
+    _embeddings_predictors.invalidate_where(lambda key: key not in predictors)
+    prune_open_search_clients((item.endpoint, item.os_http_auth) for item in items)
+
+
 @dataclass
 class OpenSearchRetrieverItem(RetrieverCatalogItem):
     """Class that represents a Amazon OpenSearch retriever catalog item."""
 
+    backend = "opensearch"
+
     region: str
     """ AWS Region """
 
@@ -29,6 +111,9 @@ class OpenSearchRetrieverItem(RetrieverCatalogItem):
     os_http_auth: str
     """ Secret that stores user and password to connect to OpenSearch index """
 
+    secret_id: Optional[str]
+    """ AWS Secrets Manager secret that os_http_auth was read from """
+
     _data_sources: Any
     """ OpenSearch indexes in this domain """
 
@@ -46,7 +131,8 @@ class OpenSearchRetrieverItem(RetrieverCatalogItem):
         embedding_endpoint_name: str,
         os_http_auth,
         region=None,
-        top_k=3
+        top_k=3,
+        secret_id: Optional[str] = None,
     ):
         super().__init__(friendly_name)
         self.index_name = ""
@@ -55,9 +141,37 @@ class OpenSearchRetrieverItem(RetrieverCatalogItem):
         self.region = region
         self.embedding_endpoint_name = embedding_endpoint_name
         self.os_http_auth = os_http_auth
+        self.secret_id = secret_id
         self.endpoint = endpoint
         self.top_k = top_k
 
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        if self.secret_id is None:
+            return None
+        # credentials are never written to a snapshot, only the secret they come from
+        return {
+            "type": "opensearch",
+            "friendly_name": self.friendly_name,
+            "region": self.region,
+            "endpoint": self.endpoint,
+            "embedding_endpoint_name": self.embedding_endpoint_name,
+            "secret_id": self.secret_id,
+            "data_sources": self._data_sources,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OpenSearchRetrieverItem":
+        """Creates an item from a dict returned by to_dict and reads its credentials."""
+        return cls(
+            friendly_name=data["friendly_name"],
+            data_sources=data["data_sources"],
+            endpoint=data["endpoint"],
+            embedding_endpoint_name=data["embedding_endpoint_name"],
+            os_http_auth=_get_http_auth(data["secret_id"], data["region"]),
+            region=data["region"],
+            secret_id=data["secret_id"],
+        )
+
     @property
     def available_filter_options(self) -> Union[List[Tuple[str, Any]], None]:
         return [(data_src["index"], data_src) for data_src in self._data_sources]
@@ -76,27 +190,106 @@ class OpenSearchRetrieverItem(RetrieverCatalogItem):
         self._selected_data_sources = selected_and_part_of_index
 
 
+    def _get_searched_data_sources(self) -> List[Tuple[str, Any]]:
+        # Without a filter all indices of the domain are searched ("Full search").
+        return self.current_filter or self.available_filter_options
+
     def get_instance(self) -> BaseRetriever:
+        return self._get_instance(self.top_k)
+
+    def get_semantic_cache_scope(self) -> Hashable:
+        # uuid and document count change when an index is re-created or re-ingested
+        indices = tuple(
+            sorted(
+                (name, data_src.get("uuid"), data_src.get("docs.count"))
+                for name, data_src in self._get_searched_data_sources()
+            )
+        )
+        return (
+            self.friendly_name,
+            self.endpoint,
+            indices,
+            self.top_k,
+            # answers found with other search settings are not reused
+            self._get_search_settings(),
+        )
+
+    @staticmethod
+    def _get_search_settings() -> Tuple[str, str, float, bool, int, float]:
+        """Search type, fusion, lexical weight, MMR flag, MMR fetch k and MMR lambda."""
+        env = ChatbotEnvironment()
+        return (
+            env.get_env_variable(ChatbotEnvironmentVariables.OpenSearchSearchType),
+            env.get_env_variable(ChatbotEnvironmentVariables.OpenSearchHybridFusion),
+            float(env.get_env_variable(ChatbotEnvironmentVariables.OpenSearchHybridLexicalWeight)),
+            env.get_env_variable(ChatbotEnvironmentVariables.OpenSearchMMREnabled).lower()
+            == "true",
+            int(env.get_env_variable(ChatbotEnvironmentVariables.OpenSearchMMRFetchK)),
+            float(env.get_env_variable(ChatbotEnvironmentVariables.OpenSearchMMRLambda)),
+        )
+
+    def get_query_embeddings(self) -> Embeddings:
+        return SageMakerEndpointEmbeddings(
+            _get_embeddings_predictor(self.region, self.embedding_endpoint_name)
+        )
+
+    def get_candidate_instance(self, candidate_count: int) -> BaseRetriever:
+        return self._get_instance(max(candidate_count, self.top_k))
+
+    def _get_instance(self, top_k: int) -> BaseRetriever:
         embeddings_endpoint_name = self.embedding_endpoint_name
-        
+
+        secret_id = self.secret_id
+        if secret_id is not None:
+            try:
+                # a cache hit, unless the secret rotated since the catalog was discovered
+                self.os_http_auth = _get_http_auth(secret_id, self.region)
+            except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError):
+                pass  # keep the credentials read during discovery
         os_http_auth = self.os_http_auth
         endpoint = self.endpoint
 
-        if len(self._selected_data_sources) != 1:
-            st.error('Please select exactly one data source.')
+        data_sources = self._get_searched_data_sources()
+        if not data_sources:
+            st.error('No OpenSearch index available.')
             return None
-        
-        index_name = self._selected_data_sources[0][0]
+
+        index_names = sorted(data_src[0] for data_src in data_sources)
         region = self.region
-        top_k = self.top_k
+        search_settings = self._get_search_settings()
+        search_type, fusion, lexical_weight, use_mmr, fetch_k, mmr_lambda = search_settings
 
-        boto3_session = boto3.Session(region_name=region)
-        session = Session(boto3_session)
-        predictor = HuggingFacePredictor(
-            endpoint_name=embeddings_endpoint_name, sagemaker_session=session
-        )
+        def create_retriever():
+            predictor = _get_embeddings_predictor(region, embeddings_endpoint_name)
+            return OpenSearchIndexRetriever(
+                index_names,
+                endpoint,
+                http_auth=os_http_auth,
+                embeddings_predictor=predictor,
+                k=top_k,
+                client=get_open_search_client(endpoint, os_http_auth),
+                search_type=search_type,
+                fusion=fusion,
+                lexical_weight=lexical_weight,
+                use_mmr=use_mmr,
+                fetch_k=fetch_k,
+                mmr_lambda=mmr_lambda,
+                on_auth_failure=(
+                    None
+                    if secret_id is None
+                    else lambda http_auth: _renew_http_auth(secret_id, region, http_auth)
+                ),
+            )
 
-        retriever = OpenSearchIndexRetriever(
-            index_name, endpoint, http_auth=os_http_auth, embeddings_predictor=predictor, k=top_k
+        return _retrievers.get_or_create(
+            (
+                endpoint,
+                tuple(index_names),
+                # the embedding endpoint and its region must match those of the indices
+                embeddings_endpoint_name,
+                region,
+                top_k,
+                search_settings,
+            ),
+            create_retriever,
         )
-        return retriever
@@ -0,0 +1,146 @@
+""" Module that contains a discovery service for AWS resources with Genie tags.
+"""
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import botocore
+from chatbot.helpers import get_client
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.helpers.ttl_cache import TTLCache
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+GENIE_TAG_PREFIX = "genie:"
+
+DISCOVERED_RESOURCE_TYPES = (
+    "dynamodb:table",
+    "es:domain",
+    "kendra:index",
+    "sagemaker:endpoint",
+)
+""" Resource types that the catalogs look for. """
+
+DEFAULT_DISCOVERY_TTL = 60
+
+
+def _default_client_factory(region: str):
+    return get_client("resourcegroupstaggingapi", region)
+
+
+def _resource_type_of(arn: str) -> str:
+    # arn:aws:<service>:<region>:<account>:<type>/<id>
+    parts = arn.split(":", 5)
+    return f"{parts[2]}:{parts[5].split('/', 1)[0]}" if len(parts) == 6 else ""
+
+
+class TaggedResourceDiscovery:
+    """Finds the Genie tags of AWS resources with the Resource Groups Tagging API.
+
+    One paginated GetResources call per region returns the tags of all DynamoDB tables,
+    OpenSearch domains, Kendra indices and SageMaker endpoints, instead of one tag call
+    per resource. The result is cached per region, so that all catalogs that bootstrap
+    at the same time share it.
+
+    Args:
+        client_factory: Creates a tagging API client for a region. Pass a factory that sets
+            an endpoint_url to discover resources of a local AWS stand-in such as moto.
+            Default: boto3 client for the region
+        ttl: Seconds that the tags of a region are reused. Default: 60
+
+    Example:
+        ```python
+        discovery = TaggedResourceDiscovery()
+        tags_by_arn = discovery.get_tags("eu-central-1", "dynamodb:table")
+        if tags_by_arn is None:
+            ...  # the tagging API is not available, list the tags per resource
+        ```
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], object] = _default_client_factory,
+        ttl: float = DEFAULT_DISCOVERY_TTL,
+    ):
+        self.client_factory = client_factory
+        self._tags = TTLCache(ttl=ttl)
+        self._region_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_tags(
+        self, region: str, resource_type: str
+    ) -> Optional[Dict[str, Dict[str, str]]]:
+        """Returns the Genie tags of all tagged resources of a type in a region.
+
+        Args:
+            region: AWS region.
+            resource_type: Service and resource type, e.g. "dynamodb:table".
+
+        Returns:
+            Tags whose key starts with "genie:" by resource ARN, or None if the tagging API
+            is not available and the caller needs to list the tags per resource.
+        """
+        region_tags = self._get_region_tags(region)
+        if region_tags is None:
+            return None
+        return {
+            arn: tags
+            for (arn_type, arn), tags in region_tags.items()
+            if arn_type == resource_type
+        }
+
+    def clear(self) -> None:
+        """Forgets all discovered tags."""
+        self._tags.clear()
+
+    def _get_region_tags(
+        self, region: str
+    ) -> Optional[Dict[Tuple[str, str], Dict[str, str]]]:
+        with self._lock:
+            region_lock = self._region_locks.setdefault(region, threading.Lock())
+        # catalogs that bootstrap concurrently wait for a single call per region
+        with region_lock:
+            entry = self._tags.get_entry(region)
+            if entry is not None:
+                return entry[1]
+            region_tags = self._discover(region)
+            self._tags.put(region, region_tags)
+            return region_tags
+
+    def _discover(self, region: str) -> Optional[Dict[Tuple[str, str], Dict[str, str]]]:
+        try:
+            paginator = self.client_factory(region).get_paginator("get_resources")
+            pages = paginator.paginate(ResourceTypeFilters=list(DISCOVERED_RESOURCE_TYPES))
+            region_tags = {}
+            for page in pages:
+                for mapping in page["ResourceTagMappingList"]:
+                    tags = {
+                        tag["Key"]: tag["Value"]
+                        for tag in mapping.get("Tags", [])
+                        if tag["Key"].startswith(GENIE_TAG_PREFIX)
+                    }
+                    if tags:
+                        arn = mapping["ResourceARN"]
+                        region_tags[(_resource_type_of(arn), arn)] = tags
+        except (
+            botocore.exceptions.ClientError,
+            botocore.exceptions.EndpointConnectionError,
+            botocore.exceptions.ConnectTimeoutError,
+            botocore.exceptions.NoCredentialsError,
+        ) as err:
+            logger.info(
+                "Resource Groups Tagging API not available in %s, listing tags per resource.\n%s",
+                region,
+                err,
+            )
+            return None
+        logger.info("%s resources with Genie tags found in %s", len(region_tags), region)
+        return region_tags
+
+
+_tagged_resource_discovery = TaggedResourceDiscovery()
+
+
+def get_tagged_resource_discovery() -> TaggedResourceDiscovery:
+    """Returns the process-wide discovery service that all catalogs share."""
+    return _tagged_resource_discovery
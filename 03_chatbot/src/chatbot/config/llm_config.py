@@ -21,6 +21,11 @@ class LLMConfigParameters:
     """
 
     chat_prompt: Optional[str] = None
+    """Maximum number of tokens of the prompt sent to the model when asking questions based on
+    documents, including the prompt template, the question and the retrieved documents.
+    Retrieved documents are packed into what is left of this budget.
+    """
+    context_token_budget: Optional[int] = None
     """Configures the max number of tokens to use in the generated response."""
     max_token_count: Optional[int] = None
     """Local path, S3 URI or LangChainHub path that contains prompt template to use when asking
@@ -45,6 +50,9 @@ class LLMConfigParameters:
     def from_dict(obj: Any) -> "LLMConfigParameters":
         assert isinstance(obj, dict)
         chat_prompt = from_union([from_str, from_none], obj.get("chatPrompt"))
+        context_token_budget = from_union(
+            [from_int, from_none], obj.get("contextTokenBudget")
+        )
         max_token_count = from_union([from_int, from_none], obj.get("maxTokenCount"))
         rag_prompt = from_union([from_str, from_none], obj.get("ragPrompt"))
         stop_sequence = from_union(
@@ -53,12 +61,21 @@ class LLMConfigParameters:
         temperature = from_union([from_float, from_none], obj.get("temperature"))
         top_p = from_union([from_float, from_none], obj.get("topP"))
         return LLMConfigParameters(
-            chat_prompt, max_token_count, rag_prompt, stop_sequence, temperature, top_p
+            chat_prompt,
+            context_token_budget,
+            max_token_count,
+            rag_prompt,
+            stop_sequence,
+            temperature,
+            top_p,
         )
 
     def to_dict(self) -> dict:
         result: dict = {}
         result["chatPrompt"] = from_union([from_str, from_none], self.chat_prompt)
+        result["contextTokenBudget"] = from_union(
+            [from_int, from_none], self.context_token_budget
+        )
         result["maxTokenCount"] = from_union(
             [from_int, from_none], self.max_token_count
         )
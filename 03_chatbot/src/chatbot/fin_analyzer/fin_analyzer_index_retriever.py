@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import logging
 import pandas as pd
-from typing import Any, List, Tuple, Union
+from typing import Any, List, Optional, Tuple, Union
 from tabulate import tabulate
 
 # Streamlit plot integration
@@ -12,11 +12,10 @@ from plotnine import *
 from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
 from langchain.schema import BaseRetriever, Document
 
-import boto3
+from chatbot.helpers import get_client
 from io import StringIO
 
 logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
-s3_client = boto3.client('s3')
 
 class FinAnalyzerIndexRetriever(BaseRetriever):
     """Retriever to search Financial Documentation.
@@ -25,7 +24,9 @@ class FinAnalyzerIndexRetriever(BaseRetriever):
         announcement_df: Announcements dataframe.
         prices_df: Daily prices dataframe.
         announcement_filter: User selected filter on GUI.
-        max_character_limit: Maximum character limit for each document. Default: 80000
+        max_character_limit: Maximum character limit for each document, None to keep whole
+            documents. Models with a token budget pack documents into it as well.
+            Default: 80000
 
     Example:
         ```python
@@ -38,7 +39,7 @@ class FinAnalyzerIndexRetriever(BaseRetriever):
 
     plot_requested = False
     graphs = {}
-    max_character_limit: int
+    max_character_limit: Optional[int]
 
     def __init__(
         self,
@@ -46,7 +47,7 @@ class FinAnalyzerIndexRetriever(BaseRetriever):
         prices_df,
         announcement_filter: List,
         # TODO: Move to the appconfig together with max number of documents to select
-        max_character_limit: int = 80000
+        max_character_limit: Optional[int] = 80000
     ):        
         super().__init__(
             max_character_limit=max_character_limit,
@@ -55,7 +56,7 @@ class FinAnalyzerIndexRetriever(BaseRetriever):
         )
 
     def read_from_s3(self, bucket, key):
-        obj = s3_client.get_object(Bucket=bucket, Key=key)
+        obj = get_client("s3").get_object(Bucket=bucket, Key=key)
         data = obj['Body'].read().decode('utf-8')
         return pd.read_csv(StringIO(data))
     
@@ -114,7 +115,7 @@ class FinAnalyzerIndexRetriever(BaseRetriever):
                 row["symbol"], 
                 row["form"],
                 row.date_full, 
-                row.content[:int(min(self.max_character_limit, len(row.content)))], 
+                row.content[:self.max_character_limit], 
                 # tabulate(open_change_before, headers='keys', tablefmt='pipe', showindex=False),
                 # tabulate(open_change_after, headers='keys', tablefmt='pipe', showindex=False)
             )
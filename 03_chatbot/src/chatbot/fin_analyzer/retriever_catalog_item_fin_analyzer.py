@@ -9,10 +9,9 @@ import streamlit as st
 
 import pandas as pd
 
-import boto3
+from chatbot.helpers import get_client
 from io import StringIO
 
-s3_client = boto3.client('s3')
 
 @dataclass
 class FinAnalyzerRetrieverItem(RetrieverCatalogItem):
@@ -40,7 +39,7 @@ class FinAnalyzerRetrieverItem(RetrieverCatalogItem):
         self.region = region
 
         # get the list of available stock data
-        response = s3_client.list_objects_v2(Bucket=config.s3_bucket, Prefix=config.s3_prefix + "/", Delimiter="/")
+        response = get_client("s3").list_objects_v2(Bucket=config.s3_bucket, Prefix=config.s3_prefix + "/", Delimiter="/")
         
         # Loading company prices and announcements from S3 into data frames
         self._data_sources = []
@@ -94,7 +93,7 @@ class FinAnalyzerRetrieverItem(RetrieverCatalogItem):
         return retriever
     
     def read_from_s3(self, bucket, key, format):
-        obj = s3_client.get_object(Bucket=bucket, Key=key)
+        obj = get_client("s3").get_object(Bucket=bucket, Key=key)
         data = obj['Body'].read().decode('utf-8')
         
         if format == "csv":
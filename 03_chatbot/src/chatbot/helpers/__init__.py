@@ -1,5 +1,9 @@
-from .aws_helpers import get_boto_session, get_current_account_id
+from .aws_helpers import get_boto_session, get_client, get_current_account_id
 from .environment_variables import ChatbotEnvironment, ChatbotEnvironmentVariables
 from .urls import is_url
 from .sagemaker_async_endpoint import SagemakerAsyncEndpoint
-from .langchain_bedrock_overwrite import Bedrock
\ No newline at end of file
+from .sagemaker_streaming_endpoint import SagemakerStreamingEndpoint
+from .langchain_bedrock_overwrite import Bedrock
+from .hedged_llm import HedgedLLM
+from .ttl_cache import TTLCache
+from .secrets_cache import SecretsCache, get_secrets_cache
@@ -1,10 +1,12 @@
 """ Module that contains helper functions for common AWS operations.
 """
 import datetime
-from typing import Union
+import threading
+from typing import Optional, Union
 
 import boto3
 import botocore
+from botocore.config import Config
 from botocore.credentials import (
     AssumeRoleCredentialFetcher,
     DeferredRefreshableCredentials,
@@ -12,11 +14,28 @@ from botocore.credentials import (
 from chatbot.config import Iam
 from dateutil.tz import tzlocal
 
+from .environment_variables import ChatbotEnvironment, ChatbotEnvironmentVariables
+from .ttl_cache import TTLCache
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+_sessions: TTLCache = TTLCache()
+""" boto3 sessions per (profile, role ARN), shared so that credentials are fetched and refreshed once. """
+
+_clients: TTLCache = TTLCache()
+""" boto3 clients per (service, region, profile, role ARN, endpoint URL), shared by all sessions. """
+
+_account_id: Optional[str] = None
+_account_id_lock = threading.Lock()
+
 
 def get_current_account_id():
-    """Returns the current AWS account ID."""
-    account = boto3.client("sts").get_caller_identity()["Account"]
-    return account
+    """Returns the current AWS account ID. The STS call is made once per process."""
+    global _account_id
+    with _account_id_lock:
+        if _account_id is None:
+            _account_id = get_client("sts").get_caller_identity()["Account"]
+        return _account_id
 
 
 def _get_client_creator(session):
@@ -43,15 +62,70 @@ def assume_role_session(
     return boto3.Session(botocore_session=botocore_session)
 
 
-def get_boto_session(iam_config: Union[Iam, None], region: str):
+def _get_iam_key(iam_config: Union[Iam, None]):
     if not iam_config:
+        return None, None
+    return iam_config.parameters.profile or None, iam_config.parameters.role_arn or None
+
+
+def get_boto_session(iam_config: Union[Iam, None], region: str):
+    """Returns the process-wide boto3 session for an IAM configuration.
+
+    Sessions that assume a role share their refreshable credentials, so the role is only
+    assumed again when the credentials are about to expire.
+    """
+    iam_profile_name, iam_role_arn = _get_iam_key(iam_config)
+
+    def create_session():
+        if iam_profile_name:
+            return boto3.Session(profile_name=iam_profile_name)
+
+        if iam_role_arn:
+            return assume_role_session(iam_role_arn, region=region)
         return boto3.Session()
-    iam_profile_name = iam_config.parameters.profile or None
-    iam_role_arn = iam_config.parameters.role_arn or None
 
-    if iam_profile_name:
-        return boto3.Session(profile_name=iam_profile_name)
+    return _sessions.get_or_create((iam_profile_name, iam_role_arn), create_session)
+
+
+def get_client(
+    service_name: str,
+    region: Optional[str] = None,
+    iam_config: Union[Iam, None] = None,
+    endpoint_url: Optional[str] = None,
+):
+    """Returns a process-wide boto3 client.
+
+    Clients are thread-safe and keep their HTTP connections alive, so they are created
+    once per service, region, IAM configuration and endpoint and reused by all sessions.
+    They retry throttled calls in adaptive mode.
+
+    Args:
+        service_name: AWS service, e.g. "bedrock-runtime".
+        region: AWS region. Default: region of the environment
+        iam_config: Profile or role to use. Default: credentials of the environment
+        endpoint_url: Custom endpoint of the service. Default: None
+
+    Example:
+        ```python
+        bedrock_runtime = get_client("bedrock-runtime", "us-east-1", iam_config)
+        ```
+    """
+    iam_key = _get_iam_key(iam_config)
 
-    if iam_role_arn:
-        return assume_role_session(iam_role_arn, region=region)
-    return boto3.Session()
+    def create_client():
+        config = Config(
+            max_pool_connections=int(
+                ChatbotEnvironment().get_env_variable(
+                    ChatbotEnvironmentVariables.AWSClientMaxPoolConnections
+                )
+            ),
+            retries={"mode": "adaptive", "max_attempts": DEFAULT_MAX_ATTEMPTS},
+            tcp_keepalive=True,
+        )
+        return get_boto_session(iam_config, region).client(
+            service_name, region_name=region, endpoint_url=endpoint_url, config=config
+        )
+
+    return _clients.get_or_create(
+        (service_name, region, *iam_key, endpoint_url), create_client
+    )
@@ -9,13 +9,50 @@ class ChatbotEnvironmentVariables(Enum):
     """
 
     AmazonBedrockRegion = "BEDROCK_REGION"
+    BedrockHedgingEnabled = "BEDROCK_HEDGING_ENABLED"
+    BedrockHedgingInitialDelayMs = "BEDROCK_HEDGING_INITIAL_DELAY_MS"
+    BedrockHedgingPercentile = "BEDROCK_HEDGING_PERCENTILE"
     AWSRegion = "AWS_DEFAULT_REGION"
+    AWSClientMaxPoolConnections = "AWS_CLIENT_MAX_POOL_CONNECTIONS"
     AmazonTextractS3Bucket = "AMAZON_TEXTRACT_S3_BUCKET"
     BaseUrl = "BASE_URL"
     AWSAppConfigApplication = "AWS_APP_CONFIG_APPLICATION"
     AWSAppConfigEnvironment = "AWS_APP_CONFIG_ENVIRONMENT"
     AWSAppConfigProfile = "AWS_APP_CONFIG_PROFILE"
     AppPrefix = "APP_PREFIX"
+    OpenSearchSearchType = "OPEN_SEARCH_SEARCH_TYPE"
+    OpenSearchHybridFusion = "OPEN_SEARCH_HYBRID_FUSION"
+    OpenSearchHybridLexicalWeight = "OPEN_SEARCH_HYBRID_LEXICAL_WEIGHT"
+    OpenSearchMMREnabled = "OPEN_SEARCH_MMR_ENABLED"
+    OpenSearchMMRFetchK = "OPEN_SEARCH_MMR_FETCH_K"
+    OpenSearchMMRLambda = "OPEN_SEARCH_MMR_LAMBDA"
+    CatalogBootstrapMaxWorkers = "CATALOG_BOOTSTRAP_MAX_WORKERS"
+    CatalogBootstrapTimeoutSeconds = "CATALOG_BOOTSTRAP_TIMEOUT_SECONDS"
+    CatalogSnapshotURI = "CATALOG_SNAPSHOT_URI"
+    CatalogTTLSeconds = "CATALOG_TTL_SECONDS"
+    KendraResultCacheTTLSeconds = "KENDRA_RESULT_CACHE_TTL_SECONDS"
+    LLMCacheBackend = "LLM_CACHE_BACKEND"
+    LLMCacheMaxEntries = "LLM_CACHE_MAX_ENTRIES"
+    LLMCachePath = "LLM_CACHE_PATH"
+    LLMCacheTTLSeconds = "LLM_CACHE_TTL_SECONDS"
+    LocalVectorStorePath = "LOCAL_VECTOR_STORE_PATH"
+    LocalVectorStoreANN = "LOCAL_VECTOR_STORE_ANN"
+    LocalVectorStoreS3Uri = "LOCAL_VECTOR_STORE_S3_URI"
+    RerankerModel = "RERANKER_MODEL"
+    RerankerBackend = "RERANKER_BACKEND"
+    RerankerBatchSize = "RERANKER_BATCH_SIZE"
+    RerankerCandidateCount = "RERANKER_CANDIDATE_COUNT"
+    RerankerLatencyBudgetMs = "RERANKER_LATENCY_BUDGET_MS"
+    SemanticCacheEnabled = "SEMANTIC_CACHE_ENABLED"
+    SemanticCacheSimilarityThreshold = "SEMANTIC_CACHE_SIMILARITY_THRESHOLD"
+    SemanticCacheTTLSeconds = "SEMANTIC_CACHE_TTL_SECONDS"
+    SemanticCacheMaxEntries = "SEMANTIC_CACHE_MAX_ENTRIES"
+    SageMakerEndpointStateTTLSeconds = "SAGEMAKER_ENDPOINT_STATE_TTL_SECONDS"
+    SageMakerKeepWarmIntervalSeconds = "SAGEMAKER_KEEP_WARM_INTERVAL_SECONDS"
+    SageMakerModelDiscoveryEnabled = "SAGEMAKER_MODEL_DISCOVERY_ENABLED"
+    SageMakerWarmupHours = "SAGEMAKER_WARMUP_HOURS"
+    SecretsCacheTTLSeconds = "SECRETS_CACHE_TTL_SECONDS"
+    StreamingFrameIntervalMs = "STREAMING_FRAME_INTERVAL_MS"
 
 
 class ChatbotEnvironment:
@@ -27,8 +64,45 @@ class ChatbotEnvironment:
 
     __defaults: Dict[ChatbotEnvironmentVariables, str] = {
         ChatbotEnvironmentVariables.AmazonBedrockRegion: None,
+        ChatbotEnvironmentVariables.BedrockHedgingEnabled: "false",
+        ChatbotEnvironmentVariables.BedrockHedgingInitialDelayMs: "2000",
+        ChatbotEnvironmentVariables.BedrockHedgingPercentile: "0.95",
         ChatbotEnvironmentVariables.AWSRegion: "eu-west-1",
-        ChatbotEnvironmentVariables.AppPrefix: "genie"
+        ChatbotEnvironmentVariables.AWSClientMaxPoolConnections: "32",
+        ChatbotEnvironmentVariables.AppPrefix: "genie",
+        ChatbotEnvironmentVariables.OpenSearchSearchType: "vector",
+        ChatbotEnvironmentVariables.OpenSearchHybridFusion: "rrf",
+        ChatbotEnvironmentVariables.OpenSearchHybridLexicalWeight: "0.5",
+        ChatbotEnvironmentVariables.OpenSearchMMREnabled: "false",
+        ChatbotEnvironmentVariables.OpenSearchMMRFetchK: "20",
+        ChatbotEnvironmentVariables.OpenSearchMMRLambda: "0.5",
+        ChatbotEnvironmentVariables.CatalogBootstrapMaxWorkers: "8",
+        ChatbotEnvironmentVariables.CatalogBootstrapTimeoutSeconds: "20",
+        ChatbotEnvironmentVariables.CatalogSnapshotURI: None,
+        ChatbotEnvironmentVariables.CatalogTTLSeconds: "900",
+        ChatbotEnvironmentVariables.KendraResultCacheTTLSeconds: "300",
+        ChatbotEnvironmentVariables.LLMCacheBackend: "none",
+        ChatbotEnvironmentVariables.LLMCacheMaxEntries: "1000",
+        ChatbotEnvironmentVariables.LLMCachePath: "llm_cache.sqlite",
+        ChatbotEnvironmentVariables.LLMCacheTTLSeconds: "86400",
+        ChatbotEnvironmentVariables.LocalVectorStorePath: None,
+        ChatbotEnvironmentVariables.LocalVectorStoreANN: "false",
+        ChatbotEnvironmentVariables.LocalVectorStoreS3Uri: None,
+        ChatbotEnvironmentVariables.RerankerModel: None,
+        ChatbotEnvironmentVariables.RerankerBackend: "torch",
+        ChatbotEnvironmentVariables.RerankerBatchSize: "16",
+        ChatbotEnvironmentVariables.RerankerCandidateCount: "30",
+        ChatbotEnvironmentVariables.RerankerLatencyBudgetMs: "300",
+        ChatbotEnvironmentVariables.SemanticCacheEnabled: "false",
+        ChatbotEnvironmentVariables.SemanticCacheSimilarityThreshold: "0.95",
+        ChatbotEnvironmentVariables.SemanticCacheTTLSeconds: "86400",
+        ChatbotEnvironmentVariables.SemanticCacheMaxEntries: "1000",
+        ChatbotEnvironmentVariables.SageMakerEndpointStateTTLSeconds: "60",
+        ChatbotEnvironmentVariables.SageMakerKeepWarmIntervalSeconds: "0",
+        ChatbotEnvironmentVariables.SageMakerModelDiscoveryEnabled: "false",
+        ChatbotEnvironmentVariables.SageMakerWarmupHours: None,
+        ChatbotEnvironmentVariables.SecretsCacheTTLSeconds: "3600",
+        ChatbotEnvironmentVariables.StreamingFrameIntervalMs: "50",
     }
 
     def get_env_variable(self, variable_name: ChatbotEnvironmentVariables) -> str:
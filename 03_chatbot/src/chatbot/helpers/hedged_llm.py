@@ -0,0 +1,280 @@
+""" Module that contains an LLM that hedges slow or throttled requests with a second model.
+"""
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Iterator, List, Mapping, Optional
+
+from botocore.exceptions import ClientError
+from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.llms.base import LLM
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.outputs import GenerationChunk
+
+from .logger import TECHNICAL_LOGGER_NAME
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+""" Error codes after which the next model is asked right away. """
+MIN_LATENCY_SAMPLES = 20
+""" Number of first token latencies that are needed before the percentile is used. """
+MIN_HEDGE_DELAY = 0.1
+""" Seconds that a request waits at least before it is hedged. """
+
+_CHUNK = "chunk"
+_DONE = "done"
+_ERROR = "error"
+
+
+class LatencyTracker:
+    """Keeps the most recent first token latencies of a model and returns their percentiles.
+
+    Args:
+        window: Number of latencies that are kept. Default: 200
+    """
+
+    def __init__(self, window: int = 200):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def record(self, seconds: float) -> None:
+        """Adds the latency of a request."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Nearest-rank percentile of the recorded latencies, None without enough samples."""
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+_latency_trackers: TTLCache = TTLCache()
+""" Latency trackers per model, shared by all sessions. """
+
+
+def get_latency_tracker(key) -> LatencyTracker:
+    """Returns the process-wide latency tracker of a model, e.g. per model ID and region."""
+    return _latency_trackers.get_or_create(key, LatencyTracker)
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Whether an error or one of its causes is a throttling error of an AWS service."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, ClientError):
+            if error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+                return True
+        elif any(code in str(error) for code in THROTTLING_ERROR_CODES):
+            # langchain wraps the errors of AWS services in a ValueError
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _get_text(chunk: Any) -> str:
+    # LLMs stream strings, chat models message chunks
+    return chunk if isinstance(chunk, str) else chunk.content
+
+
+class HedgedLLM(LLM):
+    """LLM that sends a request to the next model if the first one is slow or throttled.
+
+    The request goes to the first model. If it has not streamed its first token after
+    the hedge delay, or fails with a throttling error, the same request is sent to the
+    next model. The model that streams the first token wins and the other requests are
+    cancelled: their responses are no longer read. The hedge delay is the percentile of
+    the recent first token latencies of the first model, or the initial hedge delay
+    as long as there are too few of them.
+
+    All models need to accept the same prompt, e.g. the same Amazon Bedrock model in
+    different regions. Their own callbacks are not called. Models without response
+    streaming are invoked and hedged if they have not answered after the hedge delay.
+
+    Example:
+        ```python
+        llm = HedgedLLM(
+            llms=[bedrock_eu_central_1, bedrock_us_east_1],
+            latency_trackers=[
+                get_latency_tracker(("anthropic.claude-v2", "eu-central-1")),
+                get_latency_tracker(("anthropic.claude-v2", "us-east-1")),
+            ],
+        )
+        ```
+    """
+
+    llms: List[BaseLanguageModel]
+    """ Models in the order in which requests are sent to them. """
+    latency_trackers: List[LatencyTracker]
+    """ First token latencies per model. """
+    hedge_percentile: float = 0.95
+    """ Percentile of the first token latency of the first model after which requests are hedged. """
+    initial_hedge_delay: float = 2.0
+    """ Seconds after which requests are hedged while there are too few latencies. """
+    streaming: bool = False
+    """ Whether tokens are passed to the callbacks as they arrive. """
+    stream_llms: bool = True
+    """ Whether the models support response streaming. Otherwise they are invoked and the
+    full response counts as first token. """
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def _identifying_params(self) -> Mapping[str, Any]:
+        return {
+            "llms": [getattr(llm, "_identifying_params", {}) for llm in self.llms],
+        }
+
+    def get_hedge_delay(self) -> float:
+        """Returns the seconds after which a request to the first model is hedged."""
+        delay = self.latency_trackers[0].percentile(self.hedge_percentile)
+        return max(MIN_HEDGE_DELAY, self.initial_hedge_delay if delay is None else delay)
+
+    def _run_attempt(
+        self,
+        index: int,
+        prompt: str,
+        stop: Optional[List[str]],
+        events: queue.Queue,
+        cancelled: threading.Event,
+        **kwargs: Any,
+    ) -> None:
+        # latencies are recorded even if another model won, otherwise the percentile
+        # only sees requests that were faster than the hedge delay and keeps falling
+        start_time = time.perf_counter()
+        tracker = self.latency_trackers[index]
+        if not self.stream_llms:
+            try:
+                response = self.llms[index].invoke(prompt, stop=stop, **kwargs)
+            except Exception as error:
+                events.put((index, _ERROR, error))
+                return
+            tracker.record(time.perf_counter() - start_time)
+            if not cancelled.is_set():
+                events.put((index, _CHUNK, _get_text(response)))
+                events.put((index, _DONE, None))
+            return
+
+        stream = self.llms[index].stream(prompt, stop=stop, **kwargs)
+        first_token = True
+        try:
+            for chunk in stream:
+                if first_token:
+                    tracker.record(time.perf_counter() - start_time)
+                    first_token = False
+                if cancelled.is_set():
+                    return
+                events.put((index, _CHUNK, _get_text(chunk)))
+            events.put((index, _DONE, None))
+        except Exception as error:
+            events.put((index, _ERROR, error))
+        finally:
+            stream.close()
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        events: queue.Queue = queue.Queue()
+        cancel_events: List[threading.Event] = []
+        start_times: List[float] = []
+        running = set()
+        winner = None
+        last_error: Optional[BaseException] = None
+
+        def start_next_attempt() -> bool:
+            index = len(cancel_events)
+            if index >= len(self.llms):
+                return False
+            if index > 0:
+                logger.info("Hedging LLM request with model %s.", index)
+            cancel_events.append(threading.Event())
+            start_times.append(time.perf_counter())
+            running.add(index)
+            threading.Thread(
+                target=self._run_attempt,
+                args=(index, prompt, stop, events, cancel_events[index]),
+                kwargs=kwargs,
+                name="hedged-llm",
+                daemon=True,
+            ).start()
+            return True
+
+        start_next_attempt()
+        deadline = start_times[0] + self.get_hedge_delay()
+        try:
+            while True:
+                hedge_pending = winner is None and len(cancel_events) < len(self.llms)
+                timeout = max(0.0, deadline - time.perf_counter()) if hedge_pending else None
+                try:
+                    index, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    start_next_attempt()
+                    deadline = time.perf_counter() + self.get_hedge_delay()
+                    continue
+
+                if winner is not None and index != winner:
+                    continue
+                if kind == _ERROR:
+                    running.discard(index)
+                    last_error = payload
+                    if winner is not None:
+                        raise payload
+                    if is_throttling_error(payload):
+                        logger.warning("LLM request to model %s was throttled.", index)
+                        start_next_attempt()
+                    if not running:
+                        raise last_error
+                    continue
+                if winner is None:
+                    winner = index
+                    for other, cancel_event in enumerate(cancel_events):
+                        if other != index:
+                            cancel_event.set()
+                if kind == _DONE:
+                    return
+                chunk = GenerationChunk(text=payload)
+                if run_manager:
+                    run_manager.on_llm_new_token(payload, chunk=chunk)
+                yield chunk
+        finally:
+            for cancel_event in cancel_events:
+                cancel_event.set()
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return "".join(
+            chunk.text
+            for chunk in self._stream(
+                prompt, stop, run_manager if self.streaming else None, **kwargs
+            )
+        )
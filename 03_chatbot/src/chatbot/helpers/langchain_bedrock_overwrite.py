@@ -2,12 +2,19 @@
 This file includes software developed at Langchain (https://github.com/langchain-ai/langchain).
 The code is licensed under MIT.
 """
+import asyncio
+import contextlib
+import io
 import json
 import warnings
+import weakref
 from abc import ABC
-from typing import Any, Dict, Iterator, List, Mapping, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional
 
-from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
 from langchain.llms.base import LLM
 from langchain.llms.utils import enforce_stop_tokens
 from langchain.pydantic_v1 import BaseModel, Extra, root_validator
@@ -18,6 +25,8 @@ from langchain.utilities.anthropic import (
 )
 from langchain.utils import get_from_dict_or_env
 
+from .aws_helpers import get_boto_session
+
 HUMAN_PROMPT = "\n\nHuman:"
 ASSISTANT_PROMPT = "\n\nAssistant:"
 ALTERNATION_ERROR = (
@@ -132,20 +141,112 @@ class LLMInputOutputAdapter:
             )
 
         for event in stream:
-            chunk = event.get("chunk")
-            if chunk:
-                chunk_obj = json.loads(chunk.get("bytes").decode())
-                if provider == "cohere" and (
-                    chunk_obj["is_finished"]
-                    or chunk_obj[cls.provider_to_output_key_map[provider]]
-                    == "<EOS_TOKEN>"
-                ):
-                    return
-
-                # chunk obj format varies with provider
-                yield GenerationChunk(
-                    text=chunk_obj[cls.provider_to_output_key_map[provider]]
-                )
+            chunk_obj = cls._parse_stream_event(event)
+            if chunk_obj is None:
+                continue
+            if cls._is_end_of_stream(provider, chunk_obj):
+                return
+
+            # chunk obj format varies with provider
+            yield GenerationChunk(
+                text=chunk_obj[cls.provider_to_output_key_map[provider]]
+            )
+
+    @classmethod
+    async def aprepare_output(cls, provider: str, response: Any) -> str:
+        """Async version of prepare_output for responses of an aiobotocore client."""
+        async with response["body"] as body:
+            data = await body.read()
+        return cls.prepare_output(provider, {**response, "body": io.BytesIO(data)})
+
+    @classmethod
+    async def aprepare_output_stream(
+        cls, provider: str, response: Any, stop: Optional[List[str]] = None
+    ) -> AsyncIterator[GenerationChunk]:
+        """Async version of prepare_output_stream for responses of an aiobotocore client."""
+        stream = response.get("body")
+
+        if not stream:
+            return
+
+        if provider not in cls.provider_to_output_key_map:
+            raise ValueError(
+                f"Unknown streaming response output key for provider: {provider}"
+            )
+
+        async for event in stream:
+            chunk_obj = cls._parse_stream_event(event)
+            if chunk_obj is None:
+                continue
+            if cls._is_end_of_stream(provider, chunk_obj):
+                return
+
+            yield GenerationChunk(
+                text=chunk_obj[cls.provider_to_output_key_map[provider]]
+            )
+
+    @staticmethod
+    def _parse_stream_event(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        chunk = event.get("chunk")
+        if not chunk:
+            return None
+        return json.loads(chunk.get("bytes").decode())
+
+    @classmethod
+    def _is_end_of_stream(cls, provider: str, chunk_obj: Dict[str, Any]) -> bool:
+        return provider == "cohere" and (
+            chunk_obj["is_finished"]
+            or chunk_obj[cls.provider_to_output_key_map[provider]] == "<EOS_TOKEN>"
+        )
+
+
+class _AsyncClientPool:
+    """aiobotocore client of one Bedrock configuration on one event loop.
+
+    A new client is created when the credentials rotate. Requests that still use the
+    previous client finish on it, and it is closed after the last one.
+    """
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.access_key: Optional[str] = None
+        self.client: Any = None
+        self._users: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+
+    async def acquire(self, credentials: Any, create_client: Any) -> Any:
+        """Returns the client for the credentials and counts the caller as its user."""
+        # coroutines that miss at the same time wait for a single client
+        async with self.lock:
+            if self.client is None or self.access_key != credentials.access_key:
+                if self.client is not None:
+                    await self._retire(self.client)
+                self.client = await create_client(credentials)
+                self.access_key = credentials.access_key
+            client = self.client
+            self._users[id(client)] = self._users.get(id(client), 0) + 1
+            return client
+
+    async def release(self, client: Any) -> None:
+        """Ends a use of a client and closes it if it was replaced and is not used anymore."""
+        self._users[id(client)] -= 1
+        if self._users[id(client)] == 0:
+            del self._users[id(client)]
+            retired = self._retired.pop(id(client), None)
+            if retired is not None:
+                await retired.__aexit__(None, None, None)
+
+    async def _retire(self, client: Any) -> None:
+        if id(client) in self._users:
+            self._retired[id(client)] = client
+        else:
+            await client.__aexit__(None, None, None)
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+""" _AsyncClientPool per event loop and configuration, because connection pools are bound to the loop. """
 
 
 class BedrockBase(BaseModel, ABC):
@@ -179,6 +280,15 @@ class BedrockBase(BaseModel, ABC):
     streaming: bool = False
     """Whether to stream the results."""
 
+    async_client: Any = None
+    """Optional aiobotocore bedrock-runtime client for the async methods. By default a
+    client is created once per event loop with the region, endpoint and credentials of
+    the synchronous client."""
+
+    boto_session: Any = None
+    """boto3 session of the synchronous client, e.g. from get_boto_session with the IAM
+    configuration. The async client signs requests with its credentials."""
+
     provider_stop_sequence_key_name_map: Mapping[str, str] = {
         "anthropic": "stop_sequences",
         "amazon": "stopSequences",
@@ -236,7 +346,9 @@ class BedrockBase(BaseModel, ABC):
     def _identifying_params(self) -> Mapping[str, Any]:
         """Get the identifying parameters."""
         _model_kwargs = self.model_kwargs or {}
+        # the model ID is part of the key of cached responses
         return {
+            **{"model_id": self.model_id},
             **{"model_kwargs": _model_kwargs},
         }
 
@@ -322,6 +434,138 @@ class BedrockBase(BaseModel, ABC):
                 run_manager.on_llm_new_token(chunk.text, chunk=chunk)
 
 
+    @contextlib.asynccontextmanager
+    async def _async_client(self) -> AsyncIterator[Any]:
+        """Yields the aiobotocore client for a request, which stays open until the request ends."""
+        if self.async_client is not None:
+            yield self.async_client
+            return
+        try:
+            from aiobotocore.session import AioSession
+        except ImportError:
+            raise ModuleNotFoundError(
+                "Could not import aiobotocore python package. "
+                "Please install it with `pip install aiobotocore`."
+            )
+
+        region_name = self.region_name or getattr(
+            getattr(self.client, "meta", None), "region_name", None
+        )
+        endpoint_url = self.endpoint_url or getattr(
+            getattr(self.client, "meta", None), "endpoint_url", None
+        )
+        boto_session = self.boto_session
+        if boto_session is None:
+            if self.credentials_profile_name is not None:
+                import boto3
+
+                boto_session = boto3.Session(profile_name=self.credentials_profile_name)
+            else:
+                boto_session = get_boto_session(None, region_name)
+        # refreshable credentials, e.g. of an assumed role, are frozen for the client
+        # and the client is replaced once they were refreshed. A refresh calls STS, so
+        # it runs outside of the event loop.
+        credentials = await asyncio.to_thread(
+            lambda: boto_session.get_credentials().get_frozen_credentials()
+        )
+
+        async def create_client(credentials: Any) -> Any:
+            # the client lives as long as the event loop, like the synchronous clients
+            return await AioSession().create_client(
+                "bedrock-runtime",
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                aws_session_token=credentials.token,
+            ).__aenter__()
+
+        key = (region_name, endpoint_url, id(boto_session))
+        pool = _async_clients.setdefault(asyncio.get_running_loop(), {}).setdefault(
+            key, _AsyncClientPool()
+        )
+        client = await pool.acquire(credentials, create_client)
+        try:
+            yield client
+        finally:
+            await pool.release(client)
+
+    async def _aprepare_input_and_invoke(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        _model_kwargs = self.model_kwargs or {}
+
+        provider = self._get_provider()
+        params = {**_model_kwargs, **kwargs}
+        input_body = LLMInputOutputAdapter.prepare_input(provider, prompt, params)
+        body = json.dumps(input_body)
+
+        async with self._async_client() as client:
+            try:
+                response = await client.invoke_model(
+                    body=body,
+                    modelId=self.model_id,
+                    accept="application/json",
+                    contentType="application/json",
+                )
+                text = await LLMInputOutputAdapter.aprepare_output(provider, response)
+
+            except Exception as e:
+                raise ValueError(f"Error raised by bedrock service: {e}")
+
+        if stop is not None:
+            text = enforce_stop_tokens(text, stop)
+
+        return text
+
+    async def _aprepare_input_and_invoke_stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        _model_kwargs = dict(self.model_kwargs or {})
+        provider = self._get_provider()
+
+        if stop:
+            if provider not in self.provider_stop_sequence_key_name_map:
+                raise ValueError(
+                    f"Stop sequence key name for {provider} is not supported."
+                )
+            _model_kwargs[self.provider_stop_sequence_key_name_map.get(provider)] = stop
+
+        if provider == "cohere":
+            _model_kwargs["stream"] = True
+
+        params = {**_model_kwargs, **kwargs}
+        input_body = LLMInputOutputAdapter.prepare_input(provider, prompt, params)
+        body = json.dumps(input_body)
+
+        # the client stays open until the response stream was read
+        async with self._async_client() as client:
+            try:
+                response = await client.invoke_model_with_response_stream(
+                    body=body,
+                    modelId=self.model_id,
+                    accept="application/json",
+                    contentType="application/json",
+                )
+            except Exception as e:
+                raise ValueError(f"Error raised by bedrock service: {e}")
+
+            async for chunk in LLMInputOutputAdapter.aprepare_output_stream(
+                provider, response, stop
+            ):
+                yield chunk
+                if run_manager is not None:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+
 class Bedrock(LLM, BedrockBase):
     """Bedrock models.
 
@@ -433,6 +677,63 @@ class Bedrock(LLM, BedrockBase):
 
         return self._prepare_input_and_invoke(prompt=prompt, stop=stop, **kwargs)
 
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Call out to Bedrock service with streaming without blocking a thread.
+
+        Args:
+            prompt (str): The prompt to pass into the model
+            stop (Optional[List[str]], optional): Stop sequences. These will
+                override any stop sequences in the `model_kwargs` attribute.
+                Defaults to None.
+            run_manager (Optional[AsyncCallbackManagerForLLMRun], optional): Callback
+                run managers used to process the output. Defaults to None.
+
+        Yields:
+            AsyncIterator[GenerationChunk]: Responses from the model.
+        """
+        async for chunk in self._aprepare_input_and_invoke_stream(
+            prompt=prompt, stop=stop, run_manager=run_manager, **kwargs
+        ):
+            yield chunk
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call out to Bedrock service model without blocking a thread.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: Optional list of stop words to use when generating.
+
+        Returns:
+            The string generated by the model.
+
+        Example:
+            .. code-block:: python
+
+                response = await llm.ainvoke("Tell me a joke.")
+        """
+
+        if self.streaming:
+            completion = ""
+            async for chunk in self._astream(
+                prompt=prompt, stop=stop, run_manager=run_manager, **kwargs
+            ):
+                completion += chunk.text
+            return completion
+
+        return await self._aprepare_input_and_invoke(prompt=prompt, stop=stop, **kwargs)
+
     def get_num_tokens(self, text: str) -> int:
         if self._model_is_anthropic:
             return get_num_tokens_anthropic(text)
@@ -4,69 +4,270 @@ and GitHub snippet https://gist.github.com/dgallitelli/bdce9c5b3eb5e3948924d1632
 """
 
 """Wrapper around Sagemaker InvokeEndpointAsync API."""
-from abc import abstractmethod
-from typing import Any, List, Optional
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
 from langchain.callbacks.manager import CallbackManagerForLLMRun
-from langchain.llms.utils import enforce_stop_tokens
 from langchain.llms.sagemaker_endpoint import SagemakerEndpoint
-import boto3, time, os, uuid
-from botocore.exceptions import ClientError
+from langchain.llms.utils import enforce_stop_tokens
+
+from .aws_helpers import get_client, get_current_account_id
+from .environment_variables import ChatbotEnvironment, ChatbotEnvironmentVariables
+from .logger import TECHNICAL_LOGGER_NAME
+from .sagemaker_async_notifications import STATUS_COMPLETED, get_async_inference_listener
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+WAKE_UP_MESSAGE = "Endpoint is not running, waking it up. - It will take about 10 minutes from the first wake up attempt."
+
+POLL_INITIAL_DELAY = 0.25
+""" Seconds before the first check for the result of a request. """
+POLL_MAX_DELAY = 5.0
+""" Maximum seconds between two checks for the result of a request. """
+NOTIFIED_POLL_MAX_DELAY = 30.0
+""" Maximum seconds between two checks when completion notifications are received. """
+
+_endpoint_states: Optional[TTLCache] = None
+""" Whether an endpoint has running instances, per (region, endpoint name). """
+
+
+def _get_endpoint_states() -> TTLCache:
+    global _endpoint_states
+    if _endpoint_states is None:
+        _endpoint_states = TTLCache(
+            ttl=float(
+                ChatbotEnvironment().get_env_variable(
+                    ChatbotEnvironmentVariables.SageMakerEndpointStateTTLSeconds
+                )
+            )
+        )
+    return _endpoint_states
+
+
+def is_endpoint_running(endpoint_name: str, region: Optional[str] = None) -> bool:
+    """Returns whether an async endpoint has running instances.
+
+    The state is cached for SAGEMAKER_ENDPOINT_STATE_TTL_SECONDS, so prompts to a warm
+    endpoint do not call DescribeEndpoint.
+    """
+
+    def describe():
+        response = get_client("sagemaker", region).describe_endpoint(
+            EndpointName=endpoint_name
+        )
+        return response["ProductionVariants"][0]["CurrentInstanceCount"] > 0
+
+    return _get_endpoint_states().get_or_create((region, endpoint_name), describe)
+
+
+def invalidate_endpoint_state(endpoint_name: str, region: Optional[str] = None) -> None:
+    """Forgets the cached state of an async endpoint, so that it is described again."""
+    _get_endpoint_states().invalidate((region, endpoint_name))
+
+
+WAKE_UP_INTERVAL = 300
+""" Seconds after which another wake-up request is sent to an endpoint that is still cold. """
+
+ENDPOINT_READY = "ready"
+ENDPOINT_WAKING_UP = "waking_up"
+ENDPOINT_COLD = "cold"
+
+_wake_ups: TTLCache = TTLCache(ttl=WAKE_UP_INTERVAL)
+""" Time of the last wake-up request per (region, endpoint name). """
+
+
+def wake_up_endpoint(
+    endpoint_name: str,
+    region: Optional[str],
+    input_bucket: str,
+    input_prefix: str,
+    content_type: str = "application/json",
+    accepts: str = "application/json",
+    invocation_timeout: int = 90,
+    force: bool = False,
+) -> bool:
+    """Sends an empty request, so that an async endpoint scales out from zero instances.
+
+    Sessions, catalog warm-up and keep-warm heartbeats share one wake-up per endpoint
+    every WAKE_UP_INTERVAL seconds.
+
+    Args:
+        endpoint_name: SageMaker endpoint name.
+        region: AWS region of the endpoint.
+        input_bucket: S3 bucket of the requests to the endpoint.
+        input_prefix: S3 prefix of the requests to the endpoint.
+        content_type: Content type that the endpoint accepts. Default: "application/json"
+        accepts: Content type of the responses. Default: "application/json"
+        invocation_timeout: Timeout of the request in seconds. Default: 90
+        force: Send the request even if the endpoint runs or was woken up recently,
+            e.g. as keep-warm heartbeat. Default: False
+
+    Returns:
+        Whether a request was sent.
+    """
+    key = (region, endpoint_name)
+    if not force and (_wake_ups.get(key) is not None or is_endpoint_running(endpoint_name, region)):
+        return False
+    test_key = os.path.join(input_prefix, "test")
+    get_client("s3", region).put_object(Body=b"", Bucket=input_bucket, Key=test_key)
+    get_client("sagemaker-runtime", region).invoke_endpoint_async(
+        EndpointName=endpoint_name,
+        InputLocation="s3://{}/{}".format(input_bucket, test_key),
+        ContentType=content_type,
+        Accept=accepts,
+        InvocationTimeoutSeconds=invocation_timeout,
+    )
+    _wake_ups.put(key, time.time())
+    # the next readiness check describes the endpoint again
+    invalidate_endpoint_state(endpoint_name, region)
+    logger.info("Wake-up request sent to SageMaker endpoint %s", endpoint_name)
+    return True
+
+
+def get_endpoint_readiness(endpoint_name: str, region: Optional[str] = None) -> str:
+    """Returns ENDPOINT_READY, ENDPOINT_WAKING_UP or ENDPOINT_COLD for an async endpoint."""
+    if is_endpoint_running(endpoint_name, region):
+        return ENDPOINT_READY
+    if _wake_ups.get((region, endpoint_name)) is not None:
+        return ENDPOINT_WAKING_UP
+    return ENDPOINT_COLD
+
+
+def _split_s3_url(url: str) -> Tuple[str, str]:
+    bucket, _, key = url.removeprefix("s3://").partition("/")
+    return bucket, key
+
+
+def _head(s3_client, bucket: str, key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError as ex:
+        if ex.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def wait_inference_file(
+    output_url: str,
+    failure_url: str,
+    s3_client=None,
+    notification=None,
+    timeout: Optional[float] = None,
+):
+    """Waits for the result of an async inference request and returns its S3 object.
+
+    Completion notifications resolve the wait as soon as they arrive. Until then, or without
+    notifications, the output and failure locations are checked with HEAD requests and
+    exponential backoff.
+
+    Args:
+        output_url: S3 URL of the output of the request.
+        failure_url: S3 URL of the error of the request.
+        s3_client: S3 client. Default: shared client of the environment region
+        notification: Future that resolves with the completion notification. Default: None
+        timeout: Maximum seconds to wait. Default: None (wait until the result exists)
+
+    Returns:
+        The get_object response of the output.
+
+    Raises:
+        Exception: The endpoint failed to process the request.
+        TimeoutError: No result within the timeout.
+    """
+    s3_client = get_client("s3") if s3_client is None else s3_client
+    bucket, output_key = _split_s3_url(output_url)
+    failure_bucket, failure_key = _split_s3_url(failure_url)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    max_delay = POLL_MAX_DELAY if notification is None else NOTIFIED_POLL_MAX_DELAY
+    delay = POLL_INITIAL_DELAY
 
-def wait_inference_file(output_url, failure_url, s3_client=None):
-    s3_client = boto3.client("s3") if s3_client == None else s3_client
-    bucket = output_url.split("/")[2]
-    output_prefix = "/".join(output_url.split("/")[3:])
-    failure_prefix = "/".join(failure_url.split("/")[3:])
     while True:
-        try:
-            response = s3_client.get_object(Bucket=bucket, Key=output_prefix)
-            print(response)
-            return response
-        except ClientError as ex:
-            if ex.response['Error']['Code'] == 'NoSuchKey':
-                try:
-                    response = s3_client.get_object(Bucket=bucket, Key=failure_prefix)
-                    raise Exception(response['Body'].read().decode('utf-8'))
-                except ClientError as ex:
-                    if ex.response['Error']['Code'] == 'NoSuchKey':
-                        # Wait for file to be generated
-                        print("Waiting for file to be generated...")
-                        time.sleep(2)
-                        continue
-                    else:
-                        raise
-            else:
-                raise
-
-        except Exception as e:
-            print(e.__dict__)
-            raise
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError(f"No result of async inference at {output_url}")
+        wait = delay if remaining is None else min(delay, remaining)
+        if notification is not None:
+            try:
+                result = notification.result(timeout=wait)
+            except FutureTimeoutError:
+                result = None
+            if result is not None and result.get("invocationStatus") != STATUS_COMPLETED:
+                raise Exception(result.get("failureReason", "Async inference failed"))
+            if result is not None:
+                return s3_client.get_object(Bucket=bucket, Key=output_key)
+        else:
+            time.sleep(wait)
+
+        # fallback for missed notifications
+        if _head(s3_client, bucket, output_key):
+            return s3_client.get_object(Bucket=bucket, Key=output_key)
+        if _head(s3_client, failure_bucket, failure_key):
+            response = s3_client.get_object(Bucket=failure_bucket, Key=failure_key)
+            raise Exception(response["Body"].read().decode("utf-8"))
+        logger.debug("Waiting %.2f seconds for async inference result %s", delay, output_url)
+        delay = min(delay * 2, max_delay)
+
 
 class SagemakerAsyncEndpoint(SagemakerEndpoint):
     input_bucket: str = ""
     input_prefix: str = ""
     max_request_timeout: int = 90
+    notification_queue_url: Optional[str] = None
+    max_wait_seconds: Optional[float] = 600
     s3_client: Any
     sm_client: Any
-    
-    def __init__(self, input_bucket:str="", input_prefix:str="", max_request_timeout:int=90, **kwargs):
+
+    def __init__(
+        self,
+        input_bucket: str = "",
+        input_prefix: str = "",
+        max_request_timeout: int = 90,
+        notification_queue_url: Optional[str] = None,
+        max_wait_seconds: Optional[float] = 600,
+        **kwargs,
+    ):
         """
         Initialize a Sagemaker asynchronous endpoint connector in Langchain
         Args:
             input_bucket: S3 bucket name where input files are stored.
             input_prefix: S3 prefix where input files are stored.
             max_request_timeout: Maximum timeout for the request in seconds - also used to validate if endpoint is in cold start
+            notification_queue_url: Optional SQS queue that receives the success and error
+                notifications of the endpoint. Without it, results are polled from S3.
+            max_wait_seconds: Maximum seconds to wait for a result, including the time the
+                request is queued by the endpoint. None waits without limit.
             kwargs: Keyword arguments to pass to the SagemakerEndpoint class.
         """
         super().__init__(**kwargs)
         region = self.region_name
-        account = boto3.client("sts").get_caller_identity()["Account"]
+        account = get_current_account_id()
         self.input_bucket = f'sagemaker-{region}-{account}' if input_bucket == "" else input_bucket
         self.input_prefix = f'async-endpoint-outputs/{self.endpoint_name}' if input_prefix == "" else input_prefix
         self.max_request_timeout = max_request_timeout
-        self.s3_client = boto3.client("s3")
-        self.sm_client = boto3.client("sagemaker")
-        
+        self.notification_queue_url = notification_queue_url
+        self.max_wait_seconds = max_wait_seconds
+        self.s3_client = get_client("s3", region)
+        self.sm_client = get_client("sagemaker", region)
+
+    def _wake_up(self, content_type: str, accepts: str) -> None:
+        """Sends an empty request, so that the endpoint scales out from zero instances."""
+        wake_up_endpoint(
+            self.endpoint_name,
+            self.region_name,
+            self.input_bucket,
+            self.input_prefix,
+            content_type=content_type,
+            accepts=accepts,
+            invocation_timeout=self.max_request_timeout,
+        )
+
     def _call(
         self,
         prompt: str,
@@ -87,51 +288,63 @@ class SagemakerAsyncEndpoint(SagemakerEndpoint):
         _model_kwargs = self.model_kwargs or {}
         _model_kwargs = {**_model_kwargs, **kwargs}
         _endpoint_kwargs = self.endpoint_kwargs or {}
-        
+
         # Transform the input to match SageMaker expectations
         body = self.content_handler.transform_input(prompt, _model_kwargs)
         content_type = self.content_handler.content_type
         accepts = self.content_handler.accepts
 
-        # Verify if the endpoint is running
-        response = self.sm_client.describe_endpoint(EndpointName=self.endpoint_name)
-        endpoint_is_running = response["ProductionVariants"][0]["CurrentInstanceCount"] > 0
-
         # If the endpoint is not running, send an empty request to "wake up" the endpoint
-        test_data = b""
-        test_key = os.path.join(self.input_prefix, "test")
-        self.s3_client.put_object(Body=test_data, Bucket=self.input_bucket, Key=test_key)
-        if not endpoint_is_running:
-            self.client.invoke_endpoint_async(
-                EndpointName=self.endpoint_name,
-                InputLocation="s3://{}/{}".format(self.input_bucket, test_key),
-                ContentType=content_type,
-                Accept=accepts,
-                InvocationTimeoutSeconds=self.max_request_timeout, # timeout of 60 seconds to detect if it's not running yet
-                **_endpoint_kwargs,
+        if not is_endpoint_running(self.endpoint_name, self.region_name):
+            self._wake_up(content_type, accepts)
+            return WAKE_UP_MESSAGE
+
+        # Send request to the async endpoint
+        request_key = os.path.join(self.input_prefix, f"request-{str(uuid.uuid4())}")
+        self.s3_client.put_object(Body=body, Bucket=self.input_bucket, Key=request_key)
+        response = self.client.invoke_endpoint_async(
+            EndpointName=self.endpoint_name,
+            InputLocation="s3://{}/{}".format(self.input_bucket, request_key),
+            ContentType=content_type,
+            Accept=accepts,
+            InvocationTimeoutSeconds=self.max_request_timeout, # timeout
+            **_endpoint_kwargs,
+        )
+        inference_id = response["InferenceId"]
+        logger.info(
+            "Async inference %s sent to SageMaker endpoint %s", inference_id, self.endpoint_name
+        )
+
+        listener = None
+        notification = None
+        if self.notification_queue_url:
+            listener = get_async_inference_listener(
+                self.notification_queue_url, self.region_name
             )
-            text = "Endpoint is not running, waking it up. - It will take about 10 minutes from the first wake up attempt."
-        else:
-            print("Endpoint is running! Proceeding to inference.")
-        
-            # Send request to the async endpoint
-            request_key = os.path.join(self.input_prefix, f"request-{str(uuid.uuid4())}")
-            self.s3_client.put_object(Body=body, Bucket=self.input_bucket, Key=request_key)
-            response = self.client.invoke_endpoint_async(
-                EndpointName=self.endpoint_name,
-                InputLocation="s3://{}/{}".format(self.input_bucket, request_key),
-                ContentType=content_type,
-                Accept=accepts,
-                InvocationTimeoutSeconds=self.max_request_timeout, # timeout 
-                **_endpoint_kwargs,
+            notification = listener.register(inference_id)
+        try:
+            response = wait_inference_file(
+                response["OutputLocation"],
+                response["FailureLocation"],
+                self.s3_client,
+                notification=notification,
+                timeout=self.max_wait_seconds,
             )
+        except TimeoutError:
+            # the endpoint may have scaled in since its state was cached
+            logger.warning(
+                "Async inference %s of SageMaker endpoint %s timed out",
+                inference_id,
+                self.endpoint_name,
+            )
+            invalidate_endpoint_state(self.endpoint_name, self.region_name)
+            self._wake_up(content_type, accepts)
+            return WAKE_UP_MESSAGE
+        finally:
+            if listener is not None:
+                listener.cancel(inference_id)
+        text = self.content_handler.transform_output(response["Body"])
+        if stop is not None:
+            text = enforce_stop_tokens(text, stop)
 
-            # Read the bytes of the file from S3 in output_url with Boto3
-            output_url = response["OutputLocation"]
-            failure_url = response["FailureLocation"]
-            response = wait_inference_file(output_url, failure_url, self.s3_client)
-            text = self.content_handler.transform_output(response["Body"])
-            if stop is not None:
-                text = enforce_stop_tokens(text, stop)
-
-        return text
\ No newline at end of file
+        return text
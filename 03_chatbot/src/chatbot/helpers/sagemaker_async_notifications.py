@@ -0,0 +1,144 @@
+""" Module that contains a listener for completion notifications of SageMaker async endpoints.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+import botocore
+
+from .aws_helpers import get_client
+from .logger import TECHNICAL_LOGGER_NAME
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+RECEIVE_WAIT_SECONDS = 20
+""" Long polling time of one ReceiveMessage call. """
+RELEASE_VISIBILITY_SECONDS = 5
+""" Messages of other processes become visible again after this many seconds. """
+STALE_MESSAGE_SECONDS = 3600
+""" Messages that nobody waited for are deleted after this many seconds. """
+
+STATUS_COMPLETED = "Completed"
+
+
+def _parse_notification(body: str) -> Dict[str, Any]:
+    notification = json.loads(body)
+    # SNS wraps the message unless raw message delivery is enabled for the subscription
+    if notification.get("Type") == "Notification" and "Message" in notification:
+        notification = json.loads(notification["Message"])
+    return notification
+
+
+class AsyncInferenceListener:
+    """Receives the SNS notifications of a SageMaker async endpoint from an SQS queue.
+
+    The success and error topics of the endpoint's AsyncInferenceConfig need to be
+    subscribed to the queue. Requests register their inference ID and wait for the
+    notification instead of polling S3. A background thread long-polls the queue while
+    at least one request is waiting, so several requests can be in flight at once.
+
+    Messages for inference IDs that this process does not wait for are released to
+    other processes that share the queue and deleted once they are stale.
+
+    Args:
+        queue_url: URL of the SQS queue.
+        region: AWS region of the queue.
+
+    Example:
+        ```python
+        listener = get_async_inference_listener(queue_url, "eu-central-1")
+        notification = listener.register(response["InferenceId"])
+        result = notification.result(timeout=300)
+        ```
+    """
+
+    def __init__(self, queue_url: str, region: Optional[str] = None):
+        self.queue_url = queue_url
+        self.region = region
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, inference_id: str) -> Future:
+        """Returns a future that resolves with the notification for an inference ID.
+
+        The result is the notification dict with "invocationStatus" and
+        "responseParameters". Call cancel when the caller stops waiting.
+        """
+        future = Future()
+        with self._lock:
+            self._pending[inference_id] = future
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._listen, name="sagemaker-async-listener", daemon=True
+                )
+                self._thread.start()
+        return future
+
+    def cancel(self, inference_id: str) -> None:
+        """Stops waiting for an inference ID."""
+        with self._lock:
+            self._pending.pop(inference_id, None)
+
+    def _listen(self) -> None:
+        sqs_client = get_client("sqs", self.region)
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+            try:
+                messages = sqs_client.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=10,
+                    WaitTimeSeconds=RECEIVE_WAIT_SECONDS,
+                    AttributeNames=["SentTimestamp"],
+                ).get("Messages", [])
+            except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as err:
+                # waiting requests fall back to polling S3
+                logger.warning("Receiving async inference notifications failed.\n%s", err)
+                time.sleep(RECEIVE_WAIT_SECONDS)
+                continue
+            for message in messages:
+                try:
+                    self._handle(sqs_client, message)
+                except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as err:
+                    logger.warning("Handling async inference notification failed.\n%s", err)
+
+    def _handle(self, sqs_client, message: Dict[str, Any]) -> None:
+        try:
+            notification = _parse_notification(message["Body"])
+            inference_id = notification.get("inferenceId")
+        except (ValueError, TypeError, AttributeError):
+            notification, inference_id = None, None
+
+        with self._lock:
+            future = self._pending.pop(inference_id, None) if inference_id else None
+        sent_at = int(message.get("Attributes", {}).get("SentTimestamp", 0)) / 1000
+        if future is not None or notification is None or time.time() - sent_at > STALE_MESSAGE_SECONDS:
+            if future is not None:
+                future.set_result(notification)
+            sqs_client.delete_message(
+                QueueUrl=self.queue_url, ReceiptHandle=message["ReceiptHandle"]
+            )
+        else:
+            # another process that shares the queue may wait for it
+            sqs_client.change_message_visibility(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=message["ReceiptHandle"],
+                VisibilityTimeout=RELEASE_VISIBILITY_SECONDS,
+            )
+
+
+_listeners: TTLCache = TTLCache()
+""" Listeners per (queue URL, region), shared by all sessions. """
+
+
+def get_async_inference_listener(queue_url: str, region: Optional[str] = None) -> AsyncInferenceListener:
+    """Returns the process-wide listener for an SQS queue."""
+    key: Tuple[str, Optional[str]] = (queue_url, region)
+    return _listeners.get_or_create(key, lambda: AsyncInferenceListener(queue_url, region))
@@ -0,0 +1,143 @@
+"""Wrapper around Sagemaker InvokeEndpointWithResponseStream API for Text Generation Inference containers."""
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.llms.sagemaker_endpoint import SagemakerEndpoint
+from langchain_core.outputs import GenerationChunk
+
+SSE_DATA_PREFIX = b"data:"
+
+
+def iter_sse_data(event_stream: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yields the JSON data of the server-sent events in a SageMaker response stream.
+
+    Payload parts are not aligned with events, so bytes are buffered until a line is
+    complete.
+    """
+    buffer = b""
+    for event in event_stream:
+        if "PayloadPart" not in event:
+            continue
+        buffer += event["PayloadPart"]["Bytes"]
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.startswith(SSE_DATA_PREFIX):
+                yield json.loads(line[len(SSE_DATA_PREFIX) :])
+    if buffer.startswith(SSE_DATA_PREFIX):
+        yield json.loads(buffer[len(SSE_DATA_PREFIX) :])
+
+
+def iter_tgi_tokens(event_stream: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yields the text of the generated tokens in a Text Generation Inference response stream."""
+    for data in iter_sse_data(event_stream):
+        if "error" in data:
+            raise ValueError(f"Error raised by inference endpoint: {data['error']}")
+        token = data.get("token") or {}
+        if token.get("special") or not token.get("text"):
+            continue
+        yield token["text"]
+
+
+def strip_stop_words(tokens: Iterable[str], stop_words: List[str]) -> Iterator[str]:
+    """Yields the text of the tokens until the first stop word, without the stop word.
+
+    Text that could be the beginning of a stop word is held back until the next token
+    decides it.
+    """
+    stop_words = [stop_word for stop_word in stop_words if stop_word]
+    pending = ""
+    for token in tokens:
+        pending += token
+        stop_positions = [
+            pending.find(stop_word) for stop_word in stop_words if stop_word in pending
+        ]
+        if stop_positions:
+            if min(stop_positions) > 0:
+                yield pending[: min(stop_positions)]
+            return
+        held_back = max(
+            (
+                length
+                for stop_word in stop_words
+                for length in range(1, len(stop_word))
+                if pending.endswith(stop_word[:length])
+            ),
+            default=0,
+        )
+        if len(pending) > held_back:
+            yield pending[: len(pending) - held_back]
+            pending = pending[len(pending) - held_back :]
+    if pending:
+        yield pending
+
+
+class SagemakerStreamingEndpoint(SagemakerEndpoint):
+    """SageMaker real-time endpoint that streams the tokens of a Text Generation Inference container.
+
+    The content handler needs to create the JSON payload of Text Generation Inference.
+    Tokens are passed to the on_llm_new_token callbacks as soon as they arrive, so the
+    first words show up after the prefill instead of after the full generation.
+    The stop words of the content handler are removed like in its transform_output.
+
+    Example:
+        ```python
+        llm = SagemakerStreamingEndpoint(
+            client=get_client("sagemaker-runtime", "eu-central-1"),
+            endpoint_name="falcon-40b",
+            content_handler=content_handler,
+            callbacks=[stream_handler],
+        )
+        ```
+    """
+
+    streaming: bool = True
+
+    def _get_stream_body(self, prompt: str, stop: Optional[List[str]], model_kwargs: Dict) -> bytes:
+        body = json.loads(self.content_handler.transform_input(prompt, model_kwargs))
+        body["stream"] = True
+        if stop:
+            parameters = body.setdefault("parameters", {})
+            parameters["stop"] = list(parameters.get("stop", [])) + list(stop)
+        return json.dumps(body).encode("utf-8")
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        _model_kwargs = {**(self.model_kwargs or {}), **kwargs}
+        _endpoint_kwargs = self.endpoint_kwargs or {}
+
+        try:
+            response = self.client.invoke_endpoint_with_response_stream(
+                EndpointName=self.endpoint_name,
+                Body=self._get_stream_body(prompt, stop, _model_kwargs),
+                ContentType=self.content_handler.content_type,
+                Accept=self.content_handler.accepts,
+                **_endpoint_kwargs,
+            )
+        except Exception as e:
+            raise ValueError(f"Error raised by inference endpoint: {e}")
+
+        stop_words = list(getattr(self.content_handler, "stop_words", [])) + list(stop or [])
+        for text in strip_stop_words(iter_tgi_tokens(response["Body"]), stop_words):
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        if not self.streaming:
+            return super()._call(prompt, stop, run_manager, **kwargs)
+        return "".join(
+            chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs)
+        )
@@ -0,0 +1,114 @@
+""" Module that contains warm-up and keep-warm helpers for scale-to-zero SageMaker async endpoints.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import botocore
+
+from .environment_variables import ChatbotEnvironment, ChatbotEnvironmentVariables
+from .logger import TECHNICAL_LOGGER_NAME
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+ACTIVE_SESSION_SECONDS = 1800
+""" Endpoints are kept warm while a session used them within this many seconds. """
+
+
+def _parse_warmup_hours(value: str) -> Tuple[int, int]:
+    start, _, end = value.partition("-")
+    return int(start), int(end)
+
+
+def is_within_warmup_hours(now: Optional[datetime] = None) -> bool:
+    """Returns whether the current time is within SAGEMAKER_WARMUP_HOURS.
+
+    SAGEMAKER_WARMUP_HOURS is a range of hours like "7-19" in the local time of the
+    chatbot, Monday to Friday. Without it, endpoints are not warmed up.
+    """
+    warmup_hours = ChatbotEnvironment().get_env_variable(
+        ChatbotEnvironmentVariables.SageMakerWarmupHours
+    )
+    if not warmup_hours:
+        return False
+    start_hour, end_hour = _parse_warmup_hours(warmup_hours)
+    now = now or datetime.now()
+    return now.weekday() < 5 and start_hour <= now.hour < end_hour
+
+
+class KeepWarm:
+    """Sends heartbeats to async endpoints that sessions used recently, so they do not scale in.
+
+    Sessions call touch for the endpoint of their selected model on every run. A background
+    thread calls the heartbeat of every endpoint touched within ACTIVE_SESSION_SECONDS
+    once per interval and stops when no session is active.
+
+    Args:
+        interval: Seconds between two heartbeats of an endpoint.
+
+    Example:
+        ```python
+        keep_warm = get_keep_warm()
+        if keep_warm is not None:
+            keep_warm.touch(("eu-central-1", "falcon"), lambda: wake_up_endpoint(..., force=True))
+        ```
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._endpoints: Dict[Hashable, Tuple[float, Callable[[], object]]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(self, key: Hashable, heartbeat: Callable[[], object]) -> None:
+        """Marks an endpoint as used by an active session."""
+        with self._lock:
+            self._endpoints[key] = (time.monotonic(), heartbeat)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="sagemaker-keep-warm", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                for key in [
+                    key
+                    for key, (last_used, _) in self._endpoints.items()
+                    if now - last_used > ACTIVE_SESSION_SECONDS
+                ]:
+                    del self._endpoints[key]
+                if not self._endpoints:
+                    self._thread = None
+                    return
+                heartbeats = [heartbeat for _, heartbeat in self._endpoints.values()]
+            for heartbeat in heartbeats:
+                try:
+                    heartbeat()
+                except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as err:
+                    logger.warning("Keep-warm heartbeat failed.\n%s", err)
+
+
+_keep_warm: Optional[KeepWarm] = None
+_keep_warm_lock = threading.Lock()
+
+
+def get_keep_warm() -> Optional[KeepWarm]:
+    """Returns the process-wide keep-warm heartbeat or None if it is disabled."""
+    global _keep_warm
+    interval = float(
+        ChatbotEnvironment().get_env_variable(
+            ChatbotEnvironmentVariables.SageMakerKeepWarmIntervalSeconds
+        )
+    )
+    if interval <= 0:
+        return None
+    with _keep_warm_lock:
+        if _keep_warm is None:
+            _keep_warm = KeepWarm(interval)
+        return _keep_warm
@@ -0,0 +1,149 @@
+""" Module that contains a process-wide cache for AWS Secrets Manager secrets.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+import botocore
+
+from .aws_helpers import get_client
+from .environment_variables import ChatbotEnvironment, ChatbotEnvironmentVariables
+from .logger import TECHNICAL_LOGGER_NAME
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+DEFAULT_REFRESH_AHEAD = 0.8
+""" Fraction of the TTL after which a secret is read again in the background. """
+
+
+def _default_client_factory(region: Optional[str]):
+    return get_client("secretsmanager", region)
+
+
+class SecretsCache:
+    """Caches secret strings of AWS Secrets Manager, so that all sessions and catalogs share them.
+
+    A secret is read once per TTL. Once an entry is older than the refresh-ahead fraction
+    of the TTL, the next request still returns the cached value and reads the secret again
+    in a background thread, so that callers only wait for Secrets Manager on a cold cache.
+    Callers invalidate a secret when the credentials it contains were rejected, e.g. after
+    the secret rotated.
+
+    Args:
+        ttl: Seconds that a secret is reused. Default: 3600
+        refresh_ahead: Fraction of the TTL after which a secret is refreshed in the
+            background. Default: 0.8
+        client_factory: Creates a Secrets Manager client for a region.
+            Default: shared boto3 client for the region
+
+    Example:
+        ```python
+        secrets = SecretsCache(ttl=3600)
+        secret_string = secrets.get_secret("opensearch-credentials", "eu-central-1")
+        ...
+        secrets.invalidate("opensearch-credentials", "eu-central-1")  # credentials rejected
+        ```
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        refresh_ahead: float = DEFAULT_REFRESH_AHEAD,
+        client_factory: Callable[[Optional[str]], object] = _default_client_factory,
+    ):
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.client_factory = client_factory
+        self._secrets = TTLCache(ttl=ttl if ttl > 0 else None)
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._refreshing: Set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def get_secret(self, secret_id: str, region: Optional[str] = None) -> str:
+        """Returns the secret string of a secret.
+
+        Args:
+            secret_id: AWS Secrets Manager secret ID or ARN.
+            region: AWS region of the secret. Default: region of the environment
+
+        Returns:
+            The SecretString of the current version of the secret.
+        """
+        key = (secret_id, region)
+        if self.ttl <= 0:
+            return self._read(key)
+
+        entry = self._secrets.get_entry(key)
+        if entry is None:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            # sessions and catalogs that need the same secret wait for a single call
+            with key_lock:
+                entry = self._secrets.get_entry(key)
+                if entry is None:
+                    secret_string = self._read(key)
+                    self._secrets.put(key, secret_string)
+                    return secret_string
+        created_at, secret_string = entry
+        if self._is_due_for_refresh(created_at):
+            self._refresh_in_background(key)
+        return secret_string
+
+    def invalidate(self, secret_id: str, region: Optional[str] = None) -> None:
+        """Forgets a secret, so that the next request reads its current version."""
+        self._secrets.invalidate((secret_id, region))
+
+    def clear(self) -> None:
+        """Forgets all secrets."""
+        self._secrets.clear()
+
+    def _is_due_for_refresh(self, created_at: float) -> bool:
+        # TTLCache entries are created with time.monotonic
+        return time.monotonic() - created_at >= self.ttl * self.refresh_ahead
+
+    def _read(self, key: Tuple[str, Optional[str]]) -> str:
+        secret_id, region = key
+        response = self.client_factory(region).get_secret_value(SecretId=secret_id)
+        return response["SecretString"]
+
+    def _refresh_in_background(self, key: Tuple[str, Optional[str]]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._secrets.put(key, self._read(key))
+            except (
+                botocore.exceptions.BotoCoreError,
+                botocore.exceptions.ClientError,
+            ) as err:
+                # the cached value stays valid until the TTL expires
+                logger.warning("Refreshing secret %s failed.\n%s", key[0], err)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="secret-refresh", daemon=True).start()
+
+
+_secrets_cache: Optional[SecretsCache] = None
+_secrets_cache_lock = threading.Lock()
+
+
+def get_secrets_cache() -> SecretsCache:
+    """Returns the process-wide secrets cache."""
+    global _secrets_cache
+    with _secrets_cache_lock:
+        if _secrets_cache is None:
+            _secrets_cache = SecretsCache(
+                ttl=float(
+                    ChatbotEnvironment().get_env_variable(
+                        ChatbotEnvironmentVariables.SecretsCacheTTLSeconds
+                    )
+                )
+            )
+        return _secrets_cache
@@ -0,0 +1,111 @@
+""" Module that contains a thread-safe in-memory cache with optional TTL and LRU eviction.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Process-wide key value cache that is safe to share between Streamlit sessions.
+
+    Args:
+        max_size: Maximum number of entries. The least recently used entry is evicted
+            when the cache is full. Default: None (unbounded)
+        ttl: Time to live of an entry in seconds. Default: None (entries do not expire)
+
+    Example:
+        ```python
+        cache = TTLCache(max_size=100, ttl=300)
+        retriever = cache.get_or_create(("endpoint", "index", 3), create_retriever)
+        ```
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[K, threading.Lock] = {}
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at >= self.ttl
+
+    def get_entry(self, key: K) -> Optional[Tuple[float, V]]:
+        """Returns the creation time and value stored for a key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry[0], time.monotonic()):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Returns the value stored for a key, or the default if it is missing or expired."""
+        entry = self.get_entry(key)
+        return default if entry is None else entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        """Stores a value and evicts the least recently used entries if the cache is full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while self.max_size is not None and len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """Returns the cached value for a key and creates it with the factory if needed.
+
+        The factory runs while holding a lock of the key, so that concurrent sessions
+        do not create the same expensive object twice while other keys stay available.
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            return entry[1]
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.get_entry(key)
+            if entry is not None:
+                return entry[1]
+            try:
+                value = factory()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    # sessions that wait for the lock find the value in the cache
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+            return value
+
+    def invalidate(self, key: K) -> None:
+        """Removes a key from the cache if it exists."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[K], bool]) -> int:
+        """Removes all keys that match the predicate.
+
+        Returns:
+            The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
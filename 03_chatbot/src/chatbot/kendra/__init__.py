@@ -0,0 +1,8 @@
+""" This module contains integration with Amazon Kendra."""
+from .kendra_index_retriever import (
+    KendraIndexRetriever,
+    KendraIndexQuery,
+    clear_kendra_cache,
+    get_kendra_client,
+    prune_kendra_cache,
+)
@@ -0,0 +1,163 @@
+""" Module that contains a retriever that searches one or more Amazon Kendra indices.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from chatbot.helpers.aws_helpers import get_client
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.helpers.ttl_cache import TTLCache
+from langchain.schema import BaseRetriever, Document
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+KENDRA_MAX_PAGE_SIZE = 100
+""" Maximum number of passages the Retrieve API returns per page. """
+
+KENDRA_RESULT_CACHE_SIZE = 1024
+KENDRA_MAX_PARALLEL_QUERIES = 8
+
+_SCORE_CONFIDENCE_ORDER = {"VERY_HIGH": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+_results: TTLCache = TTLCache(max_size=KENDRA_RESULT_CACHE_SIZE)
+""" Retrieve results per (region, index, query, filter, page size) and creation time. """
+
+_executor = ThreadPoolExecutor(
+    max_workers=KENDRA_MAX_PARALLEL_QUERIES, thread_name_prefix="kendra"
+)
+
+
+def get_kendra_client(region: str):
+    """Returns the process-wide Kendra client of a region."""
+    return get_client("kendra", region)
+
+
+def clear_kendra_cache():
+    """Drops all cached Kendra results."""
+    _results.clear()
+
+
+def prune_kendra_cache(index_ids: Iterable[Tuple[str, str]]) -> None:
+    """Drops the cached Kendra results of indices that are not in use anymore.
+
+    Args:
+        index_ids: Regions and IDs of the indices that are still in use.
+    """
+    used = set(index_ids)
+    _results.invalidate_where(lambda key: (key[0], key[1].index_id) not in used)
+
+
+@dataclass(frozen=True)
+class KendraIndexQuery:
+    """Kendra index to query with an optional attribute filter."""
+
+    index_id: str
+    attribute_filter: Optional[str] = None
+    """ Attribute filter serialized as JSON, so that queries are hashable cache keys. """
+
+
+def _to_document(item: Dict[str, Any]) -> Document:
+    # same layout as the LangChain AmazonKendraRetriever uses for Retrieve results
+    title = item.get("DocumentTitle", "")
+    excerpt = item.get("Content", "")
+    return Document(
+        page_content=f"Document Title: {title}\nDocument Excerpt: \n{excerpt}\n",
+        metadata={
+            "source": item.get("DocumentURI"),
+            "title": title,
+            "excerpt": excerpt,
+            "document_attributes": {
+                attribute["Key"]: next(iter(attribute["Value"].values()), None)
+                for attribute in item.get("DocumentAttributes", [])
+            },
+        },
+    )
+
+
+class KendraIndexRetriever(BaseRetriever):
+    """Retriever to search Amazon Kendra indices with the passage-level Retrieve API.
+
+    Several indices are queried in parallel and their passages are merged by score
+    confidence. Results are cached for a short time, so repeated questions do not
+    query Kendra again.
+
+    Args:
+        region: AWS region of the indices.
+        queries: Indices to query with their attribute filters.
+        top_k: Number of passages to return. Default: 3
+        cache_ttl: Seconds that results are reused. 0 disables the cache. Default: 300
+
+    Example:
+        ```python
+        retriever = KendraIndexRetriever(
+            region="eu-west-1",
+            queries=[KendraIndexQuery("index-id-1"), KendraIndexQuery("index-id-2")],
+            top_k=5,
+        )
+        ```
+    """
+
+    region: str
+    queries: List[KendraIndexQuery]
+    top_k: int = 3
+    cache_ttl: float = 300
+
+    def _retrieve(self, index_query: KendraIndexQuery, query: str) -> List[Dict[str, Any]]:
+        page_size = min(self.top_k, KENDRA_MAX_PAGE_SIZE)
+        cache_key = (self.region, index_query, query, page_size)
+        if self.cache_ttl > 0:
+            entry = _results.get_entry(cache_key)
+            if entry is not None and time.monotonic() - entry[0] < self.cache_ttl:
+                return entry[1]
+
+        kwargs = {"IndexId": index_query.index_id, "QueryText": query.strip()[:1000]}
+        if index_query.attribute_filter:
+            kwargs["AttributeFilter"] = json.loads(index_query.attribute_filter)
+        response = get_kendra_client(self.region).retrieve(PageSize=page_size, **kwargs)
+        items = response.get("ResultItems", [])
+        if self.cache_ttl > 0:
+            _results.put(cache_key, items)
+        return items
+
+    def get_relevant_documents(self, query: str) -> List[Document]:
+        """Run search on the Kendra indices and get top k passages.
+
+        Args:
+            query: Query string.
+
+        Returns:
+            list of passages from the indices that relate to the query.
+        """
+        start_time = time.perf_counter()
+        if len(self.queries) == 1:
+            item_lists = [self._retrieve(self.queries[0], query)]
+        else:
+            futures = [
+                _executor.submit(self._retrieve, index_query, query)
+                for index_query in self.queries
+            ]
+            item_lists = [future.result() for future in futures]
+
+        ranked: List[Tuple[int, int, Dict[str, Any]]] = []
+        for items in item_lists:
+            for rank, item in enumerate(items):
+                confidence = item.get("ScoreAttributes", {}).get("ScoreConfidence")
+                ranked.append((_SCORE_CONFIDENCE_ORDER.get(confidence, 4), rank, item))
+        # interleave indices: higher confidence first, then better rank within its index
+        ranked.sort(key=lambda entry: (entry[0], entry[1]))
+
+        docs = [_to_document(item) for _, _, item in ranked[: self.top_k]]
+        logger.info(
+            "Kendra retrieve on %s indices returned %s passages in %.3f seconds",
+            len(self.queries),
+            len(docs),
+            time.perf_counter() - start_time,
+        )
+        return docs
+
+    async def aget_relevant_documents(self, query: str) -> List[Document]:
+        """See base class."""
+        return await super().aget_relevant_documents(query)
@@ -1,21 +1,30 @@
 """ An LLM app represents the logic to interact with a LLM."""
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import final
+from typing import Any, Dict, Hashable, List, Optional, final
 import warnings
 import pandas as pd
 
 import langchain
 from langchain.callbacks.base import Callbacks
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForChainRun,
+    CallbackManagerForChainRun,
+)
 from langchain.chains import ConversationalRetrievalChain, ConversationChain
 from langchain.chains.base import Chain
 from langchain.llms.base import LLM
 from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import BasePromptTemplate
-from langchain.schema import BaseChatMessageHistory, BaseMemory, BaseRetriever
+from langchain.schema import BaseChatMessageHistory, BaseMemory, BaseRetriever, Document
 from langchain.agents import Tool, AgentType, initialize_agent
 from langchain.sql_database import SQLDatabase
 from langchain.agents.agent_toolkits import SQLDatabaseToolkit
+from langchain.embeddings.base import Embeddings
+
+from chatbot.llm_cache import is_cacheable_response
+from chatbot.retrieval import ContextPacker
+from chatbot.semantic_cache import SemanticCache
 
 GLOBAL_LOGGER_NAME = "Genie"
 
@@ -124,6 +133,41 @@ class BaseLLMApp(LLMApp):
 # RAG CHAINS
 # =========================================================
 
+class ContextPackingConversationalRetrievalChain(ConversationalRetrievalChain):
+    """Conversational retrieval chain that packs the retrieved documents into a token
+    budget instead of sending them to the LLM as they are."""
+
+    context_packer: Optional[ContextPacker] = None
+    """Packs the retrieved documents, if None documents are not changed."""
+
+    def _pack(self, question: str, docs: List[Document]) -> List[Document]:
+        if self.context_packer is None:
+            return docs
+        reserved_tokens = self.context_packer.count_tokens(question)
+        return self.context_packer.pack(docs, reserved_tokens=reserved_tokens)
+
+    def _get_docs(
+        self,
+        question: str,
+        inputs: Dict[str, Any],
+        *,
+        run_manager: CallbackManagerForChainRun,
+    ) -> List[Document]:
+        """See base class."""
+        docs = super()._get_docs(question, inputs, run_manager=run_manager)
+        return self._pack(question, docs)
+
+    async def _aget_docs(
+        self,
+        question: str,
+        inputs: Dict[str, Any],
+        *,
+        run_manager: AsyncCallbackManagerForChainRun,
+    ) -> List[Document]:
+        """See base class."""
+        docs = await super()._aget_docs(question, inputs, run_manager=run_manager)
+        return self._pack(question, docs)
+
 
 
 
@@ -137,9 +181,57 @@ class RAGApp(LLMApp):
 
     retriever: BaseRetriever
 
+    semantic_cache: Optional[SemanticCache] = None
+    """Optional cache that returns answers of semantically similar questions."""
+    semantic_cache_scope: Optional[Hashable] = None
+    """Scope of the retriever, model and prompt under which answers are cached."""
+    query_embeddings: Optional[Embeddings] = None
+    """Embeddings used to look up questions in the semantic cache."""
+    context_packer: Optional[ContextPacker] = None
+    """Fits the retrieved documents into the token budget of the model."""
+
+    def run_llm(
+        self, query: str, message_history: BaseChatMessageHistory, callbacks=None
+    ):
+        """See base class.
+
+        The semantic cache is only used for the first question of a conversation,
+        because follow-up questions depend on the chat history.
+        """
+        if (
+            self.semantic_cache is None
+            or self.semantic_cache_scope is None
+            or self.query_embeddings is None
+            or "#graph" in query
+            or len(message_history.messages) > 0
+        ):
+            return super().run_llm(query, message_history, callbacks)
+
+        embedding = self.query_embeddings.embed_query(query)
+        cached_response = self.semantic_cache.get(self.semantic_cache_scope, embedding)
+        if cached_response is not None:
+            message_history.add_user_message(query)
+            message_history.add_ai_message(cached_response["answer"])
+            return {**cached_response, "question": query}
+
+        response = super().run_llm(query, message_history, callbacks)
+        if not is_cacheable_response(response["answer"]):
+            # e.g. the wake-up message of a cold endpoint, the next question asks again
+            return response
+        self.semantic_cache.put(
+            self.semantic_cache_scope,
+            query,
+            embedding,
+            {
+                "answer": response["answer"],
+                "source_documents": response.get("source_documents", []),
+            },
+        )
+        return response
+
     def get_chain(self, memory, callbacks=None):
         """See base class."""
-        return ConversationalRetrievalChain.from_llm(
+        return ContextPackingConversationalRetrievalChain.from_llm(
             return_generated_question=True,
             llm=self.llm,
             retriever=self.retriever,
@@ -149,6 +241,7 @@ class RAGApp(LLMApp):
             return_source_documents=True,
             combine_docs_chain_kwargs={"prompt": self.prompt},
             callbacks=callbacks,
+            context_packer=self.context_packer,
         )
 
     def get_input(self, input_text: str):
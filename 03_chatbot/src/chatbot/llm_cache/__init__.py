@@ -0,0 +1,8 @@
+""" This module contains exact-match caches for LLM responses."""
+from .llm_cache import (
+    InMemoryLLMCache,
+    SQLiteLLMCache,
+    configure_llm_cache,
+    is_cacheable_response,
+    is_deterministic,
+)
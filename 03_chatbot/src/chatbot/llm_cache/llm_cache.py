@@ -0,0 +1,223 @@
+""" Module that contains exact-match caches for LLM responses that plug in under LangChain.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.helpers.sagemaker_async_endpoint import WAKE_UP_MESSAGE
+from chatbot.helpers.ttl_cache import TTLCache
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+LLM_CACHE_BACKEND_NONE = "none"
+LLM_CACHE_BACKEND_MEMORY = "memory"
+LLM_CACHE_BACKEND_SQLITE = "sqlite"
+
+TEMPERATURE_KEYS = ("temperature",)
+""" Model kwargs that hold the sampling temperature of the supported providers. """
+
+UNCACHEABLE_RESPONSES = frozenset({WAKE_UP_MESSAGE})
+""" Placeholder responses of models that did not generate an answer, e.g. cold endpoints. """
+
+_OBJECT_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def _cache_key(prompt: str, llm_string: str) -> str:
+    # LangChain serializes clients and other objects with their repr, which contains the
+    # memory address. Without it, keys stay the same across processes.
+    llm_string = _OBJECT_ADDRESS.sub("", llm_string)
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+def is_cacheable_response(text: str) -> bool:
+    """Returns whether a response was generated by the model and may be cached."""
+    return text.strip() not in UNCACHEABLE_RESPONSES
+
+
+def _is_cacheable(return_val: RETURN_VAL_TYPE) -> bool:
+    return all(is_cacheable_response(generation.text) for generation in return_val)
+
+
+def is_deterministic(model_kwargs: Optional[Dict[str, Any]]) -> bool:
+    """Returns whether model kwargs select greedy decoding, so that responses can be cached.
+
+    Args:
+        model_kwargs: Inference parameters of the model.
+
+    Returns:
+        True if the temperature is set to 0, False if it is higher or not set at all.
+    """
+    for key in TEMPERATURE_KEYS:
+        if model_kwargs and key in model_kwargs:
+            return model_kwargs[key] == 0
+    return False
+
+
+class InMemoryLLMCache(BaseCache):
+    """Process-wide LLM response cache with LRU eviction and TTL.
+
+    Responses are keyed by the rendered prompt and the LLM string, which LangChain builds
+    from the model type, model ID, model kwargs and stop sequences.
+
+    Args:
+        max_entries: Maximum number of cached responses. Default: 1000
+        ttl: Time to live of a response in seconds. Default: None (responses do not expire)
+
+    Example:
+        ```python
+        set_llm_cache(InMemoryLLMCache(max_entries=1000, ttl=86400))
+        ```
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = None):
+        self._responses = TTLCache(max_size=max_entries, ttl=ttl)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """See base class."""
+        return self._responses.get(_cache_key(prompt, llm_string))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """See base class."""
+        if not _is_cacheable(return_val):
+            return
+        self._responses.put(_cache_key(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        """See base class."""
+        self._responses.clear()
+
+
+class SQLiteLLMCache(BaseCache):
+    """LLM response cache in a SQLite file that outlives the process and is shared by workers.
+
+    Entries expire after the TTL. Once the cache holds more than max_entries responses,
+    the least recently used ones are deleted.
+
+    Args:
+        database_path: Path of the SQLite database file. It is created if needed.
+        max_entries: Maximum number of cached responses. Default: 1000
+        ttl: Time to live of a response in seconds. Default: None (responses do not expire)
+
+    Example:
+        ```python
+        set_llm_cache(SQLiteLLMCache("/var/cache/genie/llm_cache.sqlite", ttl=86400))
+        ```
+    """
+
+    def __init__(
+        self, database_path: str, max_entries: int = 1000, ttl: Optional[float] = None
+    ):
+        self.database_path = database_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # one connection shared by all sessions, serialized by the lock
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, generations TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)"
+            )
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """See base class."""
+        key = _cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT created_at, generations FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            created_at, generations = row
+            if self.ttl is not None and now - created_at >= self.ttl:
+                self._connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._connection.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        try:
+            return [loads(generation) for generation in json.loads(generations)]
+        except Exception:  # written by another LangChain version, treat as a miss
+            logger.warning("Ignoring LLM cache entry that cannot be deserialized")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """See base class."""
+        if not _is_cacheable(return_val):
+            return
+        key = _cache_key(prompt, llm_string)
+        generations = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, created_at, accessed_at, generations) "
+                "VALUES (?, ?, ?, ?)",
+                (key, now, now, generations),
+            )
+            self._connection.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        """See base class."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM llm_cache")
+
+
+_configure_lock = threading.Lock()
+
+
+def configure_llm_cache() -> Optional[BaseCache]:
+    """Installs the LLM response cache selected by LLM_CACHE_BACKEND as LangChain's global cache.
+
+    Calling it again keeps the installed cache, so it is safe to call on every Streamlit run.
+    Models only use the cache when their cache field is not False, see is_deterministic.
+
+    Returns:
+        The installed cache or None if the cache is disabled.
+    """
+    with _configure_lock:
+        llm_cache = get_llm_cache()
+        if llm_cache is not None:
+            return llm_cache
+        env = ChatbotEnvironment()
+        backend = env.get_env_variable(ChatbotEnvironmentVariables.LLMCacheBackend).lower()
+        if backend == LLM_CACHE_BACKEND_NONE:
+            return None
+        ttl = float(env.get_env_variable(ChatbotEnvironmentVariables.LLMCacheTTLSeconds))
+        max_entries = int(env.get_env_variable(ChatbotEnvironmentVariables.LLMCacheMaxEntries))
+        if backend == LLM_CACHE_BACKEND_MEMORY:
+            llm_cache = InMemoryLLMCache(max_entries=max_entries, ttl=ttl if ttl > 0 else None)
+        elif backend == LLM_CACHE_BACKEND_SQLITE:
+            llm_cache = SQLiteLLMCache(
+                env.get_env_variable(ChatbotEnvironmentVariables.LLMCachePath),
+                max_entries=max_entries,
+                ttl=ttl if ttl > 0 else None,
+            )
+        else:
+            raise ValueError(f"Unknown LLM cache backend: {backend}")
+        set_llm_cache(llm_cache)
+        logger.info("LLM response cache %s enabled", backend)
+        return llm_cache
@@ -0,0 +1,9 @@
+""" This module contains a retriever for vector indices stored on local disk."""
+from .local_vector_index import (
+    LocalVectorIndex,
+    find_local_vector_indices,
+    get_local_vector_index,
+    read_manifest,
+)
+from .local_vector_store_retriever import LocalVectorStoreRetriever
+from .s3_sync import sync_local_vector_stores
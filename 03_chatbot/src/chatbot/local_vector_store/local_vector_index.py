@@ -0,0 +1,208 @@
+""" Module that contains a memory-mapped vector index stored on local disk.
+
+An index is a directory written by the ingestion pipeline with the files:
+    manifest.json: format version, friendly name, embedding endpoint and vector dimensions.
+    vectors.npy: float32 matrix with one L2-normalized embedding per document.
+    documents.jsonl: one JSON object with "text" and "metadata" per document.
+    hnsw.bin: optional prebuilt HNSW graph for approximate nearest neighbor search.
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.helpers.ttl_cache import TTLCache
+from langchain.schema import Document
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+HNSW_FILE = "hnsw.bin"
+
+HNSW_EF_SEARCH = 64
+""" Size of the candidate list of HNSW queries, higher values trade latency for recall. """
+
+_indices: TTLCache = TTLCache(max_size=8)
+""" Loaded indices per (resolved path, ANN flag, manifest modification time), shared by all sessions. """
+
+_current_indices: TTLCache = TTLCache(max_size=8)
+""" Last loaded index per (path, ANN flag), used while a store cannot be read. """
+
+
+class LocalVectorIndex:
+    """Vector index on local disk with exact or approximate nearest neighbor search.
+
+    Vectors are memory-mapped, so the operating system page cache is shared between
+    processes and only touched pages are read. Exact search is a single matrix-vector
+    product with NumPy. Approximate search uses an HNSW graph from the optional
+    `hnswlib` package.
+
+    Args:
+        path: Directory of the index.
+        manifest: Parsed manifest.json.
+        vectors: Matrix of L2-normalized document embeddings.
+        documents: Text and metadata per document.
+        ann_index: Optional hnswlib index over the vectors.
+
+    Example:
+        ```python
+        index = LocalVectorIndex.load("/data/vector_stores/handbook")
+        hits = index.search(query_embedding, k=3)
+        ```
+    """
+
+    def __init__(
+        self,
+        path: str,
+        manifest: Dict[str, Any],
+        vectors: np.ndarray,
+        documents: List[Dict[str, Any]],
+        ann_index: Any = None,
+    ):
+        self.path = path
+        self.manifest = manifest
+        self.vectors = vectors
+        self.documents = documents
+        self.ann_index = ann_index
+
+    @staticmethod
+    def load(path: str, use_ann: bool = False) -> "LocalVectorIndex":
+        """Loads an index from disk.
+
+        Args:
+            path: Directory of the index.
+            use_ann: Whether to search with HNSW. Falls back to exact search if
+                `hnswlib` is not installed.
+        """
+        start_time = time.time()
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported local vector store format {manifest.get('format_version')} in {path}."
+            )
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        with open(os.path.join(path, DOCUMENTS_FILE), encoding="utf-8") as documents_file:
+            documents = [json.loads(line) for line in documents_file]
+        if len(documents) != len(vectors):
+            raise ValueError(
+                f"Local vector store {path} has {len(vectors)} vectors but {len(documents)} documents."
+            )
+        ann_index = LocalVectorIndex._load_ann_index(path, vectors) if use_ann else None
+        logger.info(
+            "Loaded local vector store %s with %s documents in %s seconds",
+            path,
+            len(documents),
+            time.time() - start_time,
+        )
+        return LocalVectorIndex(path, manifest, vectors, documents, ann_index)
+
+    @staticmethod
+    def _load_ann_index(path: str, vectors: np.ndarray) -> Any:
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning(
+                "Could not import hnswlib python package, using exact search for %s. "
+                "Please install it with `pip install hnswlib`.",
+                path,
+            )
+            return None
+        ann_index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        hnsw_path = os.path.join(path, HNSW_FILE)
+        if os.path.exists(hnsw_path):
+            ann_index.load_index(hnsw_path, max_elements=len(vectors))
+        else:
+            ann_index.init_index(max_elements=len(vectors), ef_construction=200, M=16)
+            ann_index.add_items(np.asarray(vectors), np.arange(len(vectors)))
+        ann_index.set_ef(HNSW_EF_SEARCH)
+        return ann_index
+
+    def search(self, query_embedding: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        """Finds the documents closest to the query by cosine similarity.
+
+        Returns:
+            (document position, similarity) tuples ordered from most to least similar.
+        """
+        k = min(k, len(self.documents))
+        if k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if self.ann_index is not None:
+            labels, distances = self.ann_index.knn_query(query, k=max(k, 1))
+            # the inner product distance of hnswlib is 1 - similarity
+            return [
+                (int(label), float(1.0 - distance))
+                for label, distance in zip(labels[0], distances[0])
+            ]
+
+        similarities = self.vectors @ query
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(int(position), float(similarities[position])) for position in top]
+
+    def document(self, position: int) -> Document:
+        """Returns the document at a position of the index."""
+        document = self.documents[position]
+        return Document(page_content=document["text"], metadata=document.get("metadata", {}))
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+def get_local_vector_index(path: str, use_ann: bool = False) -> LocalVectorIndex:
+    """Returns the process-wide instance of an index and reloads it after re-ingestion.
+
+    The ingestion pipeline swaps in new versions of a store by replacing a symlink.
+    The link is resolved once, so that all files are read from the same version. If
+    the store cannot be found for a moment, the last loaded version is returned.
+    """
+    key = (os.path.abspath(path), use_ann)
+    version_path = os.path.realpath(path)
+    try:
+        manifest_mtime = os.stat(os.path.join(version_path, MANIFEST_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        index = _current_indices.get(key)
+        if index is None:
+            raise
+        logger.warning("Local vector store %s not found, using the last loaded version", path)
+        return index
+    index = _indices.get_or_create(
+        (version_path, use_ann, manifest_mtime),
+        lambda: LocalVectorIndex.load(version_path, use_ann),
+    )
+    _current_indices.put(key, index)
+    return index
+
+
+def find_local_vector_indices(root: str) -> List[str]:
+    """Returns the index directories in root, or root itself if it is an index."""
+    if os.path.exists(os.path.join(root, MANIFEST_FILE)):
+        return [root]
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        os.path.join(root, name)
+        for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, MANIFEST_FILE))
+    )
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Returns the manifest of an index or None if it cannot be read."""
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError) as error:
+        logger.warning("Cannot read local vector store manifest in %s: %s", path, error)
+        return None
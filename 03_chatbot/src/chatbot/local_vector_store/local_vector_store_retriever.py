@@ -0,0 +1,54 @@
+""" Module that contains a retriever that searches a vector index on local disk.
+"""
+import logging
+import time
+from typing import Any, List
+
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from langchain.schema import BaseRetriever, Document
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+
+class LocalVectorStoreRetriever(BaseRetriever):
+    """Retriever to search a LocalVectorIndex.
+
+    Args:
+        index: Loaded local vector index.
+        embeddings: Embeddings of the model that the index was built with.
+        k: Number of documents to query for. Default: 3
+
+    Example:
+        ```python
+        retriever = LocalVectorStoreRetriever(
+            index=get_local_vector_index(path), embeddings=embeddings, k=3
+        )
+        ```
+    """
+
+    index: Any
+    embeddings: Any
+    k: int = 3
+
+    def get_relevant_documents(self, query: str) -> List[Document]:
+        """Run search on the local index and get top k documents.
+
+        Args:
+            query: Query string.
+
+        Returns:
+            list of documents from this index that relate to the query.
+        """
+        embedding = self.embeddings.embed_query(query)
+        start_time = time.perf_counter()
+        hits = self.index.search(embedding, self.k)
+        logger.info(
+            "Local vector store search returned %s documents in %.6f seconds",
+            len(hits),
+            time.perf_counter() - start_time,
+        )
+        return [self.index.document(position) for position, _ in hits]
+
+    async def aget_relevant_documents(self, query: str) -> List[Document]:
+        """See base class."""
+        return await super().aget_relevant_documents(query)
@@ -0,0 +1,101 @@
+""" Module that downloads local vector stores that the ingestion pipeline uploaded to Amazon S3.
+
+The ingestion pipeline uploads every version of a store to
+s3://bucket/prefix/<store>/<version>/ and then writes the version to
+s3://bucket/prefix/<store>/LATEST. Versions are downloaded to
+<root>/.versions/<store>/<version> and <root>/<store> is a symlink to the current
+version, the same layout that the ingestion pipeline writes to local disk.
+"""
+import logging
+import os
+import shutil
+from typing import List, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+from chatbot.helpers.aws_helpers import get_client
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+VERSIONS_DIR = ".versions"
+LATEST_FILE = "LATEST"
+
+
+def _split_s3_uri(s3_uri: str) -> Tuple[str, str]:
+    bucket, _, prefix = s3_uri.removeprefix("s3://").partition("/")
+    prefix = prefix.strip("/")
+    return bucket, f"{prefix}/" if prefix else ""
+
+
+def _swap_in(path: str, version_path: str) -> None:
+    # a symlink is replaced atomically, so readers see either the old or the new version
+    link_path = f"{os.path.dirname(version_path)}.link"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(os.path.relpath(version_path, os.path.dirname(path)), link_path)
+    os.replace(link_path, path)
+
+
+def _remove_old_versions(versions_path: str, keep: List[str]) -> None:
+    for version in os.listdir(versions_path):
+        if version not in keep:
+            shutil.rmtree(os.path.join(versions_path, version), ignore_errors=True)
+
+
+def _download_version(s3_client, bucket: str, prefix: str, version_path: str) -> None:
+    download_path = f"{version_path}.download"
+    shutil.rmtree(download_path, ignore_errors=True)
+    os.makedirs(download_path)
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for s3_object in page.get("Contents", []):
+            file_name = s3_object["Key"][len(prefix) :]
+            s3_client.download_file(
+                bucket, s3_object["Key"], os.path.join(download_path, file_name)
+            )
+    os.rename(download_path, version_path)
+
+
+def sync_local_vector_stores(s3_uri: str, root: str) -> None:
+    """Downloads the current version of every local vector store below an S3 location.
+
+    Stores that are already up to date are not downloaded again. The previous version
+    of a store is kept for sessions that still read it.
+
+    Args:
+        s3_uri: S3 location like s3://bucket/prefix that the ingestion pipeline uploads to.
+        root: Local directory that the stores are downloaded to.
+    """
+    s3_client = get_client("s3")
+    bucket, prefix = _split_s3_uri(s3_uri)
+    paginator = s3_client.get_paginator("list_objects_v2")
+    names = [
+        common_prefix["Prefix"][len(prefix) :].rstrip("/")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/")
+        for common_prefix in page.get("CommonPrefixes", [])
+    ]
+    for name in names:
+        try:
+            _sync_local_vector_store(s3_client, bucket, prefix, name, root)
+        except (BotoCoreError, ClientError, OSError) as error:
+            logger.warning("Could not download local vector store %s: %s", name, error)
+
+
+def _sync_local_vector_store(s3_client, bucket: str, prefix: str, name: str, root: str) -> None:
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=f"{prefix}{name}/{LATEST_FILE}")
+    except s3_client.exceptions.NoSuchKey:
+        return
+    version = response["Body"].read().decode("utf-8").strip()
+    path = os.path.join(root, name)
+    versions_path = os.path.join(root, VERSIONS_DIR, name)
+    version_path = os.path.join(versions_path, version)
+    if os.path.realpath(path) == os.path.realpath(version_path):
+        return
+    if not os.path.isdir(version_path):
+        logger.info("Downloading local vector store %s version %s", name, version)
+        _download_version(s3_client, bucket, f"{prefix}{name}/{version}/", version_path)
+    # the previous version is kept for sessions that resolved the link before the swap
+    previous_version = os.path.basename(os.path.realpath(path)) if os.path.islink(path) else None
+    _swap_in(path, version_path)
+    _remove_old_versions(versions_path, keep=[version, previous_version])
@@ -1,2 +1,10 @@
 """ This module contains integration with OpenSearch."""
-from .open_search_index_retriever import OpenSearchIndexRetriever, get_credentials, get_open_search_index_list
+from .open_search_index_retriever import (
+    OpenSearchIndexRetriever,
+    clear_open_search_clients,
+    get_credentials,
+    get_open_search_client,
+    get_open_search_index_list,
+    invalidate_credentials,
+    prune_open_search_clients,
+)
@@ -4,14 +4,23 @@ from __future__ import annotations
 import json
 import logging
 import sys
-from typing import List, Tuple
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-import boto3
 from chatbot.embeddings import SageMakerEndpointEmbeddings
+from chatbot.helpers.secrets_cache import get_secrets_cache
 from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.helpers.ttl_cache import TTLCache
+from chatbot.retrieval import (
+    maximal_marginal_relevance,
+    normalized_score_fusion,
+    reciprocal_rank_fusion,
+)
+from langchain.embeddings.base import Embeddings
 from langchain.schema import BaseRetriever, Document
 from langchain.vectorstores import OpenSearchVectorSearch
 from opensearchpy import OpenSearch
+from opensearchpy.exceptions import AuthenticationException
 
 logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
 
@@ -25,6 +34,76 @@ except json.decoder.JSONDecodeError:
     )
     sys.exit(0)
 
+OPEN_SEARCH_POOL_MAXSIZE = 10
+""" Maximum number of keep-alive connections per OpenSearch domain shared by all sessions. """
+
+TEXT_FIELD = "text"
+""" Field that stores the document text, as written by OpenSearchVectorSearch during ingestion. """
+VECTOR_FIELD = "vector_field"
+""" Field that stores the document embedding, as written by OpenSearchVectorSearch during ingestion. """
+METADATA_FIELD = "metadata"
+""" Field that stores the document metadata, as written by OpenSearchVectorSearch during ingestion. """
+
+SEARCH_TYPE_VECTOR = "vector"
+SEARCH_TYPE_HYBRID = "hybrid"
+FUSION_RRF = "rrf"
+FUSION_SCORE = "score"
+
+CANDIDATE_FACTOR = 4
+""" Each sub-query of an msearch fetches this many times k candidates before fusion and deduplication. """
+
+_open_search_clients: TTLCache = TTLCache()
+
+
+def _get_host(endpoint: str) -> str:
+    return endpoint.removeprefix("https://").rstrip("/")
+
+
+def get_open_search_client(endpoint: str, http_auth: Tuple[str, str]) -> OpenSearch:
+    """Returns a process-wide OpenSearch client for a domain.
+
+    Clients are cached per endpoint and credentials so that all sessions share one
+    HTTP connection pool with keep-alive instead of opening new TLS connections per prompt.
+
+    Args:
+        endpoint: OpenSearch domain endpoint with or without https:// prefix.
+        http_auth: Tuple containing OpenSearch user and password for authentication.
+
+    Returns:
+        OpenSearch client.
+    """
+    host = _get_host(endpoint)
+
+    def create_client():
+        return OpenSearch(
+            hosts=[{"host": host, "port": 443}],
+            http_auth=http_auth,
+            use_ssl=True,
+            verify_certs=False,
+            ssl_assert_hostname=False,
+            ssl_show_warn=False,
+            pool_maxsize=OPEN_SEARCH_POOL_MAXSIZE,
+            http_compress=True,
+        )
+
+    return _open_search_clients.get_or_create((host, tuple(http_auth)), create_client)
+
+
+def clear_open_search_clients():
+    """Drops all cached OpenSearch clients, e.g. after the credentials rotated."""
+    _open_search_clients.clear()
+
+
+def prune_open_search_clients(used: Iterable[Tuple[str, Tuple[str, str]]]) -> None:
+    """Drops the cached OpenSearch clients that are not in use anymore.
+
+    Args:
+        used: Endpoints and credentials of the domains that are still in use.
+    """
+    used_keys = {(_get_host(endpoint), tuple(http_auth)) for endpoint, http_auth in used}
+    _open_search_clients.invalidate_where(lambda key: key not in used_keys)
+
+
 def get_credentials(secret_id: str, region_name: str) -> str:
     """Retrieve credentials password for given username from AWS SecretsManager.
 
@@ -35,41 +114,73 @@ def get_credentials(secret_id: str, region_name: str) -> str:
     Returns:
         AWS Secrets Manager password.
 
+    The secret is read from the process-wide secrets cache, so discovery and sessions
+    only call AWS Secrets Manager once per SECRETS_CACHE_TTL_SECONDS.
+
     Example:
         ```python
         credentials = get_credentials("username", "us-east-1")
         ```
     """
-    client = boto3.client("secretsmanager", region_name=region_name)
-    response = client.get_secret_value(SecretId=secret_id)
-    secrets_value = json.loads(response["SecretString"])
+    secrets_value = json.loads(get_secrets_cache().get_secret(secret_id, region_name))
     return secrets_value
 
+
+def invalidate_credentials(secret_id: str, region_name: str) -> None:
+    """Forgets cached credentials that OpenSearch rejected, e.g. after the secret rotated.
+
+    Args:
+        secret_id: AWS Secrets Manager id of the credentials.
+        region_name: AWS region name.
+    """
+    get_secrets_cache().invalidate(secret_id, region_name)
+
 def get_open_search_index_list(region, domain, os_http_auth):
-    client = boto3.client("opensearch", region)
-    client = OpenSearch(
-        hosts=[{"host": domain["Endpoint"], "port": 443}],
-        http_auth=os_http_auth,
-        use_ssl=True,
-        verify_certs=False,
-        ssl_assert_hostname=False,
-        ssl_show_warn=False,
-    )
+    client = get_open_search_client(domain["Endpoint"], os_http_auth)
 
     response = client.cat.indices(v=True, format="json")
     indexes = [item for item in response if item['rep'] == "1"]
     return indexes
 
+class _SharedClientVectorSearch(OpenSearchVectorSearch):
+    """OpenSearchVectorSearch on an existing client, without creating a client of its own."""
+
+    def __init__(self, client: OpenSearch, index_name: str, embedding_function: Embeddings):
+        # same attributes as OpenSearchVectorSearch.__init__ sets for a managed domain
+        self.embedding_function = embedding_function
+        self.index_name = index_name
+        self.is_aoss = False
+        self.client = client
+        self.engine = None
+
+
 class OpenSearchIndexRetriever(BaseRetriever):
     """Retriever to search Amazon OpenSearch.
 
     Args:
-        index_name: OpenSearch index name.
+        index_name: OpenSearch index name or list of index names. Several indices are
+            queried with a single msearch request and merged into one global top k.
         domain_endpoint: OpenSearch domain endpoint.
         http_auth: Tuple containing OpenSearch user and password for authentication.
         embeddings_predictor: HuggingFacePredictor for embeddings.
         k: Number of documents to query for. Default: 3
-        max_character_limit: Maximum character limit for each document. Default: 1000
+        max_character_limit: Maximum character limit for each document, None to keep whole
+            documents. Models with a token budget pack documents into it as well.
+            Default: 10000
+        client: Optional OpenSearch client to share a connection pool with other retrievers.
+            Default: the process-wide client of the domain and credentials
+        search_type: "vector" for k-NN search only or "hybrid" to combine a lexical
+            match query with k-NN search in a single msearch round trip. Default: "vector"
+        fusion: How hybrid results are fused, "rrf" for reciprocal rank fusion or
+            "score" for blending min-max normalized scores. Default: "rrf"
+        lexical_weight: Weight of the lexical results in hybrid search between 0 and 1.
+            The k-NN results get the remaining weight. Default: 0.5
+        use_mmr: Whether to diversify the results with maximal marginal relevance over
+            a pool of fetch_k candidates and their stored vectors. Default: False
+        fetch_k: Number of candidates MMR selects from. Default: 20
+        mmr_lambda: Trade-off between relevance (1.0) and diversity (0.0) of MMR. Default: 0.5
+        on_auth_failure: Called with the rejected credentials when OpenSearch answers 401.
+            Returns new credentials to retry the search with once, or None. Default: None
 
     Example:
         ```python
@@ -87,44 +198,210 @@ class OpenSearchIndexRetriever(BaseRetriever):
         ```
     """
 
-    max_character_limit: int
+    max_character_limit: Optional[int]
 
     k: int
+    index_names: List[str]
+    """ OpenSearch indices that are searched. """
     opensearchvectorsearch: OpenSearchVectorSearch
     """ Vector search for OpenSearch. """
 
+    search_type: str = SEARCH_TYPE_VECTOR
+    fusion: str = FUSION_RRF
+    lexical_weight: float = 0.5
+    use_mmr: bool = False
+    fetch_k: int = 20
+    mmr_lambda: float = 0.5
+    domain_endpoint: str
+    http_auth: Tuple[str, str]
+    """ User and password that the client authenticates with. """
+    on_auth_failure: Optional[
+        Callable[[Tuple[str, str]], Optional[Tuple[str, str]]]
+    ] = None
+    """ Returns new credentials after OpenSearch rejected the current ones. """
+
     def __init__(
         self,
-        index_name: str,
+        index_name: Union[str, List[str]],
         domain_endpoint: str,
         http_auth: Tuple[str, str],
         embeddings_predictor: HuggingFacePredictor,
         k: int = 3,
         # TODO::This could be another parameter added to GUI
-        max_character_limit: int = 10000,
+        max_character_limit: Optional[int] = 10000,
+        client: Optional[OpenSearch] = None,
+        search_type: str = SEARCH_TYPE_VECTOR,
+        fusion: str = FUSION_RRF,
+        lexical_weight: float = 0.5,
+        use_mmr: bool = False,
+        fetch_k: int = 20,
+        mmr_lambda: float = 0.5,
+        on_auth_failure: Optional[
+            Callable[[Tuple[str, str]], Optional[Tuple[str, str]]]
+        ] = None,
     ):
+        if search_type not in (SEARCH_TYPE_VECTOR, SEARCH_TYPE_HYBRID):
+            raise ValueError(f"Unknown OpenSearch search type: {search_type}")
+        if fusion not in (FUSION_RRF, FUSION_SCORE):
+            raise ValueError(f"Unknown fusion method for hybrid search: {fusion}")
+        index_names = [index_name] if isinstance(index_name, str) else list(index_name)
+        if not index_names:
+            raise ValueError("At least one OpenSearch index name is required.")
         os_domain_ep = domain_endpoint
-        os_index_name = index_name
+        os_index_name = index_names[0]
         sagemaker_endpoint_embeddings = SageMakerEndpointEmbeddings(
             embeddings_predictor=embeddings_predictor
         )
 
-        opensearchvectorsearch = OpenSearchVectorSearch(
+        opensearchvectorsearch = _SharedClientVectorSearch(
+            client if client is not None else get_open_search_client(os_domain_ep, http_auth),
             index_name=os_index_name,
             embedding_function=sagemaker_endpoint_embeddings,
-            opensearch_url=os_domain_ep,
-            http_auth=http_auth,
-            use_ssl=True,
-            verify_certs=False,
-            ssl_assert_hostname=False,
-            ssl_show_warn=False,
         )
         super().__init__(
             k=k,
+            index_names=index_names,
             max_character_limit=max_character_limit,
             opensearchvectorsearch=opensearchvectorsearch,
+            search_type=search_type,
+            fusion=fusion,
+            lexical_weight=lexical_weight,
+            use_mmr=use_mmr,
+            fetch_k=fetch_k,
+            mmr_lambda=mmr_lambda,
+            domain_endpoint=domain_endpoint,
+            http_auth=tuple(http_auth),
+            on_auth_failure=on_auth_failure,
+        )
+
+    @staticmethod
+    def _hit_to_document(hit: Dict[str, Any]) -> Document:
+        source = hit["_source"]
+        return Document(
+            page_content=source[TEXT_FIELD], metadata=source.get(METADATA_FIELD, {})
         )
 
+    def _msearch(self, query: str) -> List[Document]:
+        """Queries all indices in one msearch request and fuses the results.
+
+        Unlike OpenSearchVectorSearch.similarity_search, hits only contain the text and
+        metadata fields, not the stored embedding.
+
+        Every index gets a k-NN sub-query and, for hybrid search, a lexical sub-query.
+        Results are fused across sub-queries and indices, deduplicated by text and
+        cut to the global top k, or diversified with MMR.
+        """
+        embedding = self.opensearchvectorsearch.embedding_function.embed_query(query)
+        if not self.use_mmr:
+            hits = self._fused_hits(query, embedding, self.k)
+            return [self._hit_to_document(hit) for hit in hits]
+
+        hits = self._fused_hits(query, embedding, max(self.fetch_k, self.k))
+        vectors = [hit["_source"].get(VECTOR_FIELD) for hit in hits]
+        if any(vector is None for vector in vectors):
+            # the index does not store vectors in _source, embed candidates in one batch
+            vectors = self.opensearchvectorsearch.embedding_function.embed_documents(
+                [hit["_source"][TEXT_FIELD] for hit in hits]
+            )
+        selected = maximal_marginal_relevance(
+            embedding, vectors, k=self.k, lambda_mult=self.mmr_lambda
+        )
+        return [self._hit_to_document(hits[position]) for position in selected]
+
+    def _fused_hits(
+        self, query: str, embedding: List[float], size: int
+    ) -> List[Dict[str, Any]]:
+        """Returns up to size fused and deduplicated hits, ordered by relevance."""
+        hybrid = self.search_type == SEARCH_TYPE_HYBRID
+        sub_query_count = len(self.index_names) * (2 if hybrid else 1)
+        # a single sub-query needs no extra candidates for fusion
+        candidates = size if sub_query_count == 1 else max(size, self.k * CANDIDATE_FACTOR)
+        # embeddings are thousands of floats per hit, only fetch them when MMR needs them
+        source_fields = [TEXT_FIELD, METADATA_FIELD] + ([VECTOR_FIELD] if self.use_mmr else [])
+        lexical_query = {
+            "size": candidates,
+            "_source": {"includes": source_fields},
+            "query": {"match": {TEXT_FIELD: {"query": query}}},
+        }
+        vector_query = {
+            "size": candidates,
+            "_source": {"includes": source_fields},
+            "query": {"knn": {VECTOR_FIELD: {"vector": embedding, "k": candidates}}},
+        }
+
+        body = []
+        is_lexical = []
+        for index_name in self.index_names:
+            if hybrid:
+                body += [{"index": index_name}, lexical_query]
+                is_lexical.append(True)
+            body += [{"index": index_name}, vector_query]
+            is_lexical.append(False)
+        responses = self.opensearchvectorsearch.client.msearch(body=body)["responses"]
+
+        # all indices of an item share one embedding endpoint, so the k-NN scores of
+        # different indices are comparable and are merged before they are normalized
+        lexical_hits = []
+        vector_hits = []
+        for response, lexical in zip(responses, is_lexical):
+            if "error" in response:
+                logger.warning("OpenSearch sub-query failed: %s", response["error"])
+                continue
+            (lexical_hits if lexical else vector_hits).extend(response["hits"]["hits"])
+        hits_by_key = {
+            (hit["_index"], hit["_id"]): hit for hit in lexical_hits + vector_hits
+        }
+        hit_lists = [
+            sorted(hits, key=lambda hit: hit["_score"], reverse=True)
+            for hits in ([lexical_hits, vector_hits] if hybrid else [vector_hits])
+        ]
+        weights = [self.lexical_weight, 1.0 - self.lexical_weight] if hybrid else [1.0]
+
+        if hybrid and self.fusion == FUSION_RRF:
+            fused = reciprocal_rank_fusion(
+                [[(hit["_index"], hit["_id"]) for hit in hits] for hits in hit_lists],
+                weights,
+            )
+        else:
+            fused = normalized_score_fusion(
+                [
+                    [((hit["_index"], hit["_id"]), hit["_score"]) for hit in hits]
+                    for hits in hit_lists
+                ],
+                weights,
+            )
+
+        hits = []
+        seen_texts = set()
+        for key, _ in fused:
+            hit = hits_by_key[key]
+            text = hit["_source"][TEXT_FIELD]
+            if text in seen_texts:
+                continue
+            seen_texts.add(text)
+            hits.append(hit)
+            if len(hits) == size:
+                break
+        return hits
+
+    def _renew_credentials(self) -> bool:
+        """Switches to new credentials after OpenSearch rejected the current ones.
+
+        Returns:
+            Whether the search can be retried with new credentials.
+        """
+        if self.on_auth_failure is None:
+            return False
+        http_auth = self.on_auth_failure(self.http_auth)
+        if http_auth is None or tuple(http_auth) == self.http_auth:
+            return False
+        logger.info("OpenSearch rejected the credentials, retrying with renewed credentials")
+        self.http_auth = tuple(http_auth)
+        self.opensearchvectorsearch.client = get_open_search_client(
+            self.domain_endpoint, self.http_auth
+        )
+        return True
+
     def get_relevant_documents(self, query: str) -> List[Document]:
         """Run search on OpenSearch index and get top k documents.
 
@@ -134,7 +411,23 @@ class OpenSearchIndexRetriever(BaseRetriever):
         Returns:
             list of documents from this OpenSearch index that relate to the query.
         """
-        docs = self.opensearchvectorsearch.similarity_search(query, k=self.k)
+        start_time = time.perf_counter()
+        try:
+            docs = self._msearch(query)
+        except AuthenticationException:
+            if not self._renew_credentials():
+                raise
+            docs = self._msearch(query)
+        logger.info(
+            "OpenSearch %s search (mmr=%s) on %s indices returned %s documents in %.3f seconds",
+            self.search_type,
+            self.use_mmr,
+            len(self.index_names),
+            len(docs),
+            time.perf_counter() - start_time,
+        )
+        if self.max_character_limit is None:
+            return docs
         # limit to max character limit
         for doc in docs:
             doc.page_content = doc.page_content[
@@ -0,0 +1,9 @@
+""" This module contains retrieval building blocks that are independent of a specific knowledge base."""
+from .context_packer import (
+    ContextPacker,
+    approximate_token_count,
+    get_token_counter,
+)
+from .mmr import maximal_marginal_relevance
+from .rank_fusion import normalized_score_fusion, reciprocal_rank_fusion
+from .reranking import CrossEncoderReranker, RerankingRetriever, get_cross_encoder_reranker
@@ -0,0 +1,161 @@
+""" Module that contains a component that packs retrieved documents into a token budget.
+"""
+import logging
+import math
+import re
+from typing import Callable, List, Optional, Sequence
+
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from langchain.schema import Document
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+MIN_TRIMMED_TOKENS = 50
+""" Documents are only trimmed to fit if at least this many tokens of the budget are left. """
+
+MIN_OVERLAP_CHARACTERS = 50
+""" Chunks of the same source are merged if they overlap by at least this many characters. """
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_WORD_END = re.compile(r"\s+")
+
+
+def approximate_token_count(text: str) -> int:
+    """Estimates the number of tokens with the rule of thumb of four characters per token."""
+    return math.ceil(len(text) / 4)
+
+
+def get_token_counter(llm) -> Callable[[str], int]:
+    """Returns the token counter of a model, or an estimate if the model has none.
+
+    Models without a dedicated tokenizer fall back to the GPT-2 tokenizer of
+    `transformers` in LangChain, which may not be installed.
+    """
+    try:
+        llm.get_num_tokens("test")
+        return llm.get_num_tokens
+    except (ImportError, NotImplementedError, ValueError) as error:
+        logger.info("Estimating token counts, no tokenizer available: %s", error)
+        return approximate_token_count
+
+
+def _merge_overlap(first: str, second: str) -> Optional[str]:
+    """Returns first and second joined if the end of first overlaps the start of second."""
+    if len(second) < MIN_OVERLAP_CHARACTERS:
+        return None
+    probe = second[:MIN_OVERLAP_CHARACTERS]
+    lowest_start = max(0, len(first) - len(second))
+    # prefer the shortest overlap so that repeated passages are not collapsed
+    start = first.rfind(probe, lowest_start)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first + second[len(first) - start :]
+        start = first.rfind(probe, lowest_start, start + len(probe) - 1)
+    return None
+
+
+class ContextPacker:
+    """Fits retrieved documents into a token budget for the prompt.
+
+    Documents are expected in order of relevance. Overlapping chunks of the same source
+    are merged first, then documents are added greedily while they fit into the budget.
+    A document that does not fit completely is trimmed at a sentence boundary, or at a
+    word boundary if no sentence fits.
+
+    Args:
+        count_tokens: Function that counts the tokens of a text with the tokenizer
+            of the model the prompt is sent to.
+        token_budget: Maximum number of tokens of all documents together.
+
+    Example:
+        ```python
+        packer = ContextPacker(get_token_counter(llm), token_budget=3000)
+        docs = packer.pack(retriever.get_relevant_documents(question))
+        ```
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], token_budget: int):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+
+    def _merge_overlapping(self, docs: List[Document]) -> List[Document]:
+        merged: List[Document] = []
+        for doc in docs:
+            source = doc.metadata.get("source")
+            for existing in merged:
+                if source is None or existing.metadata.get("source") != source:
+                    continue
+                if doc.page_content in existing.page_content:
+                    break
+                if existing.page_content in doc.page_content:
+                    existing.page_content = doc.page_content
+                    break
+                combined = _merge_overlap(
+                    existing.page_content, doc.page_content
+                ) or _merge_overlap(doc.page_content, existing.page_content)
+                if combined is not None:
+                    existing.page_content = combined
+                    break
+            else:
+                merged.append(Document(page_content=doc.page_content, metadata=doc.metadata))
+        return merged
+
+    def _longest_prefix(self, text: str, cuts: Sequence[int], max_tokens: int) -> str:
+        """Returns the longest prefix that ends at one of the ascending cuts and fits into max_tokens."""
+        low, high = 0, len(cuts)
+        # binary search keeps the number of tokenizer calls logarithmic
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[: cuts[middle - 1]]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return "" if low == 0 else text[: cuts[low - 1]]
+
+    def _trim_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Returns the longest prefix of whole sentences with at most max_tokens tokens.
+
+        Text without a fitting sentence end, e.g. tables or code, is cut at a word
+        boundary or, without whitespace, at a character.
+        """
+        sentence_cuts = [match.start() for match in _SENTENCE_END.finditer(text)] + [len(text)]
+        trimmed = self._longest_prefix(text, sentence_cuts, max_tokens)
+        if not trimmed:
+            word_cuts = [match.start() for match in _WORD_END.finditer(text)]
+            trimmed = self._longest_prefix(text, word_cuts, max_tokens)
+        if not trimmed:
+            trimmed = self._longest_prefix(text, range(1, len(text) + 1), max_tokens)
+        return trimmed
+
+    def pack(self, docs: List[Document], reserved_tokens: int = 0) -> List[Document]:
+        """Returns the documents that fit into the budget.
+
+        Args:
+            docs: Documents ordered from most to least relevant.
+            reserved_tokens: Tokens of the budget already used, e.g. by the question.
+
+        Returns:
+            Merged and possibly trimmed documents in order of relevance.
+        """
+        remaining = self.token_budget - reserved_tokens
+        packed = []
+        for doc in self._merge_overlapping(docs):
+            if remaining < MIN_TRIMMED_TOKENS:
+                break
+            tokens = self.count_tokens(doc.page_content)
+            if tokens > remaining:
+                trimmed = self._trim_to_tokens(doc.page_content, remaining)
+                if not trimmed:
+                    continue
+                doc.page_content = trimmed
+                tokens = self.count_tokens(trimmed)
+            packed.append(doc)
+            remaining -= tokens
+        logger.info(
+            "Packed %s of %s documents into %s of %s context tokens",
+            len(packed),
+            len(docs),
+            self.token_budget - reserved_tokens - remaining,
+            self.token_budget - reserved_tokens,
+        )
+        return packed
@@ -0,0 +1,250 @@
+""" Module that contains an offline harness that evaluates retrieval quality and latency.
+
+Usage:
+    python -m chatbot.retrieval.evaluation --dataset questions.jsonl \\
+        --retriever "My OpenSearch index" --top-k 5 --concurrency 4 --output report.json
+
+The dataset contains one JSON object per line with a question and the sources of the
+documents that answer it:
+    {"question": "How do I reset my password?", "relevant_sources": ["https://..."]}
+"""
+import argparse
+import json
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from langchain.schema import BaseRetriever
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+DEFAULT_K_VALUES = (1, 3, 5, 10)
+
+
+@dataclass
+class EvaluationExample:
+    """Question with the sources of the documents that are relevant to it."""
+
+    question: str
+    relevant_sources: List[str]
+
+
+@dataclass
+class EvaluationResult:
+    """Retrieved sources and latency of one question."""
+
+    example: EvaluationExample
+    retrieved_sources: List[str]
+    latency: float
+    """ Seconds the retriever took. """
+    error: Optional[str] = None
+
+
+def load_examples(path: str) -> List[EvaluationExample]:
+    """Loads a labelled dataset from a JSON lines file."""
+    with open(path, encoding="utf-8") as dataset_file:
+        rows = [json.loads(line) for line in dataset_file if line.strip()]
+    return [
+        EvaluationExample(row["question"], list(row["relevant_sources"])) for row in rows
+    ]
+
+
+def recall_at_k(retrieved: Sequence[str], relevant: Sequence[str], k: int) -> float:
+    """Share of relevant sources among the first k retrieved sources."""
+    if not relevant:
+        return 0.0
+    return len(set(retrieved[:k]) & set(relevant)) / len(set(relevant))
+
+
+def reciprocal_rank(retrieved: Sequence[str], relevant: Sequence[str]) -> float:
+    """One divided by the rank of the first relevant source, 0 if none was retrieved."""
+    relevant_set = set(relevant)
+    for rank, source in enumerate(retrieved, start=1):
+        if source in relevant_set:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(retrieved: Sequence[str], relevant: Sequence[str], k: int) -> float:
+    """Normalized discounted cumulative gain with binary relevance."""
+    relevant_set = set(relevant)
+    dcg = sum(
+        1.0 / math.log2(rank + 1)
+        for rank, source in enumerate(retrieved[:k], start=1)
+        if source in relevant_set
+    )
+    ideal_dcg = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant_set), k) + 1))
+    return 0.0 if ideal_dcg == 0 else dcg / ideal_dcg
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _unique(sources: List[str]) -> List[str]:
+    # several chunks of one source count once, at the rank of the first chunk
+    return list(dict.fromkeys(sources))
+
+
+def _run_example(
+    retriever: BaseRetriever, example: EvaluationExample, source_key: str
+) -> EvaluationResult:
+    start_time = time.perf_counter()
+    try:
+        docs = retriever.get_relevant_documents(example.question)
+    except Exception as error:  # the report counts failed questions instead of aborting
+        logger.warning("Retrieval failed for question %r: %s", example.question, error)
+        return EvaluationResult(example, [], time.perf_counter() - start_time, str(error))
+    latency = time.perf_counter() - start_time
+    sources = _unique([str(doc.metadata.get(source_key)) for doc in docs])
+    return EvaluationResult(example, sources, latency)
+
+
+def evaluate_retriever(
+    retriever: BaseRetriever,
+    examples: List[EvaluationExample],
+    k_values: Sequence[int] = DEFAULT_K_VALUES,
+    concurrency: int = 1,
+    source_key: str = "source",
+) -> Dict[str, Any]:
+    """Runs all questions through a retriever and reports quality and latency.
+
+    Args:
+        retriever: Retriever to evaluate.
+        examples: Labelled questions.
+        k_values: Cut-offs for recall@k and nDCG@k. Default: (1, 3, 5, 10)
+        concurrency: Number of questions retrieved at the same time. Default: 1
+        source_key: Metadata key that identifies the source of a document. Default: "source"
+
+    Returns:
+        JSON serializable report with metrics averaged over all questions.
+    """
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(lambda example: _run_example(retriever, example, source_key), examples)
+        )
+    duration = time.perf_counter() - start_time
+
+    def mean(values: List[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    metrics: Dict[str, float] = {}
+    for k in k_values:
+        metrics[f"recall@{k}"] = mean(
+            [recall_at_k(r.retrieved_sources, r.example.relevant_sources, k) for r in results]
+        )
+        metrics[f"ndcg@{k}"] = mean(
+            [ndcg_at_k(r.retrieved_sources, r.example.relevant_sources, k) for r in results]
+        )
+    metrics["mrr"] = mean(
+        [reciprocal_rank(r.retrieved_sources, r.example.relevant_sources) for r in results]
+    )
+
+    latencies_ms = [result.latency * 1000 for result in results if result.error is None]
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "questions": len(results),
+        "errors": sum(1 for result in results if result.error is not None),
+        "concurrency": concurrency,
+        "metrics": metrics,
+        "latency_ms": {
+            "p50": percentile(latencies_ms, 0.50),
+            "p90": percentile(latencies_ms, 0.90),
+            "p99": percentile(latencies_ms, 0.99),
+            "mean": mean(latencies_ms),
+            "max": max(latencies_ms, default=0.0),
+        },
+        "throughput_qps": len(results) / duration if duration > 0 else 0.0,
+        "results": [
+            {
+                "question": result.example.question,
+                "retrieved_sources": result.retrieved_sources,
+                "latency_ms": result.latency * 1000,
+                "error": result.error,
+            }
+            for result in results
+        ],
+    }
+
+
+def _get_retriever(friendly_name: str, filters: List[str], top_k: int) -> BaseRetriever:
+    """Bootstraps the retriever catalog like the app and returns one retriever."""
+    import boto3
+    from chatbot.catalog import RetrieverCatalog
+    from chatbot.config import AppConfigProvider
+    from chatbot.helpers import (
+        ChatbotEnvironment,
+        ChatbotEnvironmentVariables,
+        get_current_account_id,
+    )
+
+    environment = ChatbotEnvironment()
+    app_config = AppConfigProvider(
+        environment.get_env_variable(ChatbotEnvironmentVariables.AWSAppConfigApplication),
+        environment.get_env_variable(ChatbotEnvironmentVariables.AWSAppConfigEnvironment),
+        environment.get_env_variable(ChatbotEnvironmentVariables.AWSAppConfigProfile),
+    ).config
+    region = boto3.Session().region_name or environment.get_env_variable(
+        ChatbotEnvironmentVariables.AWSRegion
+    )
+    catalog = RetrieverCatalog(get_current_account_id(), [region], app_config, logger)
+    catalog.bootstrap()
+
+    items = [item for item in catalog if item.friendly_name == friendly_name]
+    if not items:
+        available = ", ".join(item.friendly_name for item in catalog)
+        raise ValueError(f"Retriever {friendly_name!r} not found. Available: {available}")
+    item = items[0]
+    if filters:
+        item.current_filter = [
+            option for option in item.available_filter_options or [] if option[0] in filters
+        ]
+    item.top_k = top_k
+    return item.get_instance()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate retrieval quality and latency of a chatbot knowledge base."
+    )
+    parser.add_argument("--dataset", required=True, help="JSON lines file with labelled questions")
+    parser.add_argument("--retriever", required=True, help="Friendly name of the knowledge base")
+    parser.add_argument("--filter", nargs="*", default=[], help="Indices or data sources to search")
+    parser.add_argument("--top-k", type=int, default=max(DEFAULT_K_VALUES))
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--source-key", default="source")
+    parser.add_argument("--output", help="Path of the JSON report, printed if omitted")
+    args = parser.parse_args()
+
+    retriever = _get_retriever(args.retriever, args.filter, args.top_k)
+    report = evaluate_retriever(
+        retriever,
+        load_examples(args.dataset),
+        k_values=[k for k in DEFAULT_K_VALUES if k <= args.top_k],
+        concurrency=args.concurrency,
+        source_key=args.source_key,
+    )
+    report["retriever"] = args.retriever
+    report["filter"] = args.filter
+    report["top_k"] = args.top_k
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+""" Module that contains a vectorized maximal marginal relevance (MMR) implementation.
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def maximal_marginal_relevance(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """Selects k diverse candidates that are relevant to the query.
+
+    Each step picks the candidate with the highest
+    `lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, selected))`.
+    Similarities are cosine similarities computed with matrix operations, and the
+    maximum similarity to the selected set is updated incrementally, so one step
+    costs a single matrix-vector product over the candidate pool.
+
+    Args:
+        query_embedding: Embedding of the query.
+        candidate_embeddings: Embeddings of the candidates, one row per candidate.
+        k: Number of candidates to select.
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0). Default: 0.5
+
+    Returns:
+        Positions of the selected candidates in selection order.
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or len(candidates) == 0 or k <= 0:
+        return []
+    candidates = _normalize_rows(candidates)
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32)[np.newaxis, :])[0]
+
+    relevance = candidates @ query
+    max_similarity_to_selected = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+
+    # the first pick is the most relevant candidate, there is nothing to be diverse from
+    next_index = int(np.argmax(relevance))
+    for _ in range(min(k, len(candidates))):
+        selected.append(next_index)
+        available[next_index] = False
+        np.maximum(
+            max_similarity_to_selected,
+            candidates @ candidates[next_index],
+            out=max_similarity_to_selected,
+        )
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity_to_selected
+        scores[~available] = -np.inf
+        next_index = int(np.argmax(scores))
+    return selected
@@ -0,0 +1,70 @@
+""" Module that contains functions to fuse several ranked result lists into one ranking.
+"""
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+RRF_RANK_CONSTANT = 60
+""" Rank constant from the original reciprocal rank fusion paper (Cormack et al., 2009). """
+
+
+def _default_weights(weights: Optional[Sequence[float]], count: int) -> Sequence[float]:
+    if weights is None:
+        return [1.0] * count
+    if len(weights) != count:
+        raise ValueError(
+            f"Expected {count} weights, one per result list, but got {len(weights)}."
+        )
+    return weights
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Hashable]],
+    weights: Optional[Sequence[float]] = None,
+    rank_constant: int = RRF_RANK_CONSTANT,
+) -> List[Tuple[Hashable, float]]:
+    """Fuses ranked lists of ids with weighted reciprocal rank fusion.
+
+    Only the rank of an id matters, so lists with incomparable scores
+    (e.g. BM25 and cosine similarity) can be combined.
+
+    Args:
+        ranked_lists: Lists of ids, each ordered from most to least relevant.
+        weights: Optional weight per list. Default: 1.0 for each list
+        rank_constant: Dampens the influence of top ranks. Default: 60
+
+    Returns:
+        Ids with their fused score, ordered from most to least relevant.
+    """
+    weights = _default_weights(weights, len(ranked_lists))
+    scores: Dict[Hashable, float] = defaultdict(float)
+    for ranked_ids, weight in zip(ranked_lists, weights):
+        for rank, doc_id in enumerate(ranked_ids, start=1):
+            scores[doc_id] += weight / (rank_constant + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def normalized_score_fusion(
+    scored_lists: List[List[Tuple[Hashable, float]]],
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[Hashable, float]]:
+    """Fuses scored lists of ids by blending min-max normalized scores.
+
+    Args:
+        scored_lists: Lists of (id, score) tuples, e.g. one list per query or index.
+        weights: Optional weight per list. Default: 1.0 for each list
+
+    Returns:
+        Ids with their blended score, ordered from most to least relevant.
+    """
+    weights = _default_weights(weights, len(scored_lists))
+    scores: Dict[Hashable, float] = defaultdict(float)
+    for scored_ids, weight in zip(scored_lists, weights):
+        if not scored_ids:
+            continue
+        raw_scores = [score for _, score in scored_ids]
+        min_score, max_score = min(raw_scores), max(raw_scores)
+        score_range = max_score - min_score
+        for doc_id, score in scored_ids:
+            normalized = 1.0 if score_range == 0 else (score - min_score) / score_range
+            scores[doc_id] += weight * normalized
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
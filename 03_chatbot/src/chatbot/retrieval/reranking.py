@@ -0,0 +1,238 @@
+""" Module that contains a cross-encoder reranking stage for retrieved documents.
+"""
+import logging
+import threading
+import time
+from typing import Any, List, Optional, Sequence
+
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+from chatbot.helpers.ttl_cache import TTLCache
+from langchain.schema import BaseRetriever, Document
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+REMEASURE_INTERVAL = 60
+""" Seconds after which a call is scored regardless of the estimate to measure the speed again. """
+
+_rerankers: TTLCache = TTLCache()
+""" Cross-encoder models per configuration, loaded once per process. """
+
+
+class CrossEncoderReranker:
+    """Scores (query, passage) pairs with a small cross-encoder model on CPU.
+
+    The model is loaded lazily with `sentence-transformers`, which is an optional
+    dependency. Passing `backend="onnx"` runs an ONNX export of the model with
+    ONNX Runtime, which is usually faster on CPU than PyTorch.
+
+    Args:
+        model_name: Hugging Face model id or local path of the cross-encoder.
+        batch_size: Number of pairs scored per forward pass. Default: 16
+        max_length: Maximum number of tokens per pair. Default: 512
+        backend: Inference backend of sentence-transformers. Default: "torch"
+        max_concurrency: Number of reranking calls that may run at the same time.
+            Calls beyond that are skipped instead of queued. Default: 2
+
+    Example:
+        ```python
+        reranker = CrossEncoderReranker("cross-encoder/ms-marco-MiniLM-L-6-v2")
+        scores = reranker.score("What is RAG?", ["passage one", "passage two"])
+        ```
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 16,
+        max_length: int = 512,
+        backend: str = "torch",
+        max_concurrency: int = 2,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.backend = backend
+        self._model: Any = None
+        self._model_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._seconds_per_pair: Optional[float] = None
+        self._measured_at = 0.0
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is loaded and calls do not wait for it."""
+        return self._model is not None
+
+    def preload(self) -> None:
+        """Loads the model in a background thread, so that no request waits for it."""
+
+        def load():
+            try:
+                self._get_model()
+            except Exception as error:  # requests skip reranking while the model is missing
+                logger.warning("Loading reranker model %s failed: %s", self.model_name, error)
+
+        threading.Thread(target=load, name="reranker-preload", daemon=True).start()
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError:
+                    raise ModuleNotFoundError(
+                        "Could not import sentence-transformers python package. "
+                        "Please install it with `pip install sentence-transformers`."
+                    )
+                kwargs = {} if self.backend == "torch" else {"backend": self.backend}
+                self._model = CrossEncoder(
+                    self.model_name, max_length=self.max_length, device="cpu", **kwargs
+                )
+            return self._model
+
+    def estimate_seconds(self, pair_count: int) -> Optional[float]:
+        """Predicts how long scoring takes based on previous calls.
+
+        Returns:
+            None if unknown or if the last measurement is older than REMEASURE_INTERVAL,
+            so that a slow phase does not switch off reranking for good.
+        """
+        if (
+            self._seconds_per_pair is None
+            or time.monotonic() - self._measured_at > REMEASURE_INTERVAL
+        ):
+            return None
+        return self._seconds_per_pair * pair_count
+
+    def score(
+        self, query: str, passages: Sequence[str], deadline: Optional[float] = None
+    ) -> Optional[List[float]]:
+        """Scores passages for a query in batches.
+
+        Args:
+            query: Query string.
+            passages: Passages to score.
+            deadline: Optional `time.perf_counter()` value after which scoring stops.
+
+        Returns:
+            One relevance score per passage, or None if the deadline was hit.
+        """
+        model = self._get_model()
+        scores: List[float] = []
+        start_time = time.perf_counter()
+        for batch_start in range(0, len(passages), self.batch_size):
+            if deadline is not None and time.perf_counter() > deadline:
+                self._measure(start_time, len(scores))
+                return None
+            pairs = [
+                (query, passage)
+                for passage in passages[batch_start : batch_start + self.batch_size]
+            ]
+            scores.extend(float(score) for score in model.predict(pairs, batch_size=len(pairs)))
+        self._measure(start_time, len(scores))
+        return scores
+
+    def _measure(self, start_time: float, pair_count: int) -> None:
+        if pair_count == 0:
+            return
+        seconds_per_pair = (time.perf_counter() - start_time) / pair_count
+        # exponential moving average to adapt to the current load of the machine
+        self._seconds_per_pair = (
+            seconds_per_pair
+            if self._seconds_per_pair is None
+            else 0.8 * self._seconds_per_pair + 0.2 * seconds_per_pair
+        )
+        self._measured_at = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """Reserves a reranking slot without waiting."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self) -> None:
+        """Frees a slot reserved with try_acquire."""
+        self._slots.release()
+
+
+def get_cross_encoder_reranker(
+    model_name: str, batch_size: int = 16, backend: str = "torch"
+) -> CrossEncoderReranker:
+    """Returns a process-wide reranker so that the model is loaded only once.
+
+    The model starts loading in the background when the reranker is created.
+    """
+
+    def create_reranker() -> CrossEncoderReranker:
+        reranker = CrossEncoderReranker(model_name, batch_size=batch_size, backend=backend)
+        reranker.preload()
+        return reranker
+
+    return _rerankers.get_or_create((model_name, batch_size, backend), create_reranker)
+
+
+class RerankingRetriever(BaseRetriever):
+    """Retriever that reranks the candidates of another retriever with a cross-encoder.
+
+    Reranking is skipped, and the first top_n candidates are returned in retrieval
+    order, if the model is still loading, if all reranking slots are busy, if scoring is predicted to exceed the
+    latency budget or if the budget runs out while scoring.
+
+    Args:
+        base_retriever: Retriever that returns the candidate pool.
+        reranker: Cross-encoder that scores the candidates.
+        top_n: Number of documents to keep.
+        latency_budget: Maximum time in seconds that reranking may take.
+    """
+
+    base_retriever: BaseRetriever
+    reranker: Any
+    top_n: int
+    latency_budget: float
+
+    def _rerank(self, query: str, docs: List[Document]) -> Optional[List[Document]]:
+        if not self.reranker.is_loaded:
+            logger.info("Skip reranking, the reranker model is still loading")
+            return None
+        estimate = self.reranker.estimate_seconds(len(docs))
+        if estimate is not None and estimate > self.latency_budget:
+            logger.info(
+                "Skip reranking, predicted %.3f seconds exceed budget of %.3f seconds",
+                estimate,
+                self.latency_budget,
+            )
+            return None
+        if not self.reranker.try_acquire():
+            logger.info("Skip reranking, all reranking slots are busy")
+            return None
+        try:
+            deadline = time.perf_counter() + self.latency_budget
+            scores = self.reranker.score(
+                query, [doc.page_content for doc in docs], deadline=deadline
+            )
+        finally:
+            self.reranker.release()
+        if scores is None:
+            logger.info("Skip reranking, latency budget exceeded while scoring")
+            return None
+        ranked = sorted(zip(scores, range(len(docs))), key=lambda item: item[0], reverse=True)
+        return [docs[index] for _, index in ranked[: self.top_n]]
+
+    def get_relevant_documents(self, query: str) -> List[Document]:
+        """See base class."""
+        docs = self.base_retriever.get_relevant_documents(query)
+        if len(docs) <= 1:
+            return docs
+        start_time = time.perf_counter()
+        reranked = self._rerank(query, docs)
+        if reranked is None:
+            return docs[: self.top_n]
+        logger.info(
+            "Reranked %s candidates to %s documents in %.3f seconds",
+            len(docs),
+            len(reranked),
+            time.perf_counter() - start_time,
+        )
+        return reranked
+
+    async def aget_relevant_documents(self, query: str) -> List[Document]:
+        """See base class."""
+        return await super().aget_relevant_documents(query)
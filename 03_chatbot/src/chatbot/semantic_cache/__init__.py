@@ -0,0 +1,2 @@
+""" This module contains a semantic cache for answers of the retrieval augmented generation flow."""
+from .semantic_cache import SemanticCache, get_semantic_cache
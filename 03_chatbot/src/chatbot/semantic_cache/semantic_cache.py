@@ -0,0 +1,209 @@
+""" Module that contains a process-wide cache that finds answers to semantically similar questions.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+from chatbot.helpers import ChatbotEnvironment, ChatbotEnvironmentVariables
+from chatbot.helpers.logger import TECHNICAL_LOGGER_NAME
+
+logger = logging.getLogger(TECHNICAL_LOGGER_NAME)
+
+
+@dataclass
+class _CacheEntry:
+    created_at: float
+    query: str
+    embedding: np.ndarray
+    response: Dict[str, Any]
+
+
+class _Scope:
+    """Entries of one cache scope with a lazily rebuilt embedding matrix."""
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+
+    def changed(self):
+        self._matrix = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._keys = list(self.entries.keys())
+            self._matrix = np.stack([self.entries[key].embedding for key in self._keys])
+        return self._matrix
+
+    def key_at(self, position: int) -> str:
+        return self._keys[position]
+
+
+def _normalize(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector if norm == 0 else vector / norm
+
+
+class SemanticCache:
+    """Thread-safe cache of LLM responses that matches questions by embedding similarity.
+
+    Entries are grouped in scopes, e.g. (retriever, indices, model, prompt version), so an
+    answer is only reused for the same knowledge base, model and prompt. Include a
+    version of the knowledge base in the scope, like the index uuid and document count,
+    so that re-ingesting an index starts a new scope.
+
+    Args:
+        similarity_threshold: Minimum cosine similarity between the question and a
+            cached question to return the cached response. Default: 0.95
+        max_entries: Maximum number of entries over all scopes. The least recently used
+            entry is evicted when the cache is full. Default: 1000
+        ttl: Time to live of an entry in seconds. Default: None (entries do not expire)
+
+    Example:
+        ```python
+        cache = SemanticCache(similarity_threshold=0.95, max_entries=1000, ttl=3600)
+        cache.put(scope, "What is Genie?", embedding, response)
+        response = cache.get(scope, similar_question_embedding)
+        ```
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl: Optional[float] = None,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._scopes: Dict[Hashable, _Scope] = {}
+        self._lru: "OrderedDict[tuple, None]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _remove(self, scope_key: Hashable, query: str):
+        scope = self._scopes.get(scope_key)
+        if scope is not None and query in scope.entries:
+            del scope.entries[query]
+            scope.changed()
+            if not scope.entries:
+                del self._scopes[scope_key]
+        self._lru.pop((scope_key, query), None)
+
+    def _remove_expired(self, scope_key: Hashable, scope: _Scope):
+        if self.ttl is None:
+            return
+        now = time.monotonic()
+        expired = [
+            query
+            for query, entry in scope.entries.items()
+            if now - entry.created_at >= self.ttl
+        ]
+        for query in expired:
+            self._remove(scope_key, query)
+
+    def get(self, scope_key: Hashable, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Returns the response of the most similar cached question in a scope.
+
+        Args:
+            scope_key: Scope to search in.
+            embedding: Embedding of the question.
+
+        Returns:
+            The cached response or None if no cached question is similar enough.
+        """
+        query_vector = _normalize(embedding)
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None:
+                return None
+            self._remove_expired(scope_key, scope)
+            if scope_key not in self._scopes:
+                return None
+            similarities = scope.matrix() @ query_vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            query = scope.key_at(best)
+            self._lru.move_to_end((scope_key, query))
+            logger.info(
+                "Semantic cache hit with similarity %.3f for cached question: %s",
+                similarities[best],
+                query,
+            )
+            return scope.entries[query].response
+
+    def put(
+        self,
+        scope_key: Hashable,
+        query: str,
+        embedding: Sequence[float],
+        response: Dict[str, Any],
+    ) -> None:
+        """Stores the response for a question and evicts least recently used entries."""
+        with self._lock:
+            scope = self._scopes.setdefault(scope_key, _Scope())
+            scope.entries[query] = _CacheEntry(
+                time.monotonic(), query, _normalize(embedding), response
+            )
+            scope.changed()
+            self._lru[(scope_key, query)] = None
+            self._lru.move_to_end((scope_key, query))
+            while len(self._lru) > self.max_entries:
+                oldest_scope_key, oldest_query = next(iter(self._lru))
+                self._remove(oldest_scope_key, oldest_query)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Removes all scopes that match the predicate, e.g. after re-ingesting an index.
+
+        Returns:
+            The number of removed entries.
+        """
+        with self._lock:
+            removed = 0
+            for scope_key in [key for key in self._scopes if predicate(key)]:
+                for query in list(self._scopes[scope_key].entries):
+                    self._remove(scope_key, query)
+                    removed += 1
+            return removed
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._scopes.clear()
+            self._lru.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lru)
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Returns the process-wide semantic cache or None if it is disabled."""
+    global _semantic_cache
+    env = ChatbotEnvironment()
+    if env.get_env_variable(ChatbotEnvironmentVariables.SemanticCacheEnabled).lower() != "true":
+        return None
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            ttl = float(env.get_env_variable(ChatbotEnvironmentVariables.SemanticCacheTTLSeconds))
+            _semantic_cache = SemanticCache(
+                similarity_threshold=float(
+                    env.get_env_variable(
+                        ChatbotEnvironmentVariables.SemanticCacheSimilarityThreshold
+                    )
+                ),
+                max_entries=int(
+                    env.get_env_variable(ChatbotEnvironmentVariables.SemanticCacheMaxEntries)
+                ),
+                ttl=ttl if ttl > 0 else None,
+            )
+        return _semantic_cache
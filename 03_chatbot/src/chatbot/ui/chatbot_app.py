@@ -13,6 +13,7 @@ from chatbot.catalog import (
     MemoryCatalogItem,
     PromptCatalog,
     PromptCatalogItem,
+    get_catalog_registry,
 )
 from chatbot.config import (
     AmazonBedrock,
@@ -192,11 +193,13 @@ def write_chatbot(base_dir: str, environment: ChatbotEnvironment):
             memory.clear()    
 
     if "memory_catalog" not in st.session_state:
-        memory_catalog = MemoryCatalog(
-            account_id=aws_config.account_id, regions=regions, logger=logger
+        memory_catalog = get_catalog_registry().get(
+            ("memory", aws_config.account_id, tuple(regions)),
+            lambda: MemoryCatalog(
+                account_id=aws_config.account_id, regions=regions, logger=logger
+            ),
         )
         st.session_state["memory_catalog"] = memory_catalog
-        memory_catalog.bootstrap()
 
     memory_catalog: List[MemoryCatalogItem] = st.session_state["memory_catalog"]
     
@@ -210,19 +213,26 @@ def write_chatbot(base_dir: str, environment: ChatbotEnvironment):
 
     # Layout of input/response containers
     response_container = st.empty()
+    # placeholder of the message that is streamed, created once the prompt is shown
+    stream_placeholder = None
 
     def on_llm_response(text: str):
-        #response_container.empty()
-        stream_msg = ChatMessage(ChatParticipant.BOT, text)
-        #chat_history.append_to_previous_message(stream_msg)
-        with response_container.container():
-            chat_history.write()
-            with st.chat_message(stream_msg.sender.value, avatar=stream_msg.avatar):
-                stream_msg.write()
-            
+        # only the streamed message is rendered again, never the chat history
+        if stream_placeholder is None:
+            return
+        with stream_placeholder.container():
+            ChatMessage(ChatParticipant.BOT, text).write()
 
+    frame_interval = (
+        float(
+            environment.get_env_variable(
+                ChatbotEnvironmentVariables.StreamingFrameIntervalMs
+            )
+        )
+        / 1000
+    )
     llm_callbacks = [
-        StreamHandler(callback=on_llm_response)
+        StreamHandler(callback=on_llm_response, frame_interval=frame_interval)
     ]
     _sidebar = write_sidebar(
         chatbot_name,
@@ -254,7 +264,8 @@ def write_chatbot(base_dir: str, environment: ChatbotEnvironment):
         refresh(memory)
         prompt = button_prompt
 
-    with response_container.container():
+    history_container = response_container.container()
+    with history_container:
         chat_history.write()
 
     
@@ -278,6 +289,14 @@ def write_chatbot(base_dir: str, environment: ChatbotEnvironment):
 
         prompt_msg = ChatMessage(ChatParticipant.USER, prompt)
         chat_history.add_chat_message(prompt_msg)
+        # show the prompt and stream the response below the history that is already shown
+        with history_container:
+            with st.chat_message(prompt_msg.sender.value, avatar=prompt_msg.avatar):
+                prompt_msg.write()
+            # same avatar as the answer gets in the history
+            bot_avatar = ChatMessage(ChatParticipant.BOT, "").avatar
+            with st.chat_message(ChatParticipant.BOT.value, avatar=bot_avatar):
+                stream_placeholder = st.empty()
         
         response = app.generate_response(
             prompt, memory, callbacks=[llm_log_handler, 
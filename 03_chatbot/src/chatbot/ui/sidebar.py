@@ -15,6 +15,8 @@ from chatbot.catalog import (
     AgentChainCatalogItem,
     FlowCatalog,
     FlowCatalogItem,
+    SageMakerModelItem,
+    get_catalog_registry,
 )
 from chatbot.config import AppConfig, AWSConfig
 from numpy import ndarray
@@ -23,11 +25,12 @@ from streamlit.type_util import OptionSequence, T
 from chatbot.catalog.agent_chain_catalog_item_sql_generator import AGENT_CHAIN_SQL_GENERATOR_NAME
 from langchain.document_loaders.pdf import AmazonTextractPDFLoader
 
-import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+from chatbot.helpers import get_client
+from chatbot.helpers.sagemaker_async_endpoint import ENDPOINT_READY, ENDPOINT_WAKING_UP
+from chatbot.helpers.sagemaker_warmup import get_keep_warm
 import logging
 
-s3 = boto3.client('s3')
 # set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -35,14 +38,14 @@ def upload_file_to_s3(file_name, bucket, object_name=None):
     if object_name is None:
         object_name = file_name
     try:
-        s3.upload_file(file_name, bucket, object_name)
+        get_client("s3").upload_file(file_name, bucket, object_name)
     except ClientError as e:
         logger.error(e)
         return False
 
 def delete_file_from_s3(bucket, object_name):
     try:
-        s3.delete_object(Bucket=bucket, Key=object_name)
+        get_client("s3").delete_object(Bucket=bucket, Key=object_name)
     except ClientError as e:
         logger.error(e)
         return False
@@ -93,6 +96,7 @@ def write_sidebar(
         and whether the retriever or model changes since the last render.
     """
     _ = gettext
+    catalog_registry = get_catalog_registry()
 
     def __render_dropdown(
         label: str, selected_state_name: str, options: OptionSequence[T], params
@@ -115,6 +119,27 @@ def write_sidebar(
                 changed = True
         return selected, changed
 
+    def __render_endpoint_readiness(model: SageMakerModelItem) -> None:
+        """Wakes up the async endpoint of the selected model and shows whether it is ready."""
+        try:
+            model.wake_up()
+            readiness = model.get_readiness()
+        except (BotoCoreError, ClientError) as err:
+            logger.warning(f"Could not wake up endpoint {model.endpoint_name}: {err}")
+            return
+        if readiness == ENDPOINT_READY:
+            st.caption("🟢 " + _("Model endpoint is ready."))
+        elif readiness == ENDPOINT_WAKING_UP:
+            st.caption("🟡 " + _("Model endpoint is waking up. This takes about 10 minutes."))
+        else:
+            st.caption("⚪ " + _("Model endpoint is scaled to zero."))
+
+        keep_warm = get_keep_warm()
+        if keep_warm is not None:
+            keep_warm.touch(
+                (model.region, model.endpoint_name), lambda: model.wake_up(force=True)
+            )
+
     with st.sidebar:
         # Logo layout with 2 columns good for small square logo
         # col1, col2 = st.columns([1, 2])
@@ -133,13 +158,11 @@ def write_sidebar(
         ########### FLOW STUFF ###############
         flow_state_name = "flow_catalog"
         if flow_state_name not in st.session_state:
-            flow_catalog = FlowCatalog(
-                aws_config.account_id, 
-                regions, 
-                logger
+            flow_catalog = catalog_registry.get(
+                ("flow", aws_config.account_id, tuple(regions)),
+                lambda: FlowCatalog(aws_config.account_id, regions, logger),
                 )
             st.session_state[flow_state_name] = flow_catalog
-            flow_catalog.bootstrap()
 
         flow_options = st.session_state[flow_state_name]
         flow_label = _("Flow")
@@ -190,12 +213,11 @@ def write_sidebar(
         if flow.enable_agents_chains:
             agents_chains_state_name = "agents_chains_catalog"
             if agents_chains_state_name not in st.session_state:
-                agents_chains_catalog = AgentChainCatalog(
-                    regions, 
-                    logger
+                agents_chains_catalog = catalog_registry.get(
+                    ("agent_chain", tuple(regions)),
+                    lambda: AgentChainCatalog(regions, logger),
                     )
                 st.session_state[agents_chains_state_name] = agents_chains_catalog
-                agents_chains_catalog.bootstrap()
 
             agents_chains_options = st.session_state[agents_chains_state_name]
             agents_chains_label = _("Agent Chains")
@@ -230,15 +252,17 @@ def write_sidebar(
                 ########### SQL TOOL MODEL STUFF ###############
                 sql_model_state_name = "sql_model_catalog"
                 if sql_model_state_name not in st.session_state:
-                    sql_model_catalog = ModelCatalog(
-                        regions,
-                        bedrock_config=app_config.amazon_bedrock or [],
-                        logger=logger,
-                        llm_config=app_config.llm_config.parameters,
-                        callbacks=llm_callbacks
+                    sql_model_catalog = catalog_registry.get(
+                        ("model", tuple(regions)),
+                        lambda: ModelCatalog(
+                            regions,
+                            bedrock_config=app_config.amazon_bedrock or [],
+                            logger=logger,
+                            llm_config=app_config.llm_config.parameters,
+                        ),
                     )
+                    sql_model_catalog.set_callbacks(llm_callbacks)
                     st.session_state[sql_model_state_name] = sql_model_catalog
-                    sql_model_catalog.bootstrap()
                     print("sql_model_catalog",sql_model_catalog)
                 sql_model_options = st.session_state[sql_model_state_name]
                 sql_language_model_label = _("SQL Tool Language Model")
@@ -252,14 +276,13 @@ def write_sidebar(
         if flow.enable_retriever:
             retriever_state_name = "retriever_catalog"
             if retriever_state_name not in st.session_state:
-                retriever_catalog = RetrieverCatalog(
-                    aws_config.account_id, 
-                    regions, 
-                    app_config,
-                    logger
+                retriever_catalog = catalog_registry.get(
+                    ("retriever", aws_config.account_id, tuple(regions)),
+                    lambda: RetrieverCatalog(
+                        aws_config.account_id, regions, app_config, logger
+                        ),
                     )
                 st.session_state[retriever_state_name] = retriever_catalog
-                retriever_catalog.bootstrap()
 
             retriever_options = st.session_state[retriever_state_name]
             knowledgebase_label = _("Knowledge Base")
@@ -325,15 +348,17 @@ def write_sidebar(
         ########### MAIN MODEL STUFF ###############
         model_state_name = "model_catalog"
         if model_state_name not in st.session_state:
-            model_catalog = ModelCatalog(
-                regions,
-                bedrock_config=app_config.amazon_bedrock or [],
-                logger=logger,
-                llm_config=app_config.llm_config.parameters,
-                callbacks=llm_callbacks
+            model_catalog = catalog_registry.get(
+                ("model", tuple(regions)),
+                lambda: ModelCatalog(
+                    regions,
+                    bedrock_config=app_config.amazon_bedrock or [],
+                    logger=logger,
+                    llm_config=app_config.llm_config.parameters,
+                ),
             )
+            model_catalog.set_callbacks(llm_callbacks)
             st.session_state[model_state_name] = model_catalog
-            model_catalog.bootstrap()
             print("model_catalog",model_catalog)
         model_options = st.session_state[model_state_name]
         language_model_label = _("Language Model")
@@ -360,6 +385,9 @@ def write_sidebar(
             model.streaming_on = streaming
             logger.info(f"Selected model is {model}")
 
+        if isinstance(model, SageMakerModelItem) and model.is_async:
+            __render_endpoint_readiness(model)
+
         with st.expander('Change model parameters'):
             temperature = st.slider("Temperature",
                                     min_value=0.0,
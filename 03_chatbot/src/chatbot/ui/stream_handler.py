@@ -1,15 +1,53 @@
+import time
 from dataclasses import dataclass
+from typing import Callable
+
 from langchain.callbacks.base import BaseCallbackHandler
 
+DEFAULT_FRAME_INTERVAL = 0.05
+""" Seconds between two renders of a streamed response. """
+
+
 # reference https://github.com/streamlit/StreamlitLangChain/blob/main/streaming_demo.py
 @dataclass
 class StreamHandler(BaseCallbackHandler):
-    
-    def __init__(self, callback, initial_text=""):
+    """Collects streamed tokens and renders the growing response at most once per frame.
+
+    Tokens that arrive within the same frame interval are coalesced into a single call
+    of the callback. The remaining tokens are rendered when the LLM finished.
+
+    Args:
+        callback: Renders the response text received so far.
+        initial_text: Text that the response starts with. Default: ""
+        frame_interval: Minimum number of seconds between two calls of the callback.
+            0 renders every token. Default: 0.05
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[str], None],
+        initial_text: str = "",
+        frame_interval: float = DEFAULT_FRAME_INTERVAL,
+    ):
         self.llm_callback = callback
         self.text = initial_text
+        self.frame_interval = frame_interval
+        # number of times the callback was called, e.g. for benchmarks
+        self.render_count = 0
+        self._rendered_text = initial_text
+        self._last_render = 0.0
+
+    def _render(self):
+        self.llm_callback(self.text)
+        self.render_count += 1
+        self._rendered_text = self.text
+        self._last_render = time.monotonic()
 
     def on_llm_new_token(self, token: str, **kwargs):
         self.text += token
-        self.llm_callback(self.text)
-        
\ No newline at end of file
+        if time.monotonic() - self._last_render >= self.frame_interval:
+            self._render()
+
+    def on_llm_end(self, response, **kwargs):
+        if self.text != self._rendered_text:
+            self._render()
@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from chatbot.batch import BackendLimits
+from chatbot.batch.batch_runner import _parse_limits
+
+
+class _ConcurrencyProbe:
+    """Counts the questions that are in flight at the same time."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def run(self, limits: BackendLimits, backends, seconds=0.05):
+        with limits.acquire(backends):
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(seconds)
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _run_concurrently(probe, limits, backends, questions=8):
+    with ThreadPoolExecutor(max_workers=questions) as executor:
+        list(executor.map(lambda _: probe.run(limits, backends), range(questions)))
+
+
+def test_backend_limit_bounds_questions_in_flight():
+    probe = _ConcurrencyProbe()
+
+    _run_concurrently(probe, BackendLimits({"bedrock": 2}), ["bedrock", "opensearch"])
+
+    assert probe.max_in_flight == 2
+
+
+def test_backends_without_limit_are_not_bounded():
+    probe = _ConcurrencyProbe()
+
+    _run_concurrently(probe, BackendLimits({"bedrock": 2}), ["kendra"])
+
+    assert probe.max_in_flight == 8
+
+
+def test_the_lowest_limit_of_several_backends_applies():
+    probe = _ConcurrencyProbe()
+    limits = BackendLimits({"bedrock": 3, "opensearch": 1})
+
+    _run_concurrently(probe, limits, ["opensearch", "bedrock", "bedrock"])
+
+    assert probe.max_in_flight == 1
+
+
+def test_capacity_is_released_when_a_question_fails():
+    limits = BackendLimits({"bedrock": 1})
+
+    with pytest.raises(RuntimeError):
+        with limits.acquire(["bedrock"]):
+            raise RuntimeError("model error")
+
+    acquired = threading.Event()
+
+    def acquire():
+        with limits.acquire(["bedrock"]):
+            acquired.set()
+
+    thread = threading.Thread(target=acquire, daemon=True)
+    thread.start()
+    assert acquired.wait(timeout=1.0)
+
+
+def test_parse_limits():
+    assert _parse_limits(["bedrock=4", "opensearch=8"]) == {"bedrock": 4, "opensearch": 8}
+    with pytest.raises(ValueError):
+        _parse_limits(["bedrock"])
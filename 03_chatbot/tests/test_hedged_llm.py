@@ -0,0 +1,136 @@
+import time
+from typing import Any, Iterator, List, Optional
+
+import pytest
+from botocore.exceptions import ClientError
+from chatbot.helpers.hedged_llm import MIN_LATENCY_SAMPLES, HedgedLLM, LatencyTracker
+from langchain.llms.base import LLM
+from langchain_core.outputs import GenerationChunk
+
+
+class _ScriptedLLM(LLM):
+    """Streams its tokens after a delay or fails with an error code of Amazon Bedrock."""
+
+    tokens: List[str]
+    delay: float = 0.0
+    error_code: Optional[str] = None
+    # tokens that were produced, the list is shared with the copies that pydantic makes
+    streamed: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    def _stream(self, prompt: str, stop=None, run_manager=None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        time.sleep(self.delay)
+        if self.error_code:
+            raise ClientError({"Error": {"Code": self.error_code, "Message": "error"}}, "InvokeModel")
+        for token in self.tokens:
+            self.streamed.append(token)
+            yield GenerationChunk(text=token)
+
+
+def _hedged_llm(*llms, initial_hedge_delay=0.2):
+    return HedgedLLM(
+        llms=list(llms),
+        latency_trackers=[LatencyTracker() for _ in llms],
+        initial_hedge_delay=initial_hedge_delay,
+    )
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_latency_tracker_needs_enough_samples():
+    tracker = LatencyTracker()
+    for _ in range(MIN_LATENCY_SAMPLES - 1):
+        tracker.record(1.0)
+
+    assert tracker.percentile(0.95) is None
+    tracker.record(1.0)
+    assert tracker.percentile(0.95) == 1.0
+
+
+def test_latency_tracker_uses_the_nearest_rank_of_the_recent_latencies():
+    tracker = LatencyTracker(window=100)
+    for _ in range(50):
+        tracker.record(100.0)
+    for value in range(1, 101):
+        tracker.record(value / 100)
+
+    assert len(tracker) == 100
+    assert tracker.percentile(0.95) == 0.95
+    assert tracker.percentile(0.5) == 0.5
+
+
+def test_hedge_delay_follows_the_latencies_of_the_first_model():
+    llm = _hedged_llm(_ScriptedLLM(tokens=["a"]), _ScriptedLLM(tokens=["b"]))
+    assert llm.get_hedge_delay() == 0.2
+
+    for _ in range(MIN_LATENCY_SAMPLES):
+        llm.latency_trackers[0].record(0.5)
+    assert llm.get_hedge_delay() == 0.5
+
+    for _ in range(200):
+        llm.latency_trackers[0].record(0.001)
+    # never hedge right away
+    assert llm.get_hedge_delay() == 0.1
+
+
+def test_fast_first_model_wins_without_hedging():
+    first = _ScriptedLLM(tokens=["first", " answer"], streamed=[])
+    second = _ScriptedLLM(tokens=["second"], streamed=[])
+
+    assert _hedged_llm(first, second).invoke("question") == "first answer"
+    assert second.streamed == []
+
+
+def test_slow_first_model_is_hedged_and_cancelled():
+    first = _ScriptedLLM(tokens=["slow", " answer", " ..."], delay=0.6, streamed=[])
+    second = _ScriptedLLM(tokens=["fast", " answer"], streamed=[])
+    llm = _hedged_llm(first, second)
+
+    start_time = time.perf_counter()
+    assert llm.invoke("question") == "fast answer"
+    assert time.perf_counter() - start_time < 0.6
+
+    # the slow model stops reading its response after the first token
+    _wait_for(lambda: len(first.streamed) > 0)
+    time.sleep(0.1)
+    assert first.streamed == ["slow"]
+    # the latency of the cancelled request still counts
+    assert len(llm.latency_trackers[0]) == 1
+
+
+def test_throttled_first_model_is_hedged_right_away():
+    first = _ScriptedLLM(tokens=["first"], error_code="ThrottlingException", streamed=[])
+    second = _ScriptedLLM(tokens=["second"], streamed=[])
+
+    start_time = time.perf_counter()
+    assert _hedged_llm(first, second, initial_hedge_delay=5.0).invoke("question") == "second"
+    assert time.perf_counter() - start_time < 1.0
+
+
+def test_other_errors_are_raised_without_hedging():
+    first = _ScriptedLLM(tokens=["first"], error_code="ValidationException", streamed=[])
+    second = _ScriptedLLM(tokens=["second"], streamed=[])
+
+    with pytest.raises(ClientError, match="ValidationException"):
+        _hedged_llm(first, second, initial_hedge_delay=5.0).invoke("question")
+    assert second.streamed == []
+
+
+def test_error_is_raised_when_all_models_are_throttled():
+    llm = _hedged_llm(
+        _ScriptedLLM(tokens=["first"], error_code="ThrottlingException"),
+        _ScriptedLLM(tokens=["second"], error_code="ThrottlingException"),
+    )
+
+    with pytest.raises(ClientError, match="ThrottlingException"):
+        llm.invoke("question")
@@ -0,0 +1,54 @@
+import math
+
+import pytest
+from chatbot.retrieval.evaluation import ndcg_at_k, percentile, recall_at_k, reciprocal_rank
+
+
+def test_recall_at_k_counts_relevant_sources_in_the_first_k():
+    retrieved = ["a", "x", "b", "y"]
+    relevant = ["a", "b", "c"]
+
+    assert recall_at_k(retrieved, relevant, 1) == pytest.approx(1 / 3)
+    assert recall_at_k(retrieved, relevant, 2) == pytest.approx(1 / 3)
+    assert recall_at_k(retrieved, relevant, 3) == pytest.approx(2 / 3)
+    assert recall_at_k(retrieved, relevant, 10) == pytest.approx(2 / 3)
+
+
+def test_recall_at_k_without_relevant_sources_is_zero():
+    assert recall_at_k(["a"], [], 3) == 0.0
+
+
+def test_reciprocal_rank_of_the_first_relevant_source():
+    assert reciprocal_rank(["x", "y", "a", "b"], ["a", "b"]) == pytest.approx(1 / 3)
+    assert reciprocal_rank(["x", "y"], ["a"]) == 0.0
+
+
+def test_ndcg_at_k_is_one_for_an_ideal_ranking():
+    assert ndcg_at_k(["a", "b", "x"], ["a", "b"], 3) == pytest.approx(1.0)
+
+
+def test_ndcg_at_k_discounts_relevant_sources_by_rank():
+    # one relevant source at rank 2, ideal is rank 1
+    assert ndcg_at_k(["x", "a"], ["a"], 2) == pytest.approx(1 / math.log2(3))
+    # the ideal ranking is cut off at k as well
+    expected = (1 / math.log2(3)) / (1 + 1 / math.log2(3))
+    assert ndcg_at_k(["x", "a", "b"], ["a", "b", "c"], 2) == pytest.approx(expected)
+
+
+def test_ndcg_at_k_without_relevant_sources_is_zero():
+    assert ndcg_at_k(["a"], [], 3) == 0.0
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [float(value) for value in range(100, 0, -1)]
+
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile(values, 0.0) == 1.0
+
+
+def test_percentile_of_few_values():
+    assert percentile([0.3], 0.99) == 0.3
+    assert percentile([0.2, 0.1], 0.5) == 0.1
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from chatbot.helpers.sagemaker_streaming_endpoint import iter_tgi_tokens, strip_stop_words
+
+
+def _payload_parts(*events, split_at=7):
+    # SageMaker splits the stream at arbitrary bytes, not at events
+    data = b"".join(b"data:" + json.dumps(event).encode("utf-8") + b"\n\n" for event in events)
+    return [
+        {"PayloadPart": {"Bytes": data[start : start + split_at]}}
+        for start in range(0, len(data), split_at)
+    ]
+
+
+def _token(text, special=False):
+    return {"token": {"id": 1, "text": text, "logprob": -0.1, "special": special}}
+
+
+def test_iter_tgi_tokens_reassembles_events_split_across_payload_parts():
+    stream = _payload_parts(_token("Hello"), _token(" wörld"), _token("</s>", special=True))
+
+    assert list(iter_tgi_tokens(stream)) == ["Hello", " wörld"]
+
+
+def test_iter_tgi_tokens_skips_events_without_payload():
+    stream = [{"InternalStreamFailure": {}}] + _payload_parts(_token("Hi"))
+
+    assert list(iter_tgi_tokens(stream)) == ["Hi"]
+
+
+def test_iter_tgi_tokens_raises_errors_of_the_endpoint():
+    stream = _payload_parts(_token("Hi"), {"error": "Input validation error"})
+
+    with pytest.raises(ValueError, match="Input validation error"):
+        list(iter_tgi_tokens(stream))
+
+
+def test_strip_stop_words_stops_before_the_stop_word():
+    tokens = ["The answer", " is 42.", "\nHuman:", " next question"]
+
+    assert "".join(strip_stop_words(tokens, ["\nHuman:"])) == "The answer is 42."
+
+
+def test_strip_stop_words_holds_back_a_possible_stop_word_start():
+    tokens = iter(["Hello", "\nHu", "man:", " ignored"])
+    stripped = strip_stop_words(tokens, ["\nHuman:"])
+
+    assert next(stripped) == "Hello"
+    # "\nHu" is not yielded until the next token shows that it is a stop word
+    assert list(stripped) == []
+
+
+def test_strip_stop_words_releases_held_back_text_that_is_no_stop_word():
+    tokens = ["Hello", "\nHu", "go here", "\nH"]
+
+    chunks = list(strip_stop_words(tokens, ["\nHuman:"]))
+
+    assert chunks == ["Hello", "\nHugo here", "\nH"]
+
+
+def test_strip_stop_words_uses_the_first_of_several_stop_words():
+    tokens = ["one</s>two\nHuman:"]
+
+    assert list(strip_stop_words(tokens, ["\nHuman:", "</s>"])) == ["one"]
+
+
+def test_strip_stop_words_without_stop_words_yields_all_tokens():
+    assert list(strip_stop_words(["a", "b"], [""])) == ["a", "b"]
@@ -266,6 +266,26 @@ class ChatbotStack(GenAiStack):
                 resources=["*"],
             )
         )
+        # Policy statement to find the resources with genie tags in a single call per region
+        role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["tag:GetResources"],
+                resources=["*"],
+            )
+        )
+        # Policy statement to receive completion notifications of SageMaker async endpoints
+        role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "sqs:ReceiveMessage",
+                    "sqs:DeleteMessage",
+                    "sqs:ChangeMessageVisibility",
+                ],
+                resources=["*"],
+            )
+        )
         role.add_to_policy(
             iam.PolicyStatement(
                 effect=iam.Effect.ALLOW,
@@ -343,6 +363,33 @@ class ChatbotStack(GenAiStack):
             )
         )
 
+        # local vector stores that the ingestion uploads to S3, see LOCAL_VECTOR_STORE_S3_URI
+        local_vector_store_s3_uri = config.get("local_vector_store_s3_uri")
+        if local_vector_store_s3_uri:
+            bucket_name, _, prefix = local_vector_store_s3_uri.removeprefix("s3://").partition("/")
+            prefix = prefix.strip("/")
+            role.add_to_policy(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["s3:ListBucket"],
+                    resources=[f"arn:aws:s3:::{bucket_name}"],
+                    conditions=(
+                        {"StringLike": {"s3:prefix": [f"{prefix}/*"]}} if prefix else None
+                    ),
+                )
+            )
+            role.add_to_policy(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["s3:GetObject"],
+                    resources=[
+                        f"arn:aws:s3:::{bucket_name}/{prefix}/*"
+                        if prefix
+                        else f"arn:aws:s3:::{bucket_name}/*"
+                    ],
+                )
+            )
+
         # ==================================================
         # =============== FARGATE SERVICE ==================
         # ==================================================
@@ -371,7 +418,12 @@ class ChatbotStack(GenAiStack):
                 "AWS_DEFAULT_REGION": self.region,
                 "BEDROCK_REGION": config["bedrock_region"],
                 "AMAZON_TEXTRACT_S3_BUCKET": textract_bucket.bucket_name,
-                "APP_PREFIX": config["appPrefix"]
+                "APP_PREFIX": config["appPrefix"],
+                **(
+                    {"LOCAL_VECTOR_STORE_S3_URI": local_vector_store_s3_uri}
+                    if local_vector_store_s3_uri
+                    else {}
+                ),
             },
             secrets={
                 "PASSWORD": ecs.Secret.from_secrets_manager(